@@ -0,0 +1,120 @@
+"""Load time and memory: pickled model + scaler vs the pickle-free bundle.
+
+Exports the bundle for ``--artifacts`` into a temporary directory, then loads
+each format ``--repeat`` times in a fresh interpreter (so nothing is cached in
+the process, with the model libraries already imported) and reports the median
+load time, the ``tracemalloc`` peak of a load and the process' peak RSS. ``bundle`` verifies every checksum first,
+``bundle-noverify`` skips that. Finally the predictions of both are compared.
+
+    python -m benchmarks.bench_artifact_bundle --repeat 5
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.common import ROOT
+
+MODES = ("pickle", "bundle", "bundle-noverify")
+
+
+def _load(mode: str, artifacts: Path, bundle: Path):
+    if mode == "pickle":
+        import pickle
+
+        with open(artifacts / "best_model.pkl", "rb") as f:
+            model = pickle.load(f)
+        with open(artifacts / "scaler.pkl", "rb") as f:
+            scaler = pickle.load(f)
+        return model, scaler
+    from src.inference.artifact_bundle import load_artifact_bundle
+
+    model, scaler, _ = load_artifact_bundle(bundle, verify=mode == "bundle")
+    return model, scaler
+
+
+def _worker(mode: str, artifacts: Path, bundle: Path):
+    # Import the libraries first so only the load itself is measured.
+    import numpy  # noqa: F401
+    import sklearn.compose  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+    import sklearn.impute  # noqa: F401
+    import sklearn.pipeline  # noqa: F401
+    import sklearn.preprocessing  # noqa: F401
+    import src.inference.artifact_bundle  # noqa: F401
+    try:
+        import imblearn.ensemble  # noqa: F401
+    except ImportError:
+        pass
+
+    start = time.perf_counter()
+    _load(mode, artifacts, bundle)
+    load_s = time.perf_counter() - start
+    # A second load under tracemalloc, which would distort the timing.
+    tracemalloc.start()
+    _load(mode, artifacts, bundle)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({"load_s": load_s, "traced_peak": peak, "max_rss": rss}))
+
+
+def _run(mode: str, artifacts: Path, bundle: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_artifact_bundle", "--worker", mode,
+         "--artifacts", str(artifacts), "--bundle", str(bundle)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--artifacts", default=str(ROOT / "artifacts"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--bundle", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    artifacts = Path(args.artifacts).resolve()
+    if args.worker:
+        _worker(args.worker, artifacts, Path(args.bundle))
+        return
+
+    import numpy as np
+    import pandas as pd
+
+    from src.inference.artifact_bundle import export_from_pickles, read_manifest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The pickles shipped with the repo are as trusted as its code.
+        bundle = export_from_pickles(artifacts, Path(tmp) / "bundle", allow_pickle=True)
+        manifest = read_manifest(bundle)
+        pickled = sum((artifacts / name).stat().st_size for name in ("best_model.pkl", "scaler.pkl"))
+        bundled = sum(spec["bytes"] for spec in manifest["files"].values()) + (bundle / "manifest.json").stat().st_size
+        print(f"model {manifest['model']['class']}: pickles {pickled / 2**20:.1f} MB, bundle {bundled / 2**20:.1f} MB")
+        print(f"{'mode':16} {'load ms':>9} {'traced MB':>10} {'max RSS MB':>11}")
+        for mode in MODES:
+            runs = [_run(mode, artifacts, bundle) for _ in range(args.repeat)]
+            print(
+                f"{mode:16} {statistics.median(r['load_s'] for r in runs) * 1e3:9.1f} "
+                f"{statistics.median(r['traced_peak'] for r in runs) / 2**20:10.1f} "
+                f"{statistics.median(r['max_rss'] for r in runs) / 2**20:11.1f}"
+            )
+
+        columns = manifest["feature_cols"]
+        X = pd.DataFrame(np.random.default_rng(0).normal(0.0, 1.0, (20_000, len(columns))), columns=columns)
+        X["Amount"] = X["Amount"].abs() * 100
+        diffs = []
+        for model, scaler in (_load("pickle", artifacts, bundle), _load("bundle", artifacts, bundle)):
+            diffs.append(model.predict_proba(scaler.transform(X))[:, 1])
+        print(f"max |proba diff| {np.abs(diffs[0] - diffs[1]).max():.3g}")
+
+
+if __name__ == "__main__":
+    main()
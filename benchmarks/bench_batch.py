@@ -0,0 +1,47 @@
+"""Throughput of ``/predict/batch`` against N sequential ``/predict`` calls.
+
+Drives the app in-process through FastAPI's TestClient (requires ``httpx``).
+
+    python -m benchmarks.bench_batch --rows 2000
+"""
+import argparse
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import ensure_bundle, synthetic_transactions, timed
+from dev.backend.app import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--single-rows", type=int, default=500,
+                        help="rows scored through /predict (extrapolated to --rows)")
+    args = parser.parse_args()
+    ensure_bundle()
+
+    df = synthetic_transactions(args.rows)
+    records = df.to_dict(orient="records")
+    columns = {c: df[c].tolist() for c in df.columns}
+
+    with TestClient(app) as client:
+        client.post("/predict", json=records[0])
+
+        n_single = min(args.single_rows, args.rows)
+        _, single_s = timed(lambda: [client.post("/predict", json=r).raise_for_status() for r in records[:n_single]])
+        single_rps = n_single / single_s
+
+        resp, rows_s = timed(client.post, "/predict/batch", json={"transactions": records})
+        resp.raise_for_status()
+        resp, cols_s = timed(client.post, "/predict/batch", json={"columns": columns})
+        resp.raise_for_status()
+
+    print(f"{'mode':<22}{'rows':>10}{'seconds':>12}{'rows/sec':>14}")
+    print(f"{'single /predict':<22}{n_single:>10}{single_s:>12.3f}{single_rps:>14.0f}")
+    for name, secs in (("batch (row form)", rows_s), ("batch (columnar)", cols_s)):
+        print(f"{name:<22}{args.rows:>10}{secs:>12.3f}{args.rows / secs:>14.0f}"
+              f"   {args.rows / secs / single_rps:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Concurrent ``/predict`` load with and without the micro-batching coalescer.
+
+Fires ``--concurrency`` overlapping requests through an in-process ASGI client
+and reports throughput, p50/p99 latency and the coalescer's batch statistics.
+
+    python -m benchmarks.bench_coalescer --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import ensure_bundle, synthetic_transactions
+
+
+async def drive(app, records, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(record):
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.post("/predict", json=record)
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(r) for r in records))
+        elapsed = time.perf_counter() - start
+        stats = (await client.get("/coalescer")).json()
+    return np.array(latencies) * 1e3, elapsed, stats
+
+
+async def run_mode(coalesce, args, records):
+    os.environ["FRAUDSHIELD_COALESCE"] = "1" if coalesce else "0"
+    os.environ["FRAUDSHIELD_COALESCE_MAX_BATCH"] = str(args.max_batch)
+    os.environ["FRAUDSHIELD_COALESCE_MAX_WAIT_MS"] = str(args.max_wait_ms)
+    module = importlib.reload(importlib.import_module("dev.backend.app"))
+    async with module.lifespan(module.app):
+        return await drive(module.app, records, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    ensure_bundle()
+
+    records = synthetic_transactions(args.requests).to_dict(orient="records")
+    print(f"{'mode':<12}{'req/sec':>10}{'p50 ms':>10}{'p99 ms':>10}{'mean batch':>12}")
+    for coalesce in (False, True):
+        latencies, elapsed, stats = asyncio.run(run_mode(coalesce, args, records))
+        mean_batch = f"{stats['mean_batch_size']:.1f}" if stats["enabled"] else "-"
+        print(f"{'coalesced' if coalesce else 'direct':<12}{len(records) / elapsed:>10.0f}"
+              f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 99):>10.2f}{mean_batch:>12}")
+
+
+if __name__ == "__main__":
+    main()
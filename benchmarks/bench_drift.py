@@ -0,0 +1,63 @@
+"""Cost and sensitivity of the streaming drift monitor.
+
+Builds a reference from ``--reference`` synthetic rows, then reports:
+
+* the microseconds ``DriftMonitor.update`` adds per call and per row for each
+  batch size, counting every row and sampling 1 in 10;
+* the monitor's memory, which does not grow with traffic, and the cost of a
+  ``snapshot`` (what ``/drift`` and ``/metrics`` compute);
+* PSI / KS of ``Amount`` and the score for fresh rows from the reference
+  distribution and for rows with ``Amount`` scaled by ``--shift``.
+
+    python -m benchmarks.bench_drift
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import FEATURE_COLS, synthetic_transactions, timed
+from src.inference.drift import DriftMonitor, build_reference
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reference", type=int, default=200_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 1000, 10000])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--shift", type=float, default=2.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    reference = build_reference(
+        synthetic_transactions(args.reference, seed=1).to_numpy(), FEATURE_COLS, rng.beta(0.5, 20, args.reference)
+    )
+    X = synthetic_transactions(max(args.sizes), seed=2).to_numpy()
+    scores = rng.beta(0.5, 20, len(X))
+
+    print(f"{'rows':>6} {'rate':>5} {'us/call':>9} {'us/row':>8}")
+    for size in args.sizes:
+        for rate in (1.0, 0.1):
+            monitor = DriftMonitor(reference, FEATURE_COLS, sample_rate=rate)
+            _, secs = timed(lambda: [monitor.update(X[:size], scores[:size]) for _ in range(args.calls)])
+            per_call = secs / args.calls * 1e6
+            print(f"{size:6} {rate:5.1f} {per_call:9.1f} {per_call / size:8.2f}")
+
+    nbytes = monitor.current.nbytes + monitor.previous.nbytes + monitor.edges.nbytes + monitor.expected.nbytes
+    _, snap_s = timed(lambda: [monitor.snapshot() for _ in range(100)])
+    print(f"monitor memory {nbytes / 1024:.1f} KiB for {len(monitor.names)} series; snapshot {snap_s / 100 * 1e6:.0f} us")
+
+    for label, amount_scale in (("same distribution", 1.0), (f"Amount x{args.shift}", args.shift)):
+        monitor = DriftMonitor(reference, FEATURE_COLS)
+        live = X.copy()
+        live[:, FEATURE_COLS.index("Amount")] *= amount_scale
+        monitor.update(live, scores)
+        series = monitor.snapshot()["series"]
+        print(
+            f"{label:18} Amount PSI {series['Amount']['psi']:.4f} KS {series['Amount']['ks']:.4f} | "
+            f"score PSI {series['fraud_probability']['psi']:.4f} | "
+            f"max feature PSI {max(series[c]['psi'] for c in FEATURE_COLS):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Cost of TreeSHAP attributions (``explain=true``) next to scoring alone.
+
+For each batch size, scores the batch with the compiled kernel and explains it,
+and reports microseconds per row for both. Since the API explains only rows
+predicted as fraud, ``scored+explained`` is the per-request cost at the given
+``--flagged`` share. Also checks that each row's contributions plus the base
+value add up to its probability.
+
+    python -m benchmarks.bench_explain --flagged 0.01
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import FEATURE_COLS, ROOT, ensure_bundle, timed
+from src.inference.explain import PathExplainer
+from src.inference.forest_kernel import compile_pipeline, probe_rows
+from src.utils.metrics import load_object
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--flagged", type=float, default=0.01, help="share of rows above the threshold")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    ensure_bundle()
+
+    model = load_object(str(ROOT / "artifacts" / "best_model.pkl"))
+    scaler = load_object(str(ROOT / "artifacts" / "scaler.pkl"))
+    kernel = compile_pipeline(scaler, model, FEATURE_COLS)
+    explainer = PathExplainer(kernel, FEATURE_COLS)
+    X = probe_rows(kernel.scaler, max(args.sizes))
+
+    gap = np.abs(explainer.contributions(X).sum(axis=1) + explainer.base_value - kernel.predict_proba(X)[:, 1]).max()
+    print(f"{kernel.forest.n_trees} trees, max depth {kernel.forest.max_depth}; max |sum - proba| {gap:.2g}")
+    print(f"{'rows':>6} {'score us/row':>13} {'explain us/row':>15} {'scored+explained us/row':>24}")
+    for size in args.sizes:
+        rows = X[:size]
+        _, score_s = timed(lambda: [kernel.predict_proba(rows) for _ in range(args.repeat)])
+        _, explain_s = timed(lambda: [explainer.explain(rows) for _ in range(args.repeat)])
+        score_us = score_s / args.repeat / size * 1e6
+        explain_us = explain_s / args.repeat / size * 1e6
+        print(f"{size:6} {score_us:13.1f} {explain_us:15.1f} {score_us + args.flagged * explain_us:24.1f}")
+
+
+if __name__ == "__main__":
+    main()
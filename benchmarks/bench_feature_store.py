@@ -0,0 +1,87 @@
+"""Cost and memory of the online window-feature store.
+
+* update - microseconds per ``FeatureStore.update`` (the serving path);
+* bulk - rows/s of ``compute_bulk`` over the same transactions (training);
+* memory - the store's own ``nbytes`` estimate vs what ``tracemalloc`` sees;
+* max |diff| - the store against a brute-force recomputation over the raw
+  rows of each entity, capacity limit included.
+
+Run it from the repository root::
+
+    python -m benchmarks.bench_feature_store --rows 200000 --entities 20000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.common import synthetic_transactions
+from src.preprocessing.feature_store import FeatureStore, FeatureStoreConfig
+
+
+def brute_force(times, amounts, entities, config, check_rows):
+    """Window features of the rows in ``check_rows`` (positions in Time order)."""
+    order = np.argsort(times, kind="stable")
+    times, amounts, entities = times[order], amounts[order], entities[order]
+    out = []
+    for i in check_rows:
+        same = np.flatnonzero(entities[: i + 1] == entities[i])[-config.capacity:]
+        row = []
+        for span in config.windows:
+            inside = same[times[same] > times[i] - span]
+            values = amounts[inside]
+            row += [len(values), values.sum(), values.mean(), values.max()]
+        out.append(row)
+    return order, np.array(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--entities", type=int, default=20_000)
+    parser.add_argument("--capacity", type=int, default=64)
+    parser.add_argument("--check", type=int, default=2000, help="rows compared with the brute force")
+    args = parser.parse_args()
+
+    frame = synthetic_transactions(args.rows)
+    rng = np.random.default_rng(0)
+    # Skewed activity: a few entities transact far more often than the rest.
+    entities = rng.zipf(1.3, args.rows) % args.entities
+    times, amounts = frame["Time"].to_numpy(), frame["Amount"].to_numpy()
+    config = FeatureStoreConfig(windows=(3600.0, 86400.0), capacity=args.capacity)
+
+    store = FeatureStore(config)
+    start = time.perf_counter()
+    bulk = store.compute_bulk(times, amounts, entities)
+    bulk_s = time.perf_counter() - start
+
+    order = np.argsort(times, kind="stable")
+    online = FeatureStore(config)
+    rows = list(zip(entities[order].tolist(), times[order].tolist(), amounts[order].tolist()))
+    start = time.perf_counter()
+    for entity, t, amount in rows:
+        online.update(entity, t, amount)
+    update_us = (time.perf_counter() - start) / len(rows) * 1e6
+
+    tracemalloc.start()
+    traced = FeatureStore(config)
+    for entity, t, amount in rows:
+        traced.update(entity, t, amount)
+    traced_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    check = rng.choice(args.rows, min(args.check, args.rows), replace=False)
+    _, expected = brute_force(times, amounts, entities, config, check)
+    diff = np.abs(bulk[order[check]] - expected).max()
+
+    stats = store.stats()
+    print(f"update        {update_us:10.2f} us")
+    print(f"bulk          {args.rows / bulk_s:10,.0f} rows/s")
+    print(f"entities      {stats['entities']:10,} (idle evicted {stats['evicted_idle']:,})")
+    print(f"nbytes        {stats['nbytes'] / 2**20:10.1f} MB estimated, {traced_bytes / 2**20:.1f} MB traced")
+    print(f"max |diff|    {diff:10.2g}")
+
+
+if __name__ == "__main__":
+    main()
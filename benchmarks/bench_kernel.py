@@ -0,0 +1,61 @@
+"""Parity and speed of the compiled NumPy kernel against the sklearn objects.
+
+Exits non-zero when the compiled probabilities drift from sklearn by more than
+``--tolerance``, so it doubles as the parity check for new artifacts.
+
+    python -m benchmarks.bench_kernel --rows 20000
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import FEATURE_COLS, ROOT, ensure_bundle, synthetic_transactions, timed
+from src.inference.forest_kernel import compile_pipeline, max_parity_error, probe_rows
+from src.utils.metrics import load_object
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single", type=int, default=300, help="single-row calls to time")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+    ensure_bundle()
+
+    model = load_object(str(ROOT / "artifacts" / "best_model.pkl"))
+    scaler = load_object(str(ROOT / "artifacts" / "scaler.pkl"))
+    kernel, compile_s = timed(compile_pipeline, scaler, model, FEATURE_COLS)
+
+    X = synthetic_transactions(args.rows).to_numpy()
+    error = max(
+        max_parity_error(kernel, scaler, model, X, FEATURE_COLS),
+        max_parity_error(kernel, scaler, model, probe_rows(kernel.scaler, 4096), FEATURE_COLS),
+    )
+
+    def sklearn_proba(rows):
+        return model.predict_proba(scaler.transform(pd.DataFrame(rows, columns=FEATURE_COLS)))
+
+    def per_row(fn):
+        _, secs = timed(lambda: [fn(X[i:i + 1]) for i in range(args.single)])
+        return secs / args.single * 1e3
+
+    sk_single, k_single = per_row(sklearn_proba), per_row(kernel.predict_proba)
+    _, sk_batch = timed(sklearn_proba, X)
+    _, k_batch = timed(kernel.predict_proba, X)
+    labels_match = np.array_equal(kernel.predict(X), model.predict(scaler.transform(pd.DataFrame(X, columns=FEATURE_COLS))))
+
+    print(f"compiled {kernel.forest.n_trees} trees / {kernel.forest.n_nodes} nodes in {compile_s * 1e3:.1f} ms")
+    print(f"max |p_kernel - p_sklearn| = {error:.3g}   labels match: {labels_match}")
+    print(f"{'path':<10}{'single ms/row':>16}{'batch rows/sec':>18}")
+    print(f"{'sklearn':<10}{sk_single:>16.3f}{args.rows / sk_batch:>18.0f}")
+    print(f"{'kernel':<10}{k_single:>16.3f}{args.rows / k_batch:>18.0f}")
+
+    if error > args.tolerance or not labels_match:
+        print("PARITY FAILURE")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Per-request CPU of the ``/predict`` input contracts.
+
+* pydantic - ``/predict`` with the 30-field ``TransactionInput`` JSON body;
+* features - ``/predict/features`` with ``{"features": [...30 numbers]}``;
+* float64 / float32 - ``/predict/features`` with a raw little-endian body.
+
+Two measurements per contract: decoding alone (body bytes to a validated
+(1, 30) row, as the endpoint does it) and whole requests through an in-process
+ASGI client, as process CPU per request and p50 wall time over interleaved
+rounds. The prediction cache is disabled so every request is scored::
+
+    python -m benchmarks.bench_parsing --requests 2000
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import FEATURE_COLS, ensure_bundle, synthetic_transactions
+
+
+def bodies(frame, contract):
+    if contract == "pydantic":
+        return [json.dumps(r).encode() for r in frame.to_dict(orient="records")], "application/json"
+    if contract == "features":
+        return [json.dumps({"features": r}).encode() for r in frame.to_numpy().tolist()], "application/json"
+    dtype = "<f8" if contract == "float64" else "<f4"
+    return [r.tobytes() for r in frame.to_numpy().astype(dtype)], "application/octet-stream"
+
+
+def decode_us(module, contract, payloads, content_type):
+    if contract == "pydantic":
+        def decode(body):
+            data = module.TransactionInput.model_validate(json.loads(body))
+            return np.array([[getattr(data, c) for c in FEATURE_COLS]], dtype=np.float64)
+    else:
+        def decode(body):
+            return module._decode_features(body, content_type)
+
+    for body in payloads[:100]:
+        decode(body)
+    start = time.perf_counter()
+    for body in payloads:
+        decode(body)
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+
+async def request_costs(module, contract, payloads, content_type):
+    path = "/predict" if contract == "pydantic" else "/predict/features"
+    headers = {"content-type": content_type}
+    transport = httpx.ASGITransport(app=module.app)
+    latencies, results = [], []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for body in payloads[:20]:
+            (await client.post(path, content=body, headers=headers)).raise_for_status()
+        cpu = time.process_time()
+        for body in payloads:
+            start = time.perf_counter()
+            r = await client.post(path, content=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            r.raise_for_status()
+            results.append(r.json()["fraud_probability"])
+        cpu = time.process_time() - cpu
+    return cpu / len(payloads) * 1e6, float(np.median(latencies)) * 1e6, np.array(results, dtype=float)
+
+
+async def run(module, frame, rounds):
+    contracts = ("pydantic", "features", "float64", "float32")
+    encoded = {c: bodies(frame, c) for c in contracts}
+    cpu, p50 = {c: [] for c in contracts}, {c: [] for c in contracts}
+    results = {}
+    async with module.lifespan(module.app):
+        for _ in range(rounds):
+            for c in contracts:
+                c_cpu, c_p50, results[c] = await request_costs(module, c, *encoded[c])
+                cpu[c].append(c_cpu)
+                p50[c].append(c_p50)
+    decode = {c: decode_us(module, c, *encoded[c]) for c in contracts}
+    return contracts, decode, cpu, p50, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    ensure_bundle()
+
+    os.environ["FRAUDSHIELD_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["FRAUDSHIELD_COALESCE"] = "0"
+    module = importlib.reload(importlib.import_module("dev.backend.app"))
+    frame = synthetic_transactions(args.requests)
+    contracts, decode, cpu, p50, results = asyncio.run(run(module, frame, args.rounds))
+
+    base_cpu = np.median(cpu["pydantic"])
+    print(f"{'contract':<10}{'decode us':>11}{'cpu us/req':>12}{'saved us':>10}{'p50 us':>9}{'max |dp|':>10}")
+    for c in contracts:
+        c_cpu = np.median(cpu[c])
+        diff = np.nanmax(np.abs(results[c] - results["pydantic"]))
+        print(
+            f"{c:<10}{decode[c]:>11.1f}{c_cpu:>12.1f}{base_cpu - c_cpu:>10.1f}"
+            f"{np.median(p50[c]):>9.1f}{diff:>10.2g}"
+        )
+
+
+if __name__ == "__main__":
+    main()
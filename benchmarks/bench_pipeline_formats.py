@@ -0,0 +1,94 @@
+"""Wall time and disk footprint of the ingestion + scaling stages per table format.
+
+Builds a synthetic labelled dataset of ``--rows`` rows in a scratch directory and
+runs ``DataIngestion`` -> ``Scaler`` for each format. The ``csv (legacy)`` row
+replays the old CSV round-trip (data/train/test CSVs re-parsed by the scaler)
+as the baseline.
+
+    python -m benchmarks.bench_pipeline_formats --rows 300000
+"""
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmarks.common import synthetic_transactions
+
+
+def _dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+        if not name.endswith(".pkl")
+    )
+
+
+def legacy_csv_stages():
+    from src.preprocessing.scaler import Scaler
+
+    df = pd.read_csv("notebooks/eda_done_data.csv")
+    df.to_csv("artifacts/data.csv", index=False)
+    train_set, test_set = train_test_split(df, test_size=0.3, random_state=42, stratify=df["Class"])
+    train_set.to_csv("artifacts/train.csv", index=False)
+    test_set.to_csv("artifacts/test.csv", index=False)
+
+    train_df, test_df = pd.read_csv("artifacts/train.csv"), pd.read_csv("artifacts/test.csv")
+    X_train, X_test = train_df.drop(columns=["Class"]), test_df.drop(columns=["Class"])
+    preprocessor = Scaler().get_scaler_object(X_train)
+    train_arr = np.c_[preprocessor.fit_transform(X_train), train_df["Class"].to_numpy()]
+    test_arr = np.c_[preprocessor.transform(X_test), test_df["Class"].to_numpy()]
+    return train_arr, test_arr
+
+
+def typed_stages(data_format, float_dtype):
+    from src.preprocessing.feature_builder import DataIngestion
+    from src.preprocessing.scaler import Scaler
+
+    ingestion = DataIngestion()
+    ingestion.ingestion_config.data_format = data_format
+    ingestion.ingestion_config.float_dtype = float_dtype
+    train_path, test_path = ingestion.initiate_data_ingestion()
+    train_arr, test_arr, _ = Scaler().initiate_data_transformation(train_path, test_path)
+    # Touch the arrays the way a model fit would.
+    return np.asarray(train_arr).sum(), np.asarray(test_arr).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300_000)
+    args = parser.parse_args()
+
+    variants = [("csv (legacy)", None, None), ("npy float64", "npy", "float64"), ("npy float32", "npy", "float32")]
+    if importlib.util.find_spec("pyarrow"):
+        variants += [("parquet float64", "parquet", "float64"), ("parquet float32", "parquet", "float32")]
+
+    cwd = os.getcwd()
+    print(f"{'format':<18}{'seconds':>10}{'disk MB':>10}")
+    for name, data_format, float_dtype in variants:
+        with tempfile.TemporaryDirectory() as scratch:
+            os.chdir(scratch)
+            try:
+                os.makedirs("notebooks")
+                os.makedirs("artifacts")
+                df = synthetic_transactions(args.rows)
+                df["Class"] = (np.random.default_rng(0).random(args.rows) < 0.01).astype(int)
+                df.to_csv("notebooks/eda_done_data.csv", index=False)
+
+                start = time.perf_counter()
+                if data_format is None:
+                    legacy_csv_stages()
+                else:
+                    typed_stages(data_format, float_dtype)
+                elapsed = time.perf_counter() - start
+                print(f"{name:<18}{elapsed:>10.2f}{_dir_size('artifacts') / 2 ** 20:>10.1f}")
+            finally:
+                os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Time, peak memory and ROC AUC of the resampling strategies.
+
+The training split is ``--rows`` labelled synthetic transactions (about 0.5%
+fraud) saved as a float64 ``.npy`` and memory-mapped, as the scaler hands it to
+training. Each strategy of ``src.models.resample`` is compared with the
+notebook's ``SMOTE().fit_resample(X_train, y_train)`` on the same rows held in
+memory. SMOTE output goes to a memory-mapped ``.npy`` as in training. Peak
+memory is what tracemalloc sees the resampling allocate; AUC is the LightGBM
+candidate fit on the resampled rows, scored on a separate test set.
+
+    python -m benchmarks.bench_resample --rows 500000
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+
+from benchmarks.common import labelled_transactions, timed
+from src.models.evaluate import get_candidate_models
+from src.models.resample import ResamplingConfig, adjust_models, measured, resample
+
+
+def imblearn_smote(X, y):
+    from imblearn.over_sampling import SMOTE
+
+    X_res, y_res = SMOTE(random_state=42).fit_resample(X, y)
+    return np.c_[X_res, y_res]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--ratio", type=float, default=0.1, help="minority / majority after resampling")
+    args = parser.parse_args()
+
+    X, y = labelled_transactions(args.rows, seed=1)
+    X_test, y_test = labelled_transactions(args.rows // 4, seed=2)
+    reference = get_candidate_models()["LightGBM"]
+    print(f"{args.rows} train rows ({X.nbytes / 1e6:.0f} MB float64), {y.mean():.2%} fraud")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "train_arr.npy"
+        np.save(path, np.c_[X, y].astype(np.float64))
+        train_arr = np.load(path, mmap_mode="r")
+
+        runs = [
+            ("notebook SMOTE 1:1", "smote", lambda: imblearn_smote(X, y)),
+            ("class_weight", "class_weight", lambda: resample(train_arr, "class_weight")),
+            (f"undersample {args.ratio}", "undersample", None),
+            (f"smote {args.ratio}", "smote", None),
+            ("smote 1.0", "smote", None),
+        ]
+        print(f"{'strategy':<20} {'rows':>9} {'seconds':>8} {'peak MB':>8} {'fit s':>7} {'test AUC':>8}")
+        for label, strategy, fn in runs:
+            if fn is None:
+                ratio = 1.0 if label.endswith("1.0") else args.ratio
+                out_path = Path(tmp) / "train_resampled.npy"
+                fn = lambda s=strategy, r=ratio: resample(train_arr, s, ResamplingConfig(sampling_ratio=r), out_path)  # noqa: E731
+            out, seconds, peak_mb = measured(fn)
+            model = clone(adjust_models({"reference": reference}, strategy)["reference"])
+            _, fit_s = timed(model.fit, out[:, :-1], out[:, -1])
+            auc = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+            print(f"{label:<20} {len(out):9} {seconds:8.2f} {peak_mb:8.1f} {fit_s:7.1f} {auc:8.5f}")
+            del out, model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Live ``/predict`` latency with and without a shadow challenger.
+
+Three in-process runs over the same transactions:
+
+* off - no challenger;
+* on - the challenger (by default a second copy of ``artifacts/``) scores every
+  request on the shadow thread;
+* slow - the challenger sleeps ``--slow-ms`` per row, so its queue fills and
+  the excess is shed instead of slowing the live requests.
+
+Run it from the repository root::
+
+    python -m benchmarks.bench_shadow --requests 1000 --concurrency 16
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import ROOT, ensure_bundle, synthetic_transactions
+
+
+def load_app(challenger, log_path, max_queued_rows):
+    os.environ["FRAUDSHIELD_CHALLENGER"] = challenger
+    os.environ["FRAUDSHIELD_SHADOW_LOG"] = str(log_path)
+    os.environ["FRAUDSHIELD_SHADOW_MAX_QUEUED_ROWS"] = str(max_queued_rows)
+    os.environ["FRAUDSHIELD_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["FRAUDSHIELD_COALESCE"] = "0"
+    return importlib.reload(importlib.import_module("dev.backend.app"))
+
+
+async def run(module, records, concurrency, slow_ms=0.0):
+    latencies = []
+    async with module.lifespan(module.app):
+        if slow_ms and module._shadow is not None:
+            score = module._shadow.score_fn
+
+            def slow_score(X):
+                time.sleep(slow_ms * X.shape[0] / 1000.0)
+                return score(X)
+
+            module._shadow.score_fn = slow_score
+        transport = httpx.ASGITransport(app=module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for record in records[:20]:
+                (await client.post("/predict", json=record)).raise_for_status()
+
+            async def worker(chunk):
+                for record in chunk:
+                    start = time.perf_counter()
+                    (await client.post("/predict", json=record)).raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+
+            await asyncio.gather(*(worker(records[i::concurrency]) for i in range(concurrency)))
+        stats = module._shadow.snapshot() if module._shadow is not None else {}
+    return np.array(latencies) * 1000.0, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--challenger", default=str(ROOT / "artifacts"))
+    parser.add_argument("--slow-ms", type=float, default=5.0)
+    parser.add_argument("--max-queued-rows", type=int, default=256)
+    args = parser.parse_args()
+    ensure_bundle()
+    if os.path.isdir(args.challenger):
+        ensure_bundle(args.challenger)
+
+    records = synthetic_transactions(args.requests).to_dict(orient="records")
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "scores.ndjson")
+        runs = [
+            ("off", "", 0.0),
+            ("on", args.challenger, 0.0),
+            ("slow", args.challenger, args.slow_ms),
+        ]
+        print(f"{'mode':<6}{'p50 ms':>9}{'p99 ms':>9}{'scored':>9}{'shed':>9}")
+        for name, challenger, slow_ms in runs:
+            module = load_app(challenger, log_path, args.max_queued_rows)
+            latencies, stats = asyncio.run(run(module, records, args.concurrency, slow_ms))
+            print(
+                f"{name:<6}{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 99):>9.3f}"
+                f"{stats.get('scored', 0):>9}{stats.get('shed', 0):>9}"
+            )
+        os.environ["FRAUDSHIELD_CHALLENGER"] = ""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Worker startup time and memory: pickled model vs shared memory-mapped forest.
+
+Starts ``--workers`` worker processes per mode. Each one imports the app and runs
+its lifespan (unpickling ``best_model.pkl`` or mapping ``forest.bin``), scores
+one row and waits. While all workers are alive, RSS, PSS (RSS with shared pages
+split across the processes that map them) and private memory are read from
+``/proc/<pid>/smaps_rollup``. Linux only.
+
+    python -m benchmarks.bench_shared_model --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT, ensure_bundle
+
+
+def _worker(mode: str):
+    started = time.perf_counter()
+    os.environ["FRAUDSHIELD_SHARED_MODEL"] = "1" if mode == "mmap" else "0"
+    import numpy as np
+
+    from dev.backend import app as module
+
+    async def load():
+        ctx = module.lifespan(module.app)
+        await ctx.__aenter__()
+        return ctx
+
+    imported = time.perf_counter()
+    asyncio.run(load())
+    loaded = time.perf_counter()
+    module._score(np.ones((1, len(module.FEATURE_COLS))))
+    print(json.dumps({"import_s": imported - started, "load_s": loaded - imported}), flush=True)
+    sys.stdin.read()
+
+
+def _smaps(pid: int) -> dict:
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                out[parts[0].rstrip(":")] = int(parts[1])
+    return out
+
+
+def run_mode(mode: str, workers: int) -> list:
+    procs, results = [], []
+    for _ in range(workers):
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_shared_model", "--worker", mode],
+            cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        procs.append((proc, start))
+    for proc, start in procs:
+        timing = json.loads(proc.stdout.readline())
+        timing["ready_s"] = time.perf_counter() - start
+        results.append(timing)
+    for (proc, _), timing in zip(procs, results):
+        timing.update(_smaps(proc.pid))
+    for proc, _ in procs:
+        proc.stdin.close()
+        proc.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--worker", choices=["pickle", "mmap"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        _worker(args.worker)
+        return
+
+    ensure_bundle()
+
+    from src.inference.forest_store import export_from_pickles, is_stale
+
+    if is_stale(ROOT / "artifacts" / "forest.bin", ROOT / "artifacts"):
+        export_from_pickles(ROOT / "artifacts")
+
+    print(f"{'mode':<8}{'load ms':>10}{'ready ms':>10}{'RSS MB':>10}{'PSS MB':>10}{'private MB':>12}   (mean per worker)")
+    for mode in ("pickle", "mmap"):
+        rows = run_mode(mode, args.workers)
+
+        def mean(key):
+            return sum(r[key] for r in rows) / len(rows)
+
+        print(f"{mode:<8}{mean('load_s') * 1e3:>10.1f}{mean('ready_s') * 1e3:>10.0f}"
+              f"{mean('Rss') / 1024:>10.1f}{mean('Pss') / 1024:>10.1f}"
+              f"{(mean('Private_Clean') + mean('Private_Dirty')) / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
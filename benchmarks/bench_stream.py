@@ -0,0 +1,135 @@
+"""Bulk scoring throughput and server memory of ``/predict/stream``.
+
+In process, the same rows are scored through ``/predict/stream`` as CSV and
+NDJSON, and through ``/predict/batch`` as columnar JSON, reporting rows/s.
+
+With ``--server``, a real uvicorn process scores CSV files of each ``--sizes``
+row count uploaded by ``curl -T`` (which streams the file and reads the
+response concurrently). The server's peak RSS (``VmHWM``) shows whether memory
+grows with file size. Linux only, needs ``curl``::
+
+    python -m benchmarks.bench_stream --rows 200000
+    python -m benchmarks.bench_stream --server --sizes 100000 1000000
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import FEATURE_COLS, ROOT, ensure_bundle, synthetic_transactions
+
+
+async def in_process(rows: int) -> dict:
+    module = importlib.import_module("dev.backend.app")
+    frame = synthetic_transactions(rows)
+    bodies = {
+        "stream csv": (frame.to_csv(index=False).encode(), "text/csv", "/predict/stream"),
+        "stream ndjson": (frame.to_json(orient="records", lines=True).encode(), "application/x-ndjson", "/predict/stream"),
+    }
+    results = {}
+    async with module.lifespan(module.app):
+        transport = httpx.ASGITransport(app=module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name, (body, content_type, path) in bodies.items():
+                start = time.perf_counter()
+                r = await client.post(path, content=body, headers={"content-type": content_type})
+                r.raise_for_status()
+                results[name] = rows / (time.perf_counter() - start)
+            columns = {c: frame[c].tolist() for c in FEATURE_COLS}
+            start = time.perf_counter()
+            (await client.post("/predict/batch", json={"columns": columns})).raise_for_status()
+            results["batch json"] = rows / (time.perf_counter() - start)
+    return results
+
+
+def _write_csv(path: str, rows: int, chunk: int = 100_000):
+    with open(path, "w") as f:
+        for i in range(0, rows, chunk):
+            synthetic_transactions(min(chunk, rows - i), seed=i).to_csv(f, index=False, header=i == 0)
+
+
+def _peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_run(rows: int) -> dict:
+    port = _free_port()
+    env = dict(os.environ, FRAUDSHIELD_COALESCE="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "dev.backend.app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(600):
+            try:
+                if httpx.get(f"{url}/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        idle = _peak_rss_mb(server.pid)
+        with tempfile.TemporaryDirectory() as tmp:
+            src, dst = os.path.join(tmp, "in.csv"), os.path.join(tmp, "out.csv")
+            _write_csv(src, rows)
+            start = time.perf_counter()
+            subprocess.run(
+                ["curl", "-sS", "-f", "-X", "POST", "-T", src, "-H", "Content-Type: text/csv",
+                 "-o", dst, f"{url}/predict/stream"],
+                check=True,
+            )
+            elapsed = time.perf_counter() - start
+            with open(dst, "rb") as f:
+                scored = sum(1 for _ in f) - 1
+            size_mb = os.path.getsize(src) / 2**20
+        return {
+            "rows": rows, "scored": scored, "file_mb": size_mb, "rows_per_s": rows / elapsed,
+            "idle_rss_mb": idle, "peak_rss_mb": _peak_rss_mb(server.pid),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--server", action="store_true")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+    ensure_bundle()
+
+    if not args.server:
+        os.environ.setdefault("FRAUDSHIELD_COALESCE", "0")
+        for name, rate in asyncio.run(in_process(args.rows)).items():
+            print(f"{name:<16}{rate:>12,.0f} rows/s")
+        return
+
+    if shutil.which("curl") is None:
+        sys.exit("--server needs curl")
+    print(f"{'rows':>10}{'file MB':>9}{'rows/s':>10}{'idle RSS':>10}{'peak RSS':>10}")
+    for rows in args.sizes:
+        r = server_run(rows)
+        assert r["scored"] == rows, r
+        print(f"{rows:>10}{r['file_mb']:>9.0f}{r['rows_per_s']:>10,.0f}{r['idle_rss_mb']:>10.0f}{r['peak_rss_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Overhead of the ``/metrics`` instrumentation on single-row ``/predict``.
+
+Two measurements:
+
+* micro - the exact metric updates one ``/predict`` request performs, timed in
+  a tight loop; this is the number the budget is checked against.
+* end to end - sequential requests through an in-process ASGI client with
+  ``FRAUDSHIELD_METRICS`` off and on, interleaved over several rounds.
+
+Exits with status 1 when the per-request instrumentation cost exceeds
+``--budget-us`` or ``--budget-pct`` of the uninstrumented request latency::
+
+    python -m benchmarks.bench_telemetry --requests 500 --budget-us 25 --budget-pct 2
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import ensure_bundle, synthetic_transactions
+
+
+def instrumentation_cost_us(module, iterations):
+    """Microseconds of metric updates per kernel-backed ``/predict`` request."""
+    predictions = np.zeros(1, dtype=int)
+    module.METRICS = True
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        t = module._stage("validation", "http", t)
+        t = module._stage("assemble", "http", t)
+        t = module._stage("transform", "kernel", t)
+        module._stage("predict_proba", "kernel", t)
+        module._record_outcomes("kernel", predictions)
+        module.HTTP_REQUESTS.labels("/predict", 200).inc()
+        module.HTTP_SECONDS.labels("/predict").observe(0.001)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def request_latencies(module, records):
+    latencies = []
+    async with module.lifespan(module.app):
+        transport = httpx.ASGITransport(app=module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for record in records[:20]:
+                (await client.post("/predict", json=record)).raise_for_status()
+            for record in records:
+                start = time.perf_counter()
+                (await client.post("/predict", json=record)).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1e6
+
+
+def load_app(metrics):
+    os.environ["FRAUDSHIELD_METRICS"] = "1" if metrics else "0"
+    os.environ["FRAUDSHIELD_COALESCE"] = "0"
+    return importlib.reload(importlib.import_module("dev.backend.app"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--budget-us", type=float, default=25.0)
+    parser.add_argument("--budget-pct", type=float, default=2.0)
+    args = parser.parse_args()
+    ensure_bundle()
+
+    records = synthetic_transactions(args.requests).to_dict(orient="records")
+    medians = {False: [], True: []}
+    for _ in range(args.rounds):
+        for metrics in (False, True):
+            medians[metrics].append(np.median(asyncio.run(request_latencies(load_app(metrics), records))))
+    off, on = float(np.median(medians[False])), float(np.median(medians[True]))
+
+    cost = instrumentation_cost_us(load_app(True), args.iterations)
+    pct = cost / off * 100
+
+    print(f"{'metrics off p50 us':<28}{off:>10.1f}")
+    print(f"{'metrics on p50 us':<28}{on:>10.1f}")
+    print(f"{'end-to-end delta us':<28}{on - off:>10.1f}")
+    print(f"{'instrumentation us/request':<28}{cost:>10.2f}  (budget {args.budget_us} us)")
+    print(f"{'instrumentation % of p50':<28}{pct:>10.2f}  (budget {args.budget_pct} %)")
+
+    if cost > args.budget_us or pct > args.budget_pct:
+        print("FAIL: instrumentation overhead exceeds budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Shared helpers for the FraudShield benchmark scripts.
+
+Run the scripts from the repository root, e.g. ``python -m benchmarks.bench_batch``.
+"""
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.preprocessing.schema import FEATURE_COLS  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def ensure_bundle(artifacts: Path = ROOT / "artifacts") -> Path:
+    """The pickle-free bundle the API and ``load_object`` read, exported from the
+    pickles in ``artifacts`` first when it is missing or stale."""
+    from src.inference.artifact_bundle import BUNDLE_DIR, export_from_pickles, is_stale
+
+    bundle = Path(artifacts) / BUNDLE_DIR
+    if is_stale(bundle, artifacts):
+        # The pickles shipped with the repo are as trusted as its code.
+        export_from_pickles(artifacts, allow_pickle=True)
+    return bundle
+
+
+def synthetic_transactions(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Random transactions shaped like the Kaggle credit card schema."""
+    rng = np.random.default_rng(seed)
+    data = {"Time": rng.uniform(1.0, 172_792.0, n_rows)}
+    for i in range(1, 29):
+        data[f"V{i}"] = rng.normal(0.0, 1.5, n_rows)
+    data["Amount"] = np.round(rng.lognormal(3.0, 1.5, n_rows), 2) + 0.01
+    return pd.DataFrame(data)[FEATURE_COLS]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def labelled_transactions(n_rows: int, seed: int = 42):
+    """``synthetic_transactions`` features (log ``Amount``) and about 0.5% fraud
+    labels from a noisy logistic rule."""
+    X = synthetic_transactions(n_rows, seed=seed).to_numpy()
+    X[:, -1] = np.log(X[:, -1])
+    rng = np.random.default_rng(seed)
+    logit = X[:, 1] - 0.8 * X[:, 3] + 0.5 * X[:, 4] * X[:, 10] + 0.3 * X[:, -1] + rng.normal(0, 1, n_rows) - 7.5
+    return X, (logit > 0).astype(np.int8)
@@ -0,0 +1,89 @@
+"""Compare two ``benchmarks.suite`` JSON files and flag regressions.
+
+Every metric present in both files is compared. Latency and RSS are worse when
+higher, throughput is worse when lower. A change counts as a regression when
+it is worse by more than ``--threshold`` (relative) and, for latencies, by more
+than ``--min-ms`` (absolute), so sub-millisecond jitter does not fail a run.
+Exits 1 when anything regressed, so it can gate CI::
+
+    python -m benchmarks.compare bench/base.json bench/new.json --threshold 0.10
+"""
+import argparse
+import json
+import sys
+
+# Metric -> +1 when higher is worse, -1 when lower is worse.
+DIRECTIONS = {
+    "p50_ms": 1,
+    "p95_ms": 1,
+    "p99_ms": 1,
+    "mean_ms": 1,
+    "requests_per_s": -1,
+    "rows_per_s": -1,
+    "rss_mb": 1,
+    "peak_rss_mb": 1,
+}
+
+
+def compare(base: dict, new: dict, threshold: float, min_ms: float) -> list:
+    """One row per (transport, workload, metric) in both reports."""
+    rows = []
+    for transport, workloads in new["results"].items():
+        for workload, metrics in workloads.items():
+            before = base["results"].get(transport, {}).get(workload)
+            if before is None:
+                continue
+            for metric, direction in DIRECTIONS.items():
+                old, value = before.get(metric), metrics.get(metric)
+                if old is None or value is None or old == 0:
+                    continue
+                change = (value - old) / old
+                worse = change * direction > threshold
+                if worse and metric.endswith("_ms"):
+                    worse = value - old > min_ms
+                rows.append({
+                    "transport": transport, "workload": workload, "metric": metric,
+                    "base": old, "new": value, "change": change, "regression": worse,
+                })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change that counts as a regression")
+    parser.add_argument("--min-ms", type=float, default=0.2, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    for label, report in (("base", base), ("new", new)):
+        env = report.get("environment", {})
+        print(f"{label}: {env.get('commit') or '?'}{' (dirty)' if env.get('dirty') else ''}, {report.get('created')}")
+    # Which transports ran does not change the numbers of the ones in both.
+    settings = [{k: v for k, v in r.get("config", {}).items() if k != "transport"} for r in (base, new)]
+    if settings[0] != settings[1]:
+        print("warning: the runs used different settings; see the 'config' sections")
+    if base.get("environment", {}).get("cpus") != new.get("environment", {}).get("cpus"):
+        print("warning: the runs were made on machines with different CPU counts")
+
+    rows = compare(base, new, args.threshold, args.min_ms)
+    print(f"{'transport':<10} {'workload':<11} {'metric':<15} {'base':>11} {'new':>11} {'change':>8}")
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ""
+        print(
+            f"{r['transport']:<10} {r['workload']:<11} {r['metric']:<15} "
+            f"{r['base']:11.2f} {r['new']:11.2f} {r['change']:+8.1%}{flag}"
+        )
+    regressions = [r for r in rows if r["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Latency, throughput and memory of the inference API, saved as JSON.
+
+Runs the same workloads against the app in process (``httpx.ASGITransport``,
+lifespan included) and/or against a local uvicorn server on a free port:
+
+* ``single`` - sequential ``/predict`` requests, one transaction each;
+* ``batch`` - sequential columnar ``/predict/batch`` requests of ``--batch-rows``;
+* ``concurrent`` - ``/predict`` requests with ``--concurrency`` in flight.
+
+Every workload gets ``--warmup`` unmeasured requests first. Each reports
+p50/p95/p99/mean latency in ms, requests/s, rows/s and the serving process'
+RSS and peak RSS (``/proc``, Linux only; the benchmark process itself in
+process mode). Transactions are synthetic rows of the ``FEATURE_COLS`` schema
+from a fixed seed, so two runs send identical requests. The JSON records the
+git commit, library versions, CPU count and ``FRAUDSHIELD_*`` settings next to
+the results; compare two files with ``benchmarks.compare``::
+
+    python -m benchmarks.suite --out bench/base.json
+    python -m benchmarks.suite --transport server --requests 2000 --out bench/new.json
+    python -m benchmarks.compare bench/base.json bench/new.json --threshold 0.10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.common import FEATURE_COLS, ROOT, ensure_bundle, synthetic_transactions
+
+WORKLOADS = ("single", "batch", "concurrent")
+TRANSPORTS = ("inprocess", "server")
+SCHEMA_VERSION = 1
+
+
+def _rss_mb(pid: int) -> dict:
+    out = {"rss_mb": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    out["rss_mb"] = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    out["peak_rss_mb"] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return out
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _summary(latencies: list, elapsed: float, rows_per_request: int) -> dict:
+    ms = np.asarray(latencies) * 1e3
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(ms),
+        "rows_per_request": rows_per_request,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(ms.mean()),
+        "requests_per_s": len(ms) / elapsed,
+        "rows_per_s": len(ms) * rows_per_request / elapsed,
+    }
+
+
+async def _sequential(client, send, n_requests: int, warmup: int, rows_per_request: int) -> dict:
+    for i in range(warmup):
+        (await send(client, i)).raise_for_status()
+    latencies = []
+    started = time.perf_counter()
+    for i in range(n_requests):
+        t = time.perf_counter()
+        (await send(client, i)).raise_for_status()
+        latencies.append(time.perf_counter() - t)
+    return _summary(latencies, time.perf_counter() - started, rows_per_request)
+
+
+async def _concurrent(client, send, n_requests: int, warmup: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i, record):
+        async with semaphore:
+            t = time.perf_counter()
+            (await send(client, i)).raise_for_status()
+            if record:
+                latencies.append(time.perf_counter() - t)
+
+    await asyncio.gather(*(one(i, False) for i in range(warmup)))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, True) for i in range(n_requests)))
+    return _summary(latencies, time.perf_counter() - started, 1)
+
+
+async def run_workloads(client, args, pid: int) -> dict:
+    frame = synthetic_transactions(max(args.requests, args.batch_rows), seed=args.seed)
+    records = frame.to_dict(orient="records")
+    batches = [
+        {"columns": {c: frame[c].to_numpy()[start:start + args.batch_rows].tolist() for c in FEATURE_COLS}}
+        for start in range(0, len(frame) - args.batch_rows + 1, args.batch_rows)
+    ]
+
+    def single(client, i):
+        return client.post("/predict", json=records[i % len(records)])
+
+    def batch(client, i):
+        return client.post("/predict/batch", json=batches[i % len(batches)])
+
+    results = {}
+    for workload in args.workloads:
+        if workload == "single":
+            result = await _sequential(client, single, args.requests, args.warmup, 1)
+        elif workload == "batch":
+            result = await _sequential(client, batch, args.batch_requests, min(args.warmup, 5), args.batch_rows)
+        else:
+            result = await _concurrent(client, single, args.requests, args.warmup, args.concurrency)
+            result["concurrency"] = args.concurrency
+        result.update(_rss_mb(pid))
+        results[workload] = result
+    return results
+
+
+async def in_process(args) -> dict:
+    import importlib
+
+    module = importlib.import_module("dev.backend.app")
+    async with module.lifespan(module.app):
+        transport = httpx.ASGITransport(app=module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await run_workloads(client, args, os.getpid())
+
+
+async def over_socket(args) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "dev.backend.app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+            for _ in range(600):
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not become healthy within 60 s")
+            return await run_workloads(client, args, server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def environment() -> dict:
+    def version(name):
+        try:
+            return __import__(name).__version__
+        except ImportError:
+            return None
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "libraries": {name: version(name) for name in ("numpy", "pandas", "sklearn", "fastapi", "uvicorn", "httpx")},
+        "settings": {k: v for k, v in sorted(os.environ.items()) if k.startswith("FRAUDSHIELD_")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", choices=(*TRANSPORTS, "both"), default="inprocess")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--requests", type=int, default=1000, help="single and concurrent requests")
+    parser.add_argument("--batch-rows", type=int, default=1000)
+    parser.add_argument("--batch-requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="JSON file to write the results to")
+    args = parser.parse_args()
+    ensure_bundle()
+
+    transports = TRANSPORTS if args.transport == "both" else (args.transport,)
+    report = {
+        "schema": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "environment": environment(),
+        "results": {},
+    }
+    print(f"{'transport':<10} {'workload':<11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9} {'rows/s':>10} {'RSS MB':>7}")
+    for transport in transports:
+        results = asyncio.run(in_process(args) if transport == "inprocess" else over_socket(args))
+        report["results"][transport] = results
+        for workload, r in results.items():
+            rss = f"{r['rss_mb']:.0f}" if r["rss_mb"] is not None else "-"
+            print(
+                f"{transport:<10} {workload:<11} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} "
+                f"{r['requests_per_s']:9.0f} {r['rows_per_s']:10.0f} {rss:>7}"
+            )
+
+    if args.out:
+        path = Path(args.out)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2))
+        print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,514 @@
+import asyncio
+import gc
+import hashlib
+import hmac
+import json
 import logging
+import os
 import pickle
+import sys
+import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Annotated
 
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s  %(name)s  %(message)s")
 logger = logging.getLogger(__name__)
 
-ARTIFACTS = Path(__file__).resolve().parents[2] / "artifacts"
-FEATURE_COLS = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.inference import bulk  # noqa: E402
+from src.inference.artifact_bundle import BUNDLE_DIR, MANIFEST, load_artifact_bundle, sha256_file  # noqa: E402
+from src.inference.artifact_versions import (  # noqa: E402
+    POINTER_NAME, current_version, list_versions, pin_version, pinned_versions, unpin_version, version_path,
+)
+from src.inference.coalescer import MicroBatcher  # noqa: E402
+from src.inference.decision_policy import DecisionPolicy, load_policy  # noqa: E402
+from src.inference.drift import DriftMonitor, load_reference  # noqa: E402
+from src.inference.explain import PathExplainer  # noqa: E402
+from src.inference.forest_kernel import compile_pipeline, max_parity_error, probe_rows  # noqa: E402
+from src.inference.forest_store import load_compiled, read_header, serving_path  # noqa: E402
+from src.inference.prediction_cache import PredictionCache  # noqa: E402
+from src.inference.shadow import RotatingLog, ShadowScorer  # noqa: E402
+from src.inference.telemetry import (  # noqa: E402
+    CONTENT_TYPE, SIZE_BUCKETS, Counter, Gauge, Histogram, Registry, RequestMetricsMiddleware, WindowedRate,
+    request_started,
+)
+from src.preprocessing.schema import FEATURE_COLS  # noqa: E402
+
+ARTIFACTS = ROOT / "artifacts"
+POSITIVE_COLS = ["Time", "Amount"]
+POSITIVE_IDX = np.array([FEATURE_COLS.index(c) for c in POSITIVE_COLS])
+MAX_BATCH_ROWS = int(os.getenv("FRAUDSHIELD_MAX_BATCH_ROWS", "500000"))
+# /predict/stream parses, scores and answers this many rows at a time.
+STREAM_CHUNK_ROWS = int(os.getenv("FRAUDSHIELD_STREAM_CHUNK_ROWS", "10000"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("FRAUDSHIELD_STREAM_MAX_LINE_BYTES", "65536"))
+USE_COMPILED_KERNEL = os.getenv("FRAUDSHIELD_COMPILED_KERNEL", "1") != "0"
+# Above this many rows sklearn's compiled tree traversal amortizes its dispatch
+# overhead and overtakes the NumPy kernel.
+KERNEL_MAX_ROWS = int(os.getenv("FRAUDSHIELD_KERNEL_MAX_ROWS", "2048"))
+PARITY_TOLERANCE = 1e-9
+COALESCE = os.getenv("FRAUDSHIELD_COALESCE", "0") == "1"
+COALESCE_MAX_BATCH = int(os.getenv("FRAUDSHIELD_COALESCE_MAX_BATCH", "64"))
+COALESCE_MAX_WAIT_MS = float(os.getenv("FRAUDSHIELD_COALESCE_MAX_WAIT_MS", "2.0"))
+# Shared-model mode serves the memory-mapped forest.bin export and never unpickles
+# best_model.pkl, so every worker process shares one page-cache copy of the trees.
+SHARED_MODEL = os.getenv("FRAUDSHIELD_SHARED_MODEL", "0") == "1"
+FOREST_PATH = Path(os.getenv("FRAUDSHIELD_FOREST_PATH", str(ARTIFACTS / "forest.bin")))
+# Unset: decision_policy.json next to the loaded model.
+DECISION_POLICY_PATH = os.getenv("FRAUDSHIELD_DECISION_POLICY")
+# Only the checksummed, pickle-free bundle is loaded unless this is "1".
+ALLOW_PICKLE = os.getenv("FRAUDSHIELD_ALLOW_PICKLE", "0") == "1"
+# Published versions (src/inference/artifact_versions.py); CURRENT names the one to
+# serve. Without it the flat ARTIFACTS files are served.
+VERSIONS_DIR = Path(os.getenv("FRAUDSHIELD_VERSIONS_DIR", str(ARTIFACTS / "versions")))
+# Seconds between checks for a new CURRENT version (or changed flat files); 0 disables.
+RELOAD_POLL_S = float(os.getenv("FRAUDSHIELD_RELOAD_POLL_S", "0"))
+WARMUP_ROWS = int(os.getenv("FRAUDSHIELD_WARMUP_ROWS", "64"))
+# /admin/* is disabled unless a token is configured.
+ADMIN_TOKEN = os.getenv("FRAUDSHIELD_ADMIN_TOKEN", "")
+# Single-row prediction cache; 0 entries disables it.
+CACHE_MAX_ENTRIES = int(os.getenv("FRAUDSHIELD_CACHE_MAX_ENTRIES", "100000"))
+CACHE_TTL_S = float(os.getenv("FRAUDSHIELD_CACHE_TTL_S", "300"))
+# Shadow scoring: a published version name or an artifacts directory to score
+# every live request with off the response path. Unset disables it.
+CHALLENGER = os.getenv("FRAUDSHIELD_CHALLENGER", "")
+SHADOW_LOG = Path(os.getenv("FRAUDSHIELD_SHADOW_LOG", str(ARTIFACTS / "shadow" / "scores.ndjson")))
+SHADOW_LOG_MAX_MB = float(os.getenv("FRAUDSHIELD_SHADOW_LOG_MAX_MB", "64"))
+SHADOW_LOG_BACKUPS = int(os.getenv("FRAUDSHIELD_SHADOW_LOG_BACKUPS", "5"))
+SHADOW_MAX_QUEUED_ROWS = int(os.getenv("FRAUDSHIELD_SHADOW_MAX_QUEUED_ROWS", "10000"))
+SHADOW_SAMPLE = float(os.getenv("FRAUDSHIELD_SHADOW_SAMPLE", "1.0"))
+# Share of one core the challenger may use; rows beyond that are shed.
+SHADOW_DUTY_CYCLE = float(os.getenv("FRAUDSHIELD_SHADOW_DUTY_CYCLE", "0.25"))
+METRICS = os.getenv("FRAUDSHIELD_METRICS", "1") != "0"
+# Drift monitoring against drift_reference.json next to the model, when present.
+DRIFT = os.getenv("FRAUDSHIELD_DRIFT", "1") != "0"
+DRIFT_SAMPLE = float(os.getenv("FRAUDSHIELD_DRIFT_SAMPLE", "1.0"))
+DRIFT_WINDOW_ROWS = int(os.getenv("FRAUDSHIELD_DRIFT_WINDOW_ROWS", "100000"))
+FRAUD_RATE_WINDOW = int(os.getenv("FRAUDSHIELD_FRAUD_RATE_WINDOW", "10000"))
+
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Everything a request needs to score. Reloads build a new bundle and swap
+    the module-level reference in one assignment; requests that captured the old
+    bundle finish on it."""
+
+    version: str
+    source: Path
+    model_name: str
+    model: object = None
+    scaler: object = None
+    kernel: object = None
+    # Path attributions for explain=true; None when the model is not a forest.
+    explainer: PathExplainer | None = None
+    # Live feature/score bins; a reload starts a fresh one against the new reference.
+    drift: DriftMonitor | None = None
+    policy: DecisionPolicy = field(default_factory=DecisionPolicy)
+    loaded_at: float = 0.0
+
+    @property
+    def backend(self) -> str:
+        return "kernel" if self.kernel is not None else "sklearn"
+
+
+_bundle: ModelBundle | None = None
+_batcher = None
+_watcher = None
+_reload_lock = None
+_shadow = None
+# Versions this worker pinned against pruning: the one an explicit
+# /admin/reload loaded (released once it follows CURRENT again) and the
+# published challenger.
+_reload_pin = None
+_challenger_pin = None
+_cache = PredictionCache(CACHE_MAX_ENTRIES, CACHE_TTL_S) if CACHE_MAX_ENTRIES > 0 else None
+
+REGISTRY = Registry()
+HTTP_REQUESTS = REGISTRY.counter(
+    "fraudshield_http_requests_total", "HTTP requests by route and status code.", ("path", "status")
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "fraudshield_http_request_duration_seconds", "End-to-end HTTP request latency.", ("path",)
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "fraudshield_stage_duration_seconds",
+    "Latency per inference stage (validation, assemble, dataframe, transform, predict_proba, predict).",
+    ("stage", "backend"),
+)
+SCORE_ROWS = REGISTRY.histogram(
+    "fraudshield_score_batch_rows", "Rows per scoring call, including coalesced batches.", ("backend",),
+    buckets=SIZE_BUCKETS,
+)
+PREDICTIONS = REGISTRY.counter("fraudshield_predictions_total", "Scored rows by predicted label.", ("label",))
+MODEL_INFO = REGISTRY.gauge(
+    "fraudshield_model_info", "Loaded model; the value is always 1.", ("version", "model", "backend", "source")
+)
+DECISION_THRESHOLD = REGISTRY.gauge("fraudshield_decision_threshold", "Fraud probability threshold in use.")
+MODEL_RELOADS = REGISTRY.counter("fraudshield_model_reloads_total", "Artifact reload attempts.", ("result",))
+FRAUD_RATE = WindowedRate(FRAUD_RATE_WINDOW)
+
+
+def _stage(stage: str, backend: str, started: float) -> float:
+    """Record the time since ``started`` under ``stage``; returns the new timestamp."""
+    now = time.perf_counter()
+    if METRICS:
+        STAGE_SECONDS.labels(stage, backend).observe(now - started)
+    return now
+
+
+def _record_outcomes(backend: str, predictions: np.ndarray):
+    if not METRICS:
+        return
+    n_rows = len(predictions)
+    # NumPy reductions cost ~1 us each on tiny arrays; single rows are the hot path.
+    n_fraud = int(predictions[0] == 1) if n_rows == 1 else int(np.count_nonzero(predictions == 1))
+    SCORE_ROWS.labels(backend).observe(n_rows)
+    PREDICTIONS.labels("fraud").inc(n_fraud)
+    PREDICTIONS.labels("legitimate").inc(n_rows - n_fraud)
+    FRAUD_RATE.update(n_rows, n_fraud)
+
+
+def _scrape_time_metrics():
+    fraud_rate = Gauge("fraudshield_fraud_rate", f"Share of roughly the last {FRAUD_RATE_WINDOW} scored rows predicted as fraud.")
+    fraud_rate.set(FRAUD_RATE.value)
+    metrics = [fraud_rate]
+    bundle = _bundle
+    if bundle is not None and bundle.drift is not None:
+        drift = Gauge("fraudshield_drift_psi", "PSI of live traffic against the training reference.", ("series",))
+        for name, series in bundle.drift.snapshot()["series"].items():
+            if series["psi"] is not None:
+                drift.labels(name).set(series["psi"])
+        metrics.append(drift)
+    if _cache is not None:
+        stats = _cache.stats
+        lookups = Counter("fraudshield_prediction_cache_lookups_total", "Prediction cache lookups.", ("result",))
+        lookups.labels("hit").inc(stats.hits)
+        lookups.labels("miss").inc(stats.misses)
+        removed = Counter(
+            "fraudshield_prediction_cache_removals_total", "Entries removed from the prediction cache.", ("reason",)
+        )
+        removed.labels("evicted").inc(stats.evictions)
+        removed.labels("expired").inc(stats.expirations)
+        entries = Gauge("fraudshield_prediction_cache_entries", "Rows held in the prediction cache.")
+        entries.set(len(_cache))
+        metrics += [lookups, removed, entries]
+    if _shadow is not None:
+        stats = _shadow.stats
+        shadow_rows = Counter("fraudshield_shadow_rows_total", "Rows offered to the challenger by outcome.", ("result",))
+        shadow_rows.labels("scored").inc(stats.scored)
+        shadow_rows.labels("shed").inc(stats.shed)
+        shadow_rows.labels("sampled_out").inc(stats.sampled_out)
+        shadow_rows.labels("failed").inc(stats.failed)
+        queued = Gauge("fraudshield_shadow_queued_rows", "Rows waiting for the challenger.")
+        queued.set(_shadow.queued_rows)
+        metrics += [shadow_rows, queued]
+    if _batcher is None:
+        return metrics
+
+    stats = _batcher.stats
+    batches = Counter("fraudshield_coalescer_batches_total", "Coalesced batches by flush reason.", ("reason",))
+    batches.labels("full").inc(stats.flushed_full)
+    batches.labels("deadline").inc(stats.flushed_deadline)
+    rows = Counter("fraudshield_coalescer_rows_total", "Rows scored through the coalescer.")
+    rows.inc(stats.rows)
+    wait = Counter("fraudshield_coalescer_queue_wait_seconds_total", "Time batches' first rows spent queued.")
+    wait.inc(stats.total_wait_s)
+    score = Counter("fraudshield_coalescer_score_seconds_total", "Time spent scoring coalesced batches.")
+    score.inc(stats.total_score_s)
+    depth = Gauge("fraudshield_coalescer_queue_depth", "Rows currently waiting in the coalescer.")
+    depth.set(_batcher.queue_depth)
+    sizes = Histogram(
+        "fraudshield_coalescer_batch_size", "Coalesced batch sizes.",
+        buckets=[1 << i for i in range(max(_batcher.max_batch_size, 1).bit_length() + 1)],
+    )
+    for size, count in stats.batch_sizes.items():
+        sizes.observe(size, count)
+    # The coalescer only keeps power-of-two buckets; the exact row total is known.
+    sizes.labels().sum = float(stats.rows)
+    return metrics + [batches, rows, wait, score, depth, sizes]
+
+
+REGISTRY.add_collector(_scrape_time_metrics)
+
+
+def _load_decision_policy(policy_path: Path, model_sha256: str | None) -> DecisionPolicy:
+    """The trained policy, unless it was tuned for a different best_model.pkl."""
+    policy = load_policy(policy_path)
+    expected = policy.metadata.get("model_sha256")
+    if model_sha256 is not None and expected:
+        if model_sha256 != expected:
+            logger.warning("%s was tuned for a different model, using the default policy", policy_path)
+            return DecisionPolicy()
+    return policy
+
+
+def _artifact_version(*paths: Path) -> str:
+    digest = hashlib.blake2b(digest_size=6)
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _compile_kernel(model, scaler):
+    """Fold scaler + forest into the NumPy kernel, or return None to stay on sklearn."""
+    if not USE_COMPILED_KERNEL:
+        return None
+    try:
+        kernel = compile_pipeline(scaler, model, FEATURE_COLS)
+        error = max_parity_error(kernel, scaler, model, probe_rows(kernel.scaler), FEATURE_COLS)
+    except ValueError as exc:
+        logger.info("Compiled kernel unavailable, using sklearn path: %s", exc)
+        return None
+    if error > PARITY_TOLERANCE:
+        logger.warning("Compiled kernel parity error %.3g exceeds %.1g, using sklearn path", error, PARITY_TOLERANCE)
+        return None
+    logger.info(
+        "Compiled kernel ready: %d trees, %d nodes, max depth %d",
+        kernel.forest.n_trees, kernel.forest.n_nodes, kernel.forest.max_depth,
+    )
+    return kernel
+
+
+def _build_explainer(kernel, model, scaler) -> PathExplainer | None:
+    """Explanations use the compiled forest arrays, compiled here even when the
+    kernel is disabled for scoring."""
+    try:
+        return PathExplainer(kernel if kernel is not None else compile_pipeline(scaler, model, FEATURE_COLS), FEATURE_COLS)
+    except (ValueError, AttributeError, TypeError) as exc:
+        logger.info("Explanations unavailable for this model: %s", exc)
+        return None
+
+
+def _build_drift_monitor(source: Path) -> DriftMonitor | None:
+    if not DRIFT:
+        return None
+    reference = load_reference(source / "drift_reference.json")
+    if reference is None:
+        logger.info("No drift reference in %s, drift monitoring off", source)
+        return None
+    return DriftMonitor(reference, FEATURE_COLS, DRIFT_SAMPLE, DRIFT_WINDOW_ROWS)
 
-_model = None
-_scaler = None
+
+def _source_fingerprint():
+    """Changes whenever CURRENT is rewritten or, without versions, the flat files change."""
+    pointer = VERSIONS_DIR / POINTER_NAME
+    files = [pointer] if pointer.exists() else (
+        [FOREST_PATH] if SHARED_MODEL
+        else [ARTIFACTS / BUNDLE_DIR / MANIFEST, ARTIFACTS / "best_model.pkl", ARTIFACTS / "scaler.pkl"]
+    )
+    return current_version(VERSIONS_DIR), tuple(p.stat().st_mtime_ns if p.exists() else None for p in files)
+
+
+def _artifact_source(version: str | None = None) -> tuple[Path, str | None]:
+    version = version or current_version(VERSIONS_DIR)
+    if version:
+        return version_path(VERSIONS_DIR, version), version
+    return ARTIFACTS, None
+
+
+def _warm_up(bundle: ModelBundle):
+    """Score a single row and a small batch so the first real request is not
+    the one paying for lazy imports, allocations and cold caches."""
+    if bundle.kernel is not None:
+        rows = probe_rows(bundle.kernel.scaler, WARMUP_ROWS)
+    else:
+        rows = np.random.default_rng(0).normal(1.0, 1.0, (WARMUP_ROWS, len(FEATURE_COLS)))
+    for _ in range(3):
+        _score(rows[:1], bundle, observe=False)
+    predictions, probabilities = _score(rows, bundle, observe=False)
+    if len(predictions) != len(rows):
+        raise ValueError("Warm-up returned the wrong number of predictions")
+    if probabilities is not None and not np.all((probabilities >= 0) & (probabilities <= 1)):
+        raise ValueError("Warm-up produced probabilities outside [0, 1]")
+
+
+def _load_bundle(source: Path, version: str | None = None) -> ModelBundle:
+    """Load, compile and warm a bundle from a flat or versioned artifact directory."""
+    policy_path = Path(DECISION_POLICY_PATH) if DECISION_POLICY_PATH else source / "decision_policy.json"
+    model = scaler = None
+    if SHARED_MODEL:
+        forest_path = serving_path(source, version, FOREST_PATH)
+        logger.info("Memory-mapping shared model from %s", forest_path)
+        kernel = load_compiled(forest_path, mmap=True)
+        logger.info("Mapped forest: %d trees, %d nodes", kernel.forest.n_trees, kernel.forest.n_nodes)
+        model_name, files = "CompiledForest", [forest_path]
+        # The policy must have been tuned for the model this forest came from; a
+        # forest exported without that digest cannot be matched to any policy.
+        policy = _load_decision_policy(policy_path, read_header(forest_path).get("model_sha256") or "")
+    elif (source / BUNDLE_DIR / MANIFEST).exists():
+        logger.info("Loading artifact bundle from %s", source / BUNDLE_DIR)
+        # Checksums and feature order are verified before any payload is read.
+        model, scaler, manifest = load_artifact_bundle(source / BUNDLE_DIR, FEATURE_COLS)
+        logger.info("Loaded model: %s", type(model).__name__)
+        kernel = _compile_kernel(model, scaler)
+        model_name, files = type(model).__name__, [source / BUNDLE_DIR / MANIFEST]
+        policy = _load_decision_policy(policy_path, manifest["sources"].get("best_model.pkl"))
+    elif ALLOW_PICKLE:
+        logger.info("Loading artifacts from %s", source)
+        with open(source / "best_model.pkl", "rb") as f:
+            model = pickle.load(f)
+        with open(source / "scaler.pkl", "rb") as f:
+            scaler = pickle.load(f)
+        logger.info("Loaded model: %s", type(model).__name__)
+        kernel = _compile_kernel(model, scaler)
+        model_name, files = type(model).__name__, [source / "best_model.pkl", source / "scaler.pkl"]
+        policy = _load_decision_policy(policy_path, sha256_file(source / "best_model.pkl"))
+    else:
+        raise FileNotFoundError(
+            f"No artifact bundle in {source}; export one with "
+            "`FRAUDSHIELD_ALLOW_PICKLE=1 python -m src.inference.artifact_bundle` "
+            "or set FRAUDSHIELD_ALLOW_PICKLE=1"
+        )
+    if policy_path.exists():
+        files.append(policy_path)
+
+    bundle = ModelBundle(
+        version=version or _artifact_version(*files),
+        source=source,
+        model_name=model_name,
+        model=model,
+        scaler=scaler,
+        kernel=kernel,
+        explainer=_build_explainer(kernel, model, scaler),
+        drift=_build_drift_monitor(source),
+        policy=policy,
+        loaded_at=time.time(),
+    )
+    _warm_up(bundle)
+    return bundle
+
+
+def _activate(bundle: ModelBundle):
+    global _bundle
+    _bundle = bundle
+    if _cache is not None:
+        _cache.invalidate()
+    MODEL_INFO.clear()
+    MODEL_INFO.labels(bundle.version, bundle.model_name, bundle.backend, bundle.source.name).set(1)
+    DECISION_THRESHOLD.set(bundle.policy.threshold)
+    logger.info(
+        "Serving version %s (%s, %s backend); decision threshold %.4f, risk tiers %s",
+        bundle.version, bundle.model_name, bundle.backend, bundle.policy.threshold,
+        dict(zip(bundle.policy.tier_names, (0.0, *bundle.policy.tier_bounds))),
+    )
+
+
+def _pin(version: str | None, held: str | None) -> str | None:
+    """Pin ``version`` and release ``held``; returns the pin now held. Pinning
+    is best effort: a read-only versions directory only loses the protection."""
+    if version == held:
+        return held
+    try:
+        if version:
+            pin_version(VERSIONS_DIR, version)
+        if held:
+            unpin_version(VERSIONS_DIR, held)
+    except OSError:
+        logger.warning("Could not update %s pins", VERSIONS_DIR, exc_info=True)
+    return version
+
+
+async def reload_model(version: str | None = None) -> ModelBundle:
+    """Load and warm the requested (default: current) artifacts off the event
+    loop, then swap them in. On failure the previous bundle keeps serving. A
+    requested version stays pinned against pruning while it is served."""
+    global _reload_pin
+    async with _reload_lock:
+        requested = version
+        source, version = _artifact_source(version)
+        try:
+            bundle = await run_in_threadpool(_load_bundle, source, version)
+        except Exception:
+            MODEL_RELOADS.labels("failed").inc()
+            raise
+        _activate(bundle)
+        _reload_pin = _pin(version if requested else None, _reload_pin)
+        MODEL_RELOADS.labels("ok").inc()
+        return bundle
+
+
+async def _watch_artifacts(interval: float, seen):
+    """Reload whenever the fingerprint changes. A failed reload is not retried
+    until the artifacts change again; an explicit /admin/reload stays pinned
+    until then too."""
+    while True:
+        await asyncio.sleep(interval)
+        fingerprint = _source_fingerprint()
+        if fingerprint == seen:
+            continue
+        seen = fingerprint
+        logger.info("Artifacts changed (%s), reloading", fingerprint[0] or "flat files")
+        try:
+            await reload_model()
+        except Exception:
+            logger.exception("Reload failed, still serving %s", _bundle.version if _bundle else None)
+
+
+def _start_shadow():
+    """Load the challenger and start its scorer. A broken challenger only
+    disables shadowing; it never stops the champion from serving."""
+    global _shadow, _challenger_pin
+    try:
+        if Path(CHALLENGER).name == CHALLENGER and (VERSIONS_DIR / CHALLENGER).is_dir():
+            source = version_path(VERSIONS_DIR, CHALLENGER)
+            _challenger_pin = _pin(CHALLENGER, None)
+        else:
+            source = Path(CHALLENGER)
+        challenger = _load_bundle(source, source.name)
+    except Exception:
+        logger.exception("Could not load challenger %s, shadow scoring disabled", CHALLENGER)
+        return
+    log = RotatingLog(SHADOW_LOG, int(SHADOW_LOG_MAX_MB * (1 << 20)), SHADOW_LOG_BACKUPS)
+    _shadow = ShadowScorer(
+        lambda X: _score(X, challenger, observe=False),
+        log,
+        challenger.version,
+        max_queued_rows=SHADOW_MAX_QUEUED_ROWS,
+        sample_rate=SHADOW_SAMPLE,
+        duty_cycle=SHADOW_DUTY_CYCLE,
+    )
+    _shadow.start()
+    logger.info("Shadow scoring with challenger %s (%s), logging to %s", challenger.version, challenger.model_name, SHADOW_LOG)
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    global _model, _scaler
+    global _batcher, _watcher, _reload_lock, _bundle, _shadow, _reload_pin, _challenger_pin
+    _reload_lock = asyncio.Lock()
     try:
-        logger.info("Loading artifacts from %s", ARTIFACTS)
-        with open(ARTIFACTS / "best_model.pkl", "rb") as f:
-            _model = pickle.load(f)
-        with open(ARTIFACTS / "scaler.pkl", "rb") as f:
-            _scaler = pickle.load(f)
-        logger.info("Loaded model: %s", type(_model).__name__)
+        seen = _source_fingerprint()
+        _activate(_load_bundle(*_artifact_source()))
+        if CHALLENGER:
+            _start_shadow()
+        # Keep the unpickled models out of full collections: walking a second
+        # forest's objects is a ~50 ms pause in the middle of live requests.
+        # Frozen objects are still freed by reference counting once swapped out.
+        # Freeze only here: re-freezing on every reload would pin each swapped-out
+        # bundle's reference cycles in the permanent generation for good.
+        gc.freeze()
+        if COALESCE:
+            _batcher = MicroBatcher(_score_coalesced, COALESCE_MAX_BATCH, COALESCE_MAX_WAIT_MS)
+            await _batcher.start()
+            logger.info("Request coalescing on: max batch %d, max wait %.1f ms", COALESCE_MAX_BATCH, COALESCE_MAX_WAIT_MS)
+        if RELOAD_POLL_S > 0:
+            _watcher = asyncio.create_task(_watch_artifacts(RELOAD_POLL_S, seen))
+            logger.info("Watching artifacts for new versions every %.1f s", RELOAD_POLL_S)
     except FileNotFoundError as exc:
         logger.critical("Artifact file not found: %s", exc)
         raise
@@ -36,7 +516,21 @@ async def lifespan(_app: FastAPI):
         logger.critical("Failed to load artifacts: %s", exc)
         raise
     yield
-    _model = _scaler = None
+    if _watcher is not None:
+        _watcher.cancel()
+        try:
+            await _watcher
+        except asyncio.CancelledError:
+            pass
+    if _batcher is not None:
+        await _batcher.stop()
+    if _shadow is not None:
+        await run_in_threadpool(_shadow.stop)
+    _reload_pin = _pin(None, _reload_pin)
+    _challenger_pin = _pin(None, _challenger_pin)
+    _bundle = _batcher = _watcher = _shadow = None
+    if _cache is not None:
+        _cache.invalidate()
 
 
 app = FastAPI(
@@ -52,6 +546,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if METRICS:
+    app.add_middleware(
+        RequestMetricsMiddleware,
+        requests=HTTP_REQUESTS,
+        duration=HTTP_SECONDS,
+        paths=("/predict", "/predict/features", "/predict/batch", "/predict/stream", "/health", "/metrics", "/cache", "/coalescer", "/shadow", "/drift"),
+    )
 
 
 class TransactionInput(BaseModel):
@@ -87,15 +588,54 @@ class TransactionInput(BaseModel):
     Amount: Annotated[float, Field(gt=0, description="Transaction amount")]
 
 
+class FeatureContribution(BaseModel):
+    feature: str
+    value: float
+    contribution: float
+
+
+class Explanation(BaseModel):
+    base_value: float
+    top_features: list[FeatureContribution]
+
+
 class PredictionResponse(BaseModel):
     fraud_prediction: int
     fraud_label: str
     fraud_probability: float | None
+    risk_tier: str | None = None
+    decision_threshold: float | None = None
+    explanation: Explanation | None = None
+
+
+class BatchTransactionInput(BaseModel):
+    transactions: list[dict[str, float]] | None = Field(
+        default=None, description="Row form: one object per transaction, keyed like TransactionInput"
+    )
+    columns: dict[str, list[float]] | None = Field(
+        default=None, description="Columnar form: one array per column in FEATURE_COLS"
+    )
+
+
+class BatchPredictionResponse(BaseModel):
+    count: int
+    fraud_prediction: list[int]
+    fraud_label: list[str]
+    fraud_probability: list[float] | None
+    risk_tier: list[str] | None = None
+    decision_threshold: float | None = None
+    explanation: list[Explanation | None] | None = None
 
 
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
+    model_version: str | None = None
+    model_name: str | None = None
+
+
+class ReloadRequest(BaseModel):
+    version: str | None = Field(default=None, description="Published version to load; defaults to CURRENT")
 
 
 @app.get("/", include_in_schema=False)
@@ -105,30 +645,494 @@ def root():
 
 @app.get("/health", response_model=HealthResponse, tags=["meta"])
 def health():
-    return HealthResponse(status="ok", model_loaded=_model is not None)
+    bundle = _bundle
+    return HealthResponse(
+        status="ok",
+        model_loaded=bundle is not None,
+        model_version=bundle.version if bundle else None,
+        model_name=bundle.model_name if bundle else None,
+    )
 
 
-@app.post("/predict", response_model=PredictionResponse, tags=["inference"])
-def predict(data: TransactionInput):
-    if _model is None or _scaler is None:
-        raise HTTPException(status_code=503, detail="Model not loaded.")
+def _require_admin(token: str | None):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set FRAUDSHIELD_ADMIN_TOKEN.")
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
 
-    df = pd.DataFrame([data.model_dump()])[FEATURE_COLS]
 
+@app.get("/admin/versions", tags=["admin"])
+def admin_versions(x_admin_token: Annotated[str | None, Header()] = None):
+    _require_admin(x_admin_token)
+    return {
+        "serving": _bundle.version if _bundle else None,
+        "current": current_version(VERSIONS_DIR),
+        "published": list_versions(VERSIONS_DIR),
+        "pinned": sorted(set(pinned_versions(VERSIONS_DIR))),
+    }
+
+
+@app.post("/admin/reload", tags=["admin"])
+async def admin_reload(
+    body: ReloadRequest | None = None,
+    x_admin_token: Annotated[str | None, Header()] = None,
+):
+    _require_admin(x_admin_token)
+    previous = _bundle.version if _bundle else None
+    started = time.perf_counter()
     try:
-        scaled = _scaler.transform(df)
-        prediction = int(_model.predict(scaled)[0])
-        probability = (
-            float(_model.predict_proba(scaled)[0][1])
-            if hasattr(_model, "predict_proba")
-            else None
-        )
+        bundle = await reload_model(body.version if body else None)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
     except Exception as exc:
-        logger.exception("Inference failed")
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+        logger.exception("Reload failed")
+        raise HTTPException(status_code=500, detail=f"Reload failed, still serving {previous}: {exc}") from exc
+    return {
+        "previous_version": previous,
+        "version": bundle.version,
+        "model": bundle.model_name,
+        "backend": bundle.backend,
+        "load_s": time.perf_counter() - started,
+    }
+
+
+@app.get("/metrics", tags=["meta"])
+def metrics():
+    if not METRICS:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/cache", tags=["meta"])
+def cache_stats():
+    if _cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "model_version": _bundle.version if _bundle else None, **_cache.snapshot()}
+
+
+@app.get("/coalescer", tags=["meta"])
+def coalescer_stats():
+    if _batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **_batcher.snapshot()}
+
+
+@app.get("/shadow", tags=["meta"])
+def shadow_stats():
+    if _shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, **_shadow.snapshot()}
+
+
+@app.get("/drift", tags=["meta"])
+def drift_stats():
+    """PSI and KS of the live feature and fraud-probability bins against the
+    training reference, over the last one to two windows of sampled rows."""
+    bundle = _bundle
+    if bundle is None or bundle.drift is None:
+        return {"enabled": False}
+    return {"enabled": True, "model_version": bundle.version, **bundle.drift.snapshot()}
+
+
+def _score(X: np.ndarray, bundle: ModelBundle | None = None, observe: bool = True):
+    """Labels and class-1 probabilities for raw rows in FEATURE_COLS order,
+    scored by ``bundle`` (default: the one serving right now)."""
+    bundle = bundle or _bundle
+    model, scaler, kernel = bundle.model, bundle.scaler, bundle.kernel
+    stage = _stage if observe else (lambda _stage_name, _backend, _started: time.perf_counter())
+    t = time.perf_counter()
+    if kernel is not None and (model is None or X.shape[0] <= KERNEL_MAX_ROWS):
+        backend = "kernel"
+        scaled = kernel.scaler.transform(X)
+        t = stage("transform", backend, t)
+        proba = kernel.forest.predict_proba(scaled)
+        stage("predict_proba", backend, t)
+        classes = kernel.forest.classes
+    else:
+        backend = "sklearn"
+        frame = pd.DataFrame(X, columns=FEATURE_COLS, copy=False)
+        t = stage("dataframe", backend, t)
+        scaled = scaler.transform(frame)
+        t = stage("transform", backend, t)
+        if not hasattr(model, "predict_proba"):
+            predictions = model.predict(scaled).astype(int)
+            stage("predict", backend, t)
+            if observe:
+                _record_outcomes(backend, predictions)
+                if bundle.drift is not None:
+                    t = time.perf_counter()
+                    bundle.drift.update(X)
+                    stage("drift", backend, t)
+            return predictions, None
+        proba = model.predict_proba(scaled)
+        stage("predict_proba", backend, t)
+        classes = model.classes_
+    # One probability pass; the label comes from the decision threshold, not argmax.
+    positive = proba[:, 1]
+    predictions = np.where(bundle.policy.decide(positive), classes[1], classes[0]).astype(int)
+    if observe:
+        _record_outcomes(backend, predictions)
+        if bundle.drift is not None:
+            t = time.perf_counter()
+            bundle.drift.update(X, positive)
+            stage("drift", backend, t)
+    return predictions, positive
+
+
+def _score_coalesced(X: np.ndarray):
+    """``MicroBatcher`` scoring: the batch goes to the live bundle, which is
+    returned with the scores so each request knows which model answered it."""
+    bundle = _bundle
+    predictions, probabilities = _score(X, bundle)
+    return predictions, probabilities, bundle
+
+
+ExplainParam = Annotated[bool, Query(description="Attach the top feature contributions to rows predicted as fraud")]
+ExplainTopParam = Annotated[int, Query(ge=1, le=len(FEATURE_COLS), description="Features listed per explained row")]
+
+
+def _explain(X: np.ndarray, predictions: np.ndarray, bundle: ModelBundle, top: int) -> list[dict | None]:
+    """Explanations for the rows predicted as fraud, None for the others, so the
+    cost follows the alerts rather than the traffic."""
+    if bundle.explainer is None:
+        raise HTTPException(status_code=400, detail=f"Explanations are not available for {bundle.model_name}.")
+    out = [None] * len(predictions)
+    flagged = np.flatnonzero(predictions == 1)
+    if flagged.size:
+        t = time.perf_counter()
+        rows = bundle.explainer.explain(X[flagged], top)
+        _stage("explain", "kernel", t)
+        base_value = bundle.explainer.base_value
+        for i, top_features in zip(flagged.tolist(), rows):
+            out[i] = {"base_value": base_value, "top_features": top_features}
+    return out
+
+
+def _request_stage(stage: str, started: float | None) -> float:
+    """Time since ``started`` (or since the request began: body read, parsing
+    and pydantic validation) recorded under ``stage``."""
+    if started is None:
+        started = request_started.get()
+        if started is None:
+            return time.perf_counter()
+    return _stage(stage, "http", started)
+
+
+@app.post("/predict", response_model=PredictionResponse, tags=["inference"])
+async def predict(
+    data: TransactionInput,
+    response: Response,
+    idempotency_key: Annotated[str | None, Header(max_length=256)] = None,
+    explain: ExplainParam = False,
+    explain_top: ExplainTopParam = 5,
+):
+    bundle = _bundle
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded.")
+
+    t = _request_stage("validation", None)
+    X = np.array([[getattr(data, c) for c in FEATURE_COLS]], dtype=np.float64)
+    _request_stage("assemble", t)
+    return await _predict_row(X, bundle, response, idempotency_key, explain_top if explain else None)
+
+
+def _decode_features(body: bytes, content_type: str) -> np.ndarray:
+    """A (1, 30) float64 row from ``{"features": [...]}`` JSON or a raw
+    little-endian float32/float64 body, validated in one vectorized pass."""
+    n = len(FEATURE_COLS)
+    if content_type.startswith("application/octet-stream"):
+        if len(body) == 4 * n:
+            row = np.frombuffer(body, dtype="<f4").astype(np.float64)
+        elif len(body) == 8 * n:
+            row = np.frombuffer(body, dtype="<f8").astype(np.float64)
+        else:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Binary body must be {n} little-endian float32 ({4 * n} bytes) "
+                       f"or float64 ({8 * n} bytes) values, got {len(body)} bytes.",
+            )
+    else:
+        try:
+            row = np.array(json.loads(body)["features"], dtype=np.float64)
+        except (ValueError, TypeError, KeyError) as exc:
+            raise HTTPException(status_code=422, detail=f'Body must be {{"features": [{n} numbers]}}.') from exc
+        if row.shape != (n,):
+            raise HTTPException(status_code=422, detail=f"'features' must hold exactly {n} numbers in FEATURE_COLS order.")
+
+    if not np.isfinite(row).all() or (row[POSITIVE_IDX] <= 0).any():
+        raise HTTPException(status_code=422, detail="Features must be finite, with Time and Amount > 0.")
+    return row.reshape(1, n)
+
+
+_FEATURES_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "required": ["features"],
+                    "properties": {
+                        "features": {
+                            "type": "array",
+                            "items": {"type": "number"},
+                            "minItems": len(FEATURE_COLS),
+                            "maxItems": len(FEATURE_COLS),
+                            "description": "Values in order: " + ", ".join(FEATURE_COLS),
+                        }
+                    },
+                }
+            },
+            "application/octet-stream": {
+                "schema": {"type": "string", "format": "binary"},
+                "description": f"{len(FEATURE_COLS)} little-endian float32 or float64 values in FEATURE_COLS order",
+            },
+        },
+    }
+}
+
+
+@app.post("/predict/features", response_model=PredictionResponse, tags=["inference"], openapi_extra=_FEATURES_SCHEMA)
+async def predict_features(
+    request: Request,
+    response: Response,
+    idempotency_key: Annotated[str | None, Header(max_length=256)] = None,
+    explain: ExplainParam = False,
+    explain_top: ExplainTopParam = 5,
+):
+    """Same result as ``/predict``, without per-field pydantic validation."""
+    bundle = _bundle
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded.")
+
+    X = _decode_features(await request.body(), request.headers.get("content-type", "application/json"))
+    _request_stage("validation", None)
+    return await _predict_row(X, bundle, response, idempotency_key, explain_top if explain else None)
+
+
+async def _predict_row(
+    X: np.ndarray, bundle: ModelBundle, response: Response, idempotency_key: str | None, explain_top: int | None = None
+):
+    cache_key = cached = None
+    if _cache is not None:
+        cache_key = PredictionCache.key(X, bundle.version, idempotency_key)
+        cached = _cache.get(cache_key)
+        response.headers["X-Cache"] = "hit" if cached is not None else "miss"
+
+    if cached is not None:
+        prediction, probability = cached
+    else:
+        try:
+            if _batcher is not None:
+                # A batch is scored by whichever bundle serves when it is flushed;
+                # after a reload that is not the one the cache key was built for.
+                prediction, probability, scored_by = await _batcher.submit(X)
+                if cache_key is not None and scored_by.version != bundle.version:
+                    cache_key = PredictionCache.key(X, scored_by.version, idempotency_key)
+                bundle = scored_by
+            else:
+                predictions, probabilities = await run_in_threadpool(_score, X, bundle)
+                prediction, probability = predictions[0], probabilities[0] if probabilities is not None else None
+        except Exception as exc:
+            logger.exception("Inference failed")
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+        prediction = int(prediction)
+        probability = float(probability) if probability is not None else None
+        if cache_key is not None:
+            _cache.put(cache_key, (prediction, probability))
+        if _shadow is not None:
+            _shadow.submit(X, (probability,), (prediction,), bundle.version, (idempotency_key,))
+
+    explanation = None
+    if explain_top is not None:
+        explanation = _explain(X, np.array([prediction]), bundle, explain_top)[0]
 
     return PredictionResponse(
         fraud_prediction=prediction,
         fraud_label="Fraud" if prediction == 1 else "Legitimate",
         fraud_probability=probability,
+        risk_tier=bundle.policy.tier(probability) if probability is not None else None,
+        decision_threshold=bundle.policy.threshold if probability is not None else None,
+        explanation=explanation,
+    )
+
+
+def _batch_matrix(batch: BatchTransactionInput) -> np.ndarray:
+    """Assemble a contiguous (n_rows, 30) float64 matrix in FEATURE_COLS order and
+    validate it in one vectorized pass."""
+    if (batch.transactions is None) == (batch.columns is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'transactions' or 'columns'.")
+
+    if batch.columns is not None:
+        missing = [c for c in FEATURE_COLS if c not in batch.columns]
+        if missing:
+            raise HTTPException(status_code=422, detail=f"Missing columns: {missing}")
+        lengths = {len(batch.columns[c]) for c in FEATURE_COLS}
+        if len(lengths) != 1:
+            raise HTTPException(status_code=422, detail="All columns must have the same length.")
+        X = np.column_stack([np.asarray(batch.columns[c], dtype=np.float64) for c in FEATURE_COLS])
+    else:
+        try:
+            X = np.array([[row[c] for c in FEATURE_COLS] for row in batch.transactions], dtype=np.float64)
+        except KeyError as exc:
+            raise HTTPException(status_code=422, detail=f"Transaction missing field {exc}") from exc
+        X = X.reshape(-1, len(FEATURE_COLS))
+
+    n_rows = X.shape[0]
+    if n_rows == 0:
+        raise HTTPException(status_code=422, detail="Batch is empty.")
+    if n_rows > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ROWS} rows.")
+
+    bad_rows = ~np.isfinite(X).all(axis=1)
+    bad_rows |= (X[:, POSITIVE_IDX] <= 0).any(axis=1)
+    if bad_rows.any():
+        rows = np.flatnonzero(bad_rows)[:20].tolist()
+        raise HTTPException(
+            status_code=422,
+            detail=f"{int(bad_rows.sum())} invalid rows (non-finite values or non-positive Time/Amount), "
+                   f"first offending indices: {rows}",
+        )
+    return np.ascontiguousarray(X)
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse, tags=["inference"])
+def predict_batch(batch: BatchTransactionInput, explain: ExplainParam = False, explain_top: ExplainTopParam = 5):
+    bundle = _bundle
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded.")
+
+    t = _request_stage("validation", None)
+    X = _batch_matrix(batch)
+    _request_stage("assemble", t)
+
+    try:
+        predictions, probabilities = _score(X, bundle)
+    except Exception as exc:
+        logger.exception("Batch inference failed")
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if _shadow is not None:
+        _shadow.submit(X, probabilities, predictions, bundle.version)
+    explanation = _explain(X, predictions, bundle, explain_top) if explain else None
+
+    return BatchPredictionResponse(
+        count=len(predictions),
+        fraud_prediction=predictions.tolist(),
+        fraud_label=np.where(predictions == 1, "Fraud", "Legitimate").tolist(),
+        fraud_probability=probabilities.tolist() if probabilities is not None else None,
+        risk_tier=bundle.policy.tiers(probabilities).tolist() if probabilities is not None else None,
+        decision_threshold=bundle.policy.threshold if probabilities is not None else None,
+        explanation=explanation,
+    )
+
+
+def _score_chunk(lines, fmt: str, columns, bundle: ModelBundle, start: int) -> bytes:
+    t = time.perf_counter()
+    if fmt == bulk.CSV:
+        X, malformed = bulk.parse_csv(lines, columns)
+    else:
+        X, malformed = bulk.parse_ndjson(lines, FEATURE_COLS)
+    errors = bulk.row_errors(X, malformed, POSITIVE_IDX)
+    t = _stage("parse", "http", t)
+
+    valid = np.equal(errors, None)
+    if not valid.any():
+        return bulk.format_rows(fmt, start, errors)
+    X = np.ascontiguousarray(X[valid]) if not valid.all() else X
+    predictions, probabilities = _score(X, bundle)
+    if _shadow is not None:
+        _shadow.submit(X, probabilities, predictions, bundle.version)
+    tiers = bundle.policy.tiers(probabilities) if probabilities is not None else None
+
+    t = time.perf_counter()
+    body = bulk.format_rows(fmt, start, errors, predictions, probabilities, tiers)
+    _stage("format", "http", t)
+    return body
+
+
+async def _stream_scores(stream, rest: bytes, fmt: str, columns, bundle: ModelBundle):
+    if fmt == bulk.CSV:
+        yield bulk.csv_header()
+    start = 0
+    try:
+        async for lines in bulk.line_chunks(stream, rest, STREAM_CHUNK_ROWS, STREAM_MAX_LINE_BYTES):
+            yield await run_in_threadpool(_score_chunk, lines, fmt, columns, bundle, start)
+            start += len(lines)
+    except bulk.LineTooLong as exc:
+        # Headers are long gone; report the problem in-band and stop reading.
+        yield bulk.format_rows(fmt, start, np.array([str(exc)], dtype=object))
+
+
+class _BodyStreamingResponse(StreamingResponse):
+    """Streams while the endpoint is still reading the request body.
+
+    Below ASGI spec 2.4, StreamingResponse watches for disconnects by calling
+    ``receive`` itself, which swallows the body chunks the generator is
+    waiting for. The body reader already raises ClientDisconnect.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError as exc:
+            raise ClientDisconnect() from exc
+        if self.background is not None:
+            await self.background()
+
+
+_STREAM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "text/csv": {
+                "schema": {"type": "string"},
+                "description": "Header line naming at least the FEATURE_COLS columns, then one transaction per line",
+            },
+            "application/x-ndjson": {
+                "schema": {"type": "string"},
+                "description": "One JSON object (or 30-number array) per line",
+            },
+        },
+    },
+    "responses": {
+        "200": {
+            "description": "One result per input row, in order, in the request's format: "
+                           + ", ".join(bulk.OUTPUT_COLUMNS),
+            "content": {"text/csv": {}, "application/x-ndjson": {}},
+        }
+    },
+}
+
+
+@app.post("/predict/stream", tags=["inference"], openapi_extra=_STREAM_SCHEMA)
+async def predict_stream(request: Request):
+    """Score an uploaded CSV or NDJSON body of any size.
+
+    The body is parsed and scored ``FRAUDSHIELD_STREAM_CHUNK_ROWS`` rows at a
+    time and results are streamed back as each chunk finishes, so neither side
+    needs the whole file in memory. Clients that cannot read the response while
+    still uploading should send large files in several requests.
+    """
+    bundle = _bundle
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded.")
+    fmt = bulk.input_format(request.headers.get("content-type", ""))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415, detail=f"Content-Type must be one of {sorted(bulk.CONTENT_TYPES)}."
+        )
+
+    stream, rest, columns = request.stream(), b"", None
+    if fmt == bulk.CSV:
+        try:
+            header, rest = await bulk.read_header(stream, STREAM_MAX_LINE_BYTES)
+            columns = bulk.csv_columns(header, FEATURE_COLS)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    return _BodyStreamingResponse(
+        _stream_scores(stream, rest, fmt, columns, bundle),
+        media_type=bulk.MEDIA_TYPES[fmt],
+        headers={"X-Model-Version": bundle.version},
     )
@@ -0,0 +1,133 @@
+"""Pre-forking launcher that serves the API from one shared, memory-mapped model.
+
+The parent exports ``forest.bin`` (the ``CURRENT`` version's own, when one is
+published) from the pickled artifacts when it is missing or older than them, or
+takes the compressed forest the version's ``serving.json`` names, maps it and warms the page cache, imports the app, binds
+the listening socket and then forks ``--workers`` uvicorn servers. Each worker
+maps the same file read-only in ``lifespan`` (``FRAUDSHIELD_SHARED_MODEL=1``),
+so the trees live in RAM once no matter how many workers run. Workers that die
+unexpectedly are replaced.
+
+    python -m dev.backend.prefork --workers 4 --port 8000
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+from pathlib import Path
+
+import uvicorn
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.inference.artifact_versions import current_version, version_path, versions_dir  # noqa: E402
+from src.inference.forest_store import (  # noqa: E402
+    FOREST_NAME, export_from_pickles, is_stale, load_compiled, serving_path, warm_page_cache,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s  %(name)s  %(message)s")
+logger = logging.getLogger("fraudshield.prefork")
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app, sock: socket.socket, args) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork FraudShield workers over a shared mmap model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=5)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--artifacts", default=str(ROOT / "artifacts"))
+    parser.add_argument("--forest", default=os.getenv("FRAUDSHIELD_FOREST_PATH"))
+    parser.add_argument("--versions", default=os.getenv("FRAUDSHIELD_VERSIONS_DIR"))
+    args = parser.parse_args()
+
+    # Resolve the forest exactly as the workers will: the CURRENT version's own
+    # export when one is published, otherwise --forest or the flat artifacts.
+    versions = Path(args.versions) if args.versions else versions_dir(args.artifacts)
+    version = current_version(versions)
+    source = version_path(versions, version) if version else Path(args.artifacts)
+    forest_path = serving_path(source, version, args.forest)
+    if version and args.forest:
+        logger.warning("Version %s is current; serving its own forest instead of %s", version, args.forest)
+    # A compressed forest cannot be re-exported from the pickles.
+    if forest_path.name == FOREST_NAME and is_stale(forest_path, source):
+        logger.info("Exporting %s from pickled artifacts", forest_path)
+        export_from_pickles(source, forest_path)
+    warmed = warm_page_cache(load_compiled(forest_path, mmap=True))
+    logger.info("Shared model %s mapped and warmed (%d bytes)", forest_path, warmed)
+
+    os.environ["FRAUDSHIELD_SHARED_MODEL"] = "1"
+    os.environ["FRAUDSHIELD_VERSIONS_DIR"] = str(versions)
+    # Where workers fall back to should CURRENT be removed.
+    os.environ["FRAUDSHIELD_FOREST_PATH"] = str(serving_path(args.artifacts, None, args.forest))
+    # Import before forking so interpreter and library pages are shared copy-on-write.
+    app = uvicorn.importer.import_from_string("dev.backend.app:app")
+
+    sock = _bind(args.host, args.port, args.backlog)
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, args.workers)
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve(app, sock, args)
+            finally:
+                os._exit(0)
+        children.add(pid)
+        logger.info("Started worker %d", pid)
+
+    def shutdown(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    for _ in range(args.workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning("Worker %d exited with status %d, restarting", pid, status)
+            spawn()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
+import io
+import os
+import tempfile
 import time
 import streamlit as st
 import requests
+import numpy as np
 import pandas as pd
 
 API_BASE_URL = "https://fraudshield-fraud-transaction.onrender.com"
 PREDICT_URL = f"{API_BASE_URL}/predict"
+STREAM_URL = f"{API_BASE_URL}/predict/stream"
+# Rows per /predict/stream request; bounds memory on both sides.
+BULK_CHUNK_ROWS = 20_000
 
 st.set_page_config(
     page_title="FraudShield",
@@ -17,6 +24,27 @@ if "result" not in st.session_state:
 if "count" not in st.session_state:
     st.session_state.count = 0
 
+def csv_chunks(uploaded, chunk_rows):
+    """Yield (header + up to chunk_rows data lines, bytes consumed) without
+    parsing the whole file."""
+    uploaded.seek(0)
+    header = uploaded.readline()
+    lines = []
+    for line in uploaded:
+        lines.append(line if line.endswith(b"\n") else line + b"\n")
+        if len(lines) == chunk_rows:
+            yield header + b"".join(lines), uploaded.tell()
+            lines = []
+    if lines:
+        yield header + b"".join(lines), uploaded.tell()
+
+
+def risk_levels(prob, threshold):
+    risk = np.select([prob >= threshold, prob >= threshold * 0.6], ["High", "Moderate"], "Low").astype(object)
+    risk[prob.isna().to_numpy()] = "Error"
+    return risk
+
+
 @st.cache_data(ttl=300)
 def check_api_health():
     try:
@@ -293,45 +321,58 @@ with tab_bulk:
     uploaded = st.file_uploader("Upload CSV — must match the API input schema", type=["csv"])
 
     if uploaded:
-        df = pd.read_csv(uploaded)
-        st.dataframe(df.head(5), use_container_width=True)
+        uploaded.seek(0)
+        st.dataframe(pd.read_csv(uploaded, nrows=5), use_container_width=True)
 
         if st.button("Run Bulk Analysis"):
-            results = []
-            bar = st.progress(0)
-            n = len(df)
-
-            for i, (_, row) in enumerate(df.iterrows()):
+            bar = st.progress(0.0)
+            status = st.empty()
+            counts = {"High": 0, "Moderate": 0, "Low": 0, "Error": 0}
+            previous = st.session_state.get("bulk_results")
+            if previous and os.path.exists(previous):
+                os.unlink(previous)
+            out = tempfile.NamedTemporaryFile(mode="w+", suffix=".csv", delete=False)
+            st.session_state.bulk_results = out.name
+            scored, failed = 0, None
+            started = time.perf_counter()
+
+            for body, consumed in csv_chunks(uploaded, BULK_CHUNK_ROWS):
                 try:
-                    r = requests.post(PREDICT_URL, json=row.to_dict(), timeout=15)
-                    if r.status_code == 200:
-                        res = r.json()
-                        p = res.get("fraud_probability", 0)
-                        res["risk"] = (
-                            "High" if p >= threshold
-                            else "Moderate" if p >= threshold * 0.6
-                            else "Low"
-                        )
-                        results.append(res)
-                    else:
-                        results.append({"fraud_probability": None, "fraud_label": "Error", "risk": "Error"})
-                except Exception:
-                    results.append({"fraud_probability": None, "fraud_label": "Error", "risk": "Error"})
-                bar.progress((i + 1) / n)
-                time.sleep(0.15)
-
-            results_df = pd.DataFrame(results)
-
-            if "risk" in results_df.columns:
-                c1, c2, c3 = st.columns(3)
-                c1.metric("High Risk", len(results_df[results_df.risk == "High"]))
-                c2.metric("Moderate", len(results_df[results_df.risk == "Moderate"]))
-                c3.metric("Low Risk", len(results_df[results_df.risk == "Low"]))
-
-            st.dataframe(results_df, use_container_width=True)
-
-            csv_bytes = results_df.to_csv(index=False).encode()
-            st.download_button("Download results (.csv)", csv_bytes, "fraudshield_results.csv", "text/csv")
+                    r = requests.post(STREAM_URL, data=body, headers={"Content-Type": "text/csv"}, timeout=300)
+                except Exception as e:
+                    failed = str(e)
+                    break
+                if r.status_code != 200:
+                    failed = f"API error {r.status_code}: {r.text[:200]}"
+                    break
+
+                chunk = pd.read_csv(io.BytesIO(r.content))
+                chunk["row"] += scored
+                chunk["risk"] = risk_levels(chunk["fraud_probability"], threshold)
+                for level, n in chunk["risk"].value_counts().items():
+                    counts[level] += int(n)
+                chunk.to_csv(out, header=scored == 0, index=False)
+                scored += len(chunk)
+
+                bar.progress(min(consumed / uploaded.size, 1.0))
+                elapsed = time.perf_counter() - started
+                status.caption(f"{scored:,} rows scored · {scored / elapsed:,.0f} rows/s")
+            out.flush()
+
+            if failed:
+                st.error(f"Stopped after {scored:,} rows. {failed}")
+
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("High Risk", counts["High"])
+            c2.metric("Moderate", counts["Moderate"])
+            c3.metric("Low Risk", counts["Low"])
+            c4.metric("Errors", counts["Error"])
+
+            if scored:
+                st.caption("First 1,000 results")
+                st.dataframe(pd.read_csv(out.name, nrows=1000), use_container_width=True)
+                with open(out.name, "rb") as f:
+                    st.download_button("Download results (.csv)", f, "fraudshield_results.csv", "text/csv")
 
 st.markdown("---")
 st.caption("FraudShield · Naman Gupta")
@@ -18,5 +18,8 @@ setup(
     author='Naman',
     author_email='namangupta2132@gmail.com',
     packages=find_packages(),
-    install_requires=get_requirements('requirements.txt')
+    install_requires=get_requirements('requirements.txt'),
+    entry_points={
+        'console_scripts': ['fraudshield-score=src.inference.batch_score:main'],
+    },
 )
@@ -0,0 +1,517 @@
+"""Pickle-free serving artifact: ``artifacts/bundle/``.
+
+A bundle directory holds ``manifest.json`` and the payload files it lists:
+
+* sklearn forests - every tree's node records and leaf values concatenated
+  into ``nodes.npy`` / ``values.npy`` with per-tree offsets, depths, seeds and
+  ``max_features_``;
+* logistic regression - ``coef.npy`` and ``intercept.npy``;
+* XGBoost / LightGBM - the library's own model file (JSON / text);
+* the ``Time``/``Amount`` scaler - imputer medians and scaler statistics.
+
+``.npy`` payloads are read with ``allow_pickle=False`` and the native booster
+files are parsed as data, so loading a bundle never runs code from the files.
+The manifest records the feature order, model class and parameters, library
+versions, training metrics and a SHA-256 per payload; ``load_artifact_bundle``
+verifies the checksums and the feature order before building anything.
+Classes are only ever taken from the fixed tables below, never by name from
+the manifest.
+
+Training writes the bundle next to the pickles; to convert existing ones::
+
+    python -m src.inference.artifact_bundle
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import platform
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.preprocessing.schema import FEATURE_COLS, input_columns
+
+FORMAT_NAME = "fraudshield-bundle"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+BUNDLE_DIR = "bundle"
+# Scaler statistics, one ``.npy`` payload each; every other payload belongs to the model.
+PREPROCESSOR_ARRAYS = (
+    "imputer_statistics", "scaler_mean", "scaler_var", "scaler_scale", "scaler_n_samples_seen",
+)
+# Pickle each bundle member stands in for.
+MEMBERS = {"best_model.pkl": "model", "scaler.pkl": "preprocessor"}
+
+# Forest class -> (module, forest class, module, tree class).
+FORESTS = {
+    "RandomForestClassifier": ("sklearn.ensemble", "RandomForestClassifier", "sklearn.tree", "DecisionTreeClassifier"),
+    "ExtraTreesClassifier": ("sklearn.ensemble", "ExtraTreesClassifier", "sklearn.tree", "ExtraTreeClassifier"),
+    "BalancedRandomForestClassifier": (
+        "imblearn.ensemble", "BalancedRandomForestClassifier", "sklearn.tree", "DecisionTreeClassifier",
+    ),
+}
+
+
+class BundleError(ValueError):
+    pass
+
+
+def sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _payload(manifest: dict, out: Path, name: str) -> Path:
+    """Path of payload ``name``. Only files the manifest lists, and so the ones
+    ``read_manifest`` checksummed, are ever opened."""
+    if name not in manifest["files"]:
+        raise BundleError(f"{out} does not list payload {name} in its {MANIFEST}")
+    return out / name
+
+
+def _load_npy(manifest: dict, out: Path, name: str) -> np.ndarray:
+    return np.load(_payload(manifest, out, f"{name}.npy"), allow_pickle=False)
+
+
+def _json_params(params: dict) -> dict:
+    """The JSON-representable hyperparameters; the rest keep their defaults on load."""
+    safe = {}
+    for key, value in params.items():
+        try:
+            json.dumps(value, allow_nan=False)
+        except (TypeError, ValueError):
+            continue
+        safe[key] = value
+    return safe
+
+
+def _class(module: str, name: str):
+    import importlib
+
+    return getattr(importlib.import_module(module), name)
+
+
+def _versions(*modules) -> dict:
+    import importlib
+
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    for module in modules:
+        try:
+            versions[module] = importlib.import_module(module).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def _classes_entry(classes) -> dict:
+    classes = np.asarray(classes)
+    return {"values": classes.tolist(), "dtype": classes.dtype.str}
+
+
+def _classes(entry) -> np.ndarray:
+    return np.asarray(entry["values"], dtype=np.dtype(entry["dtype"]))
+
+
+# -- model payloads -----------------------------------------------------------
+
+def _save_forest(model, out: Path) -> dict:
+    states = [tree.tree_.__getstate__() for tree in model.estimators_]
+    offsets = np.cumsum([0] + [s["node_count"] for s in states]).astype(np.int64)
+    seeds = [tree.random_state for tree in model.estimators_]
+    arrays = {
+        "nodes": np.concatenate([s["nodes"] for s in states]),
+        "values": np.concatenate([s["values"] for s in states]),
+        "node_offsets": offsets,
+        "max_depth": np.array([s["max_depth"] for s in states], dtype=np.int64),
+        "tree_seeds": np.array([-1 if s is None else s for s in seeds], dtype=np.int64),
+        "max_features": np.array([tree.max_features_ for tree in model.estimators_], dtype=np.int64),
+    }
+    for name, arr in arrays.items():
+        np.save(out / f"{name}.npy", arr, allow_pickle=False)
+    return {
+        "kind": "forest",
+        "tree_params": _json_params(model.estimators_[0].get_params()),
+        "n_outputs": int(model.n_outputs_),
+        "files": [f"{name}.npy" for name in arrays],
+    }
+
+
+def _load_forest(entry: dict, manifest: dict, out: Path):
+    from sklearn.tree._tree import Tree
+
+    module, forest_name, tree_module, tree_name = FORESTS[entry["class"]]
+    model = _class(module, forest_name)(**entry["params"])
+    template = _class(tree_module, tree_name)(**entry["tree_params"])
+    arrays = {name: _load_npy(manifest, out, name) for name in
+              ("nodes", "values", "node_offsets", "max_depth", "tree_seeds", "max_features")}
+    classes = _classes(entry["classes"])
+    n_features, n_outputs = len(manifest["feature_cols"]), entry["n_outputs"]
+    offsets = arrays["node_offsets"]
+    estimators = []
+    for i in range(len(offsets) - 1):
+        start, end = int(offsets[i]), int(offsets[i + 1])
+        tree = Tree(n_features, np.array([len(classes)] * n_outputs, dtype=np.intp), n_outputs)
+        try:
+            tree.__setstate__({
+                "max_depth": int(arrays["max_depth"][i]),
+                "node_count": end - start,
+                "nodes": np.ascontiguousarray(arrays["nodes"][start:end]),
+                "values": np.ascontiguousarray(arrays["values"][start:end]),
+            })
+        except ValueError as e:
+            raise BundleError(f"Tree layout does not match this scikit-learn: {e}") from e
+        seed = int(arrays["tree_seeds"][i])
+        # The parameters are JSON scalars, so a shallow copy is an independent
+        # estimator; clone() + set_params() per tree would double the load time.
+        estimator = copy.copy(template)
+        estimator.random_state = None if seed < 0 else seed
+        estimator.n_features_in_ = n_features
+        estimator.n_outputs_ = n_outputs
+        estimator.classes_ = classes
+        estimator.n_classes_ = len(classes)
+        estimator.max_features_ = int(arrays["max_features"][i])
+        estimator.tree_ = tree
+        estimators.append(estimator)
+    model.estimator_ = template
+    model.estimators_ = estimators
+    model.n_features_in_ = n_features
+    model.n_outputs_ = n_outputs
+    model.classes_ = classes
+    model.n_classes_ = len(classes)
+    return model
+
+
+def _save_linear(model, out: Path) -> dict:
+    np.save(out / "coef.npy", np.asarray(model.coef_), allow_pickle=False)
+    np.save(out / "intercept.npy", np.asarray(model.intercept_), allow_pickle=False)
+    return {"kind": "linear", "files": ["coef.npy", "intercept.npy"]}
+
+
+def _load_linear(entry: dict, manifest: dict, out: Path):
+    from sklearn.linear_model import LogisticRegression
+
+    model = LogisticRegression(**entry["params"])
+    model.coef_ = _load_npy(manifest, out, "coef")
+    model.intercept_ = _load_npy(manifest, out, "intercept")
+    model.classes_ = _classes(entry["classes"])
+    model.n_features_in_ = len(manifest["feature_cols"])
+    return model
+
+
+def _save_xgboost(model, out: Path) -> dict:
+    # The booster alone: the sklearn wrapper's save_model needs the estimator
+    # type tag, which newer scikit-learn no longer sets.
+    model.get_booster().save_model(out / "xgboost.json")
+    return {"kind": "xgboost", "files": ["xgboost.json"]}
+
+
+def _load_xgboost(entry: dict, manifest: dict, out: Path):
+    from xgboost import XGBClassifier
+
+    model = XGBClassifier()
+    model.load_model(_payload(manifest, out, "xgboost.json"))
+    return model
+
+
+class LightGBMBooster:
+    """Binary classifier interface over a ``lightgbm.Booster`` loaded from text."""
+
+    def __init__(self, booster, classes):
+        self.booster = booster
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X):
+        positive = self.booster.predict(X)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.booster.predict(X) >= 0.5).astype(int)]
+
+
+def _save_lightgbm(model, out: Path) -> dict:
+    booster = getattr(model, "booster_", model.booster if isinstance(model, LightGBMBooster) else None)
+    booster.save_model(str(out / "lightgbm.txt"))
+    return {"kind": "lightgbm", "files": ["lightgbm.txt"]}
+
+
+def _load_lightgbm(entry: dict, manifest: dict, out: Path):
+    import lightgbm
+
+    return LightGBMBooster(lightgbm.Booster(model_file=str(_payload(manifest, out, "lightgbm.txt"))), _classes(entry["classes"]))
+
+
+MODEL_KINDS = {
+    "forest": (_save_forest, _load_forest),
+    "linear": (_save_linear, _load_linear),
+    "xgboost": (_save_xgboost, _load_xgboost),
+    "lightgbm": (_save_lightgbm, _load_lightgbm),
+}
+
+
+def model_kind(model) -> str:
+    name = type(model).__name__
+    if name in FORESTS:
+        return "forest"
+    if name == "LogisticRegression":
+        return "linear"
+    if name == "XGBClassifier":
+        return "xgboost"
+    if name in ("LGBMClassifier", "LightGBMBooster"):
+        return "lightgbm"
+    raise BundleError(f"{name} cannot be stored in an artifact bundle")
+
+
+# -- preprocessor -------------------------------------------------------------
+
+def _save_preprocessor(preprocessor, feature_cols, out: Path) -> dict:
+    from src.inference.forest_kernel import _is_passthrough, compile_scaler
+
+    # Rejects anything that is not the imputer + scaler / passthrough layout.
+    compile_scaler(preprocessor, feature_cols)
+    transformers, arrays = [], {}
+    for name, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == "drop" or not len(columns):
+            continue
+        if _is_passthrough(transformer):
+            transformers.append({"name": name, "kind": "passthrough", "columns": list(columns)})
+            continue
+        if arrays:
+            raise BundleError("Only one scaled column group is supported")
+        imputer = transformer.named_steps["imputer"]
+        scaler = transformer.named_steps["scaler"]
+        arrays = dict(zip(PREPROCESSOR_ARRAYS, (
+            np.asarray(imputer.statistics_, dtype=np.float64),
+            np.asarray(scaler.mean_, dtype=np.float64),
+            np.asarray(scaler.var_, dtype=np.float64),
+            np.asarray(scaler.scale_, dtype=np.float64),
+            np.broadcast_to(scaler.n_samples_seen_, len(columns)).astype(np.int64),
+        )))
+        transformers.append({
+            "name": name,
+            "kind": "median_standard",
+            "columns": list(columns),
+            "imputer_strategy": imputer.strategy,
+        })
+    for name, arr in arrays.items():
+        np.save(out / f"{name}.npy", arr, allow_pickle=False)
+    return {"transformers": transformers, "files": [f"{name}.npy" for name in arrays]}
+
+
+def _load_preprocessor(entry: dict, manifest: dict, feature_cols, out: Path):
+    import pandas as pd
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    transformers, scaled = [], None
+    for spec in entry["transformers"]:
+        if spec["kind"] == "median_standard":
+            scaled = spec
+            steps = [("imputer", SimpleImputer(strategy=spec["imputer_strategy"])), ("scaler", StandardScaler())]
+            transformers.append((spec["name"], Pipeline(steps=steps), spec["columns"]))
+        elif spec["kind"] == "passthrough":
+            transformers.append((spec["name"], "passthrough", spec["columns"]))
+        else:
+            raise BundleError(f"Unknown transformer kind {spec['kind']!r}")
+    preprocessor = ColumnTransformer(transformers=transformers)
+    preprocessor.fit(pd.DataFrame(np.ones((2, len(feature_cols))), columns=feature_cols))
+    if scaled is not None:
+        pipeline = preprocessor.named_transformers_[scaled["name"]]
+        imputer, scaler = pipeline.named_steps["imputer"], pipeline.named_steps["scaler"]
+        imputer.statistics_ = _load_npy(manifest, out, "imputer_statistics")
+        scaler.mean_ = _load_npy(manifest, out, "scaler_mean")
+        scaler.var_ = _load_npy(manifest, out, "scaler_var")
+        scaler.scale_ = _load_npy(manifest, out, "scaler_scale")
+        scaler.n_samples_seen_ = _load_npy(manifest, out, "scaler_n_samples_seen")
+    return preprocessor
+
+
+# -- bundle -------------------------------------------------------------------
+
+def save_artifact_bundle(path, model, preprocessor, feature_cols=FEATURE_COLS, metrics=None,
+                         source_files=None) -> Path:
+    """Write ``model`` and ``preprocessor`` as a bundle directory at ``path``
+    (replaced atomically). ``source_files`` (name -> path, e.g. the pickles the
+    bundle was made from) have their checksums recorded in the manifest."""
+    path = Path(path).resolve()
+    kind = model_kind(model)
+    staging = path.with_name(f".{path.name}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    try:
+        model_entry = MODEL_KINDS[kind][0](model, staging)
+        model_entry.update({
+            "class": type(model).__name__,
+            "params": _json_params(model.get_params()) if hasattr(model, "get_params") else {},
+            "classes": _classes_entry(model.classes_),
+        })
+        preprocessor_entry = _save_preprocessor(preprocessor, list(feature_cols), staging)
+        files = [*model_entry.pop("files"), *preprocessor_entry.pop("files")]
+        manifest = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "feature_cols": list(feature_cols),
+            "model": model_entry,
+            "preprocessor": preprocessor_entry,
+            "versions": _versions("sklearn", "imblearn", "xgboost", "lightgbm"),
+            "metrics": metrics or {},
+            "sources": {name: sha256_file(p) for name, p in (source_files or {}).items()},
+            "files": {name: {"sha256": sha256_file(staging / name), "bytes": (staging / name).stat().st_size}
+                      for name in files},
+        }
+        with open(staging / MANIFEST, "w") as f:
+            json.dump(manifest, f, indent=2)
+        if path.exists():
+            old = path.with_name(f".{path.name}.old")
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(path, old)
+            os.replace(staging, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return path
+
+
+def verify_payloads(path, manifest: dict, names=None) -> None:
+    """Check the size and SHA-256 of the listed payloads ``names`` (default: all)."""
+    path = Path(path)
+    for name in manifest["files"] if names is None else names:
+        spec, file = manifest["files"].get(name), path / name
+        if spec is None or file.parent != path or not file.is_file():
+            raise BundleError(f"{path} is missing payload {name}")
+        if file.stat().st_size != spec["bytes"] or sha256_file(file) != spec["sha256"]:
+            raise BundleError(f"Checksum mismatch for {file}")
+
+
+def read_manifest(path, verify: bool = True) -> dict:
+    """The manifest of the bundle at ``path``, after checking its format and,
+    with ``verify``, every payload's size and SHA-256."""
+    path = Path(path)
+    try:
+        with open(path / MANIFEST) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"{path} has no readable {MANIFEST}: {e}") from e
+    if manifest.get("format") != FORMAT_NAME or manifest.get("version") != FORMAT_VERSION:
+        raise BundleError(f"{path} is not a {FORMAT_NAME} v{FORMAT_VERSION} bundle")
+    if verify:
+        verify_payloads(path, manifest)
+    return manifest
+
+
+def member_files(manifest: dict, member: str) -> list:
+    """Payloads of the ``"model"`` or the ``"preprocessor"``."""
+    scaler_files = {f"{name}.npy" for name in PREPROCESSOR_ARRAYS}
+    return [name for name in manifest["files"] if (name in scaler_files) == (member == "preprocessor")]
+
+
+def load_bundle_member(path, member: str, feature_cols=FEATURE_COLS, verify: bool = True, manifest: dict = None):
+    """The ``"model"`` or ``"preprocessor"`` of the bundle at ``path`` on its own;
+    only that member's payloads are checksummed and read. ``manifest`` skips
+    reading it again when the caller already has it."""
+    path = Path(path)
+    manifest = manifest or read_manifest(path, verify=False)
+    if manifest["feature_cols"] != list(feature_cols):
+        raise BundleError(f"{path} was trained on a different feature order than FEATURE_COLS")
+    if member not in MEMBERS.values():
+        raise BundleError(f"Unknown bundle member {member!r}")
+    if verify:
+        verify_payloads(path, manifest, member_files(manifest, member))
+    if member == "preprocessor":
+        return _load_preprocessor(manifest["preprocessor"], manifest, list(feature_cols), path)
+    entry = manifest["model"]
+    if entry.get("kind") not in MODEL_KINDS:
+        raise BundleError(f"Unknown model kind {entry.get('kind')!r}")
+    if entry["kind"] == "forest" and entry.get("class") not in FORESTS:
+        raise BundleError(f"Unknown forest class {entry.get('class')!r}")
+    return MODEL_KINDS[entry["kind"]][1](entry, manifest, path)
+
+
+def load_artifact_bundle(path, feature_cols=FEATURE_COLS, verify: bool = True):
+    """``(model, preprocessor, manifest)`` from the bundle at ``path``."""
+    path = Path(path)
+    manifest = read_manifest(path, verify)
+    model = load_bundle_member(path, "model", feature_cols, verify=False, manifest=manifest)
+    preprocessor = load_bundle_member(path, "preprocessor", feature_cols, verify=False, manifest=manifest)
+    return model, preprocessor, manifest
+
+
+def training_metrics(artifacts_dir) -> dict:
+    """Held-out metrics of the saved model from the training reports next to it."""
+    artifacts_dir, metrics = Path(artifacts_dir), {}
+    try:
+        with open(artifacts_dir / "model_evaluation.json") as f:
+            report = json.load(f)
+        best = report["models"][report["best_model"]]
+        metrics.update({
+            "model": report["best_model"],
+            "test_roc_auc": best["test_roc_auc"],
+            "cv_roc_auc_mean": best["cv_roc_auc_mean"],
+        })
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    try:
+        with open(artifacts_dir / "decision_policy.json") as f:
+            policy = json.load(f)
+        metrics.update({"threshold": policy["threshold"], "threshold_test_metrics": policy.get("test_metrics")})
+    except (OSError, ValueError, KeyError):
+        pass
+    return metrics
+
+
+def is_stale(bundle_path, artifacts_dir) -> bool:
+    """True when ``bundle_path`` is missing or was not exported from the current
+    ``best_model.pkl`` / ``scaler.pkl`` in ``artifacts_dir``."""
+    try:
+        sources = read_manifest(bundle_path, verify=False)["sources"]
+    except BundleError:
+        return True
+    return any(
+        sources.get(name) != sha256_file(Path(artifacts_dir) / name)
+        for name in MEMBERS if (Path(artifacts_dir) / name).exists()
+    )
+
+
+def export_from_pickles(artifacts_dir, bundle_path=None, feature_cols=None, allow_pickle=None) -> Path:
+    """Write the bundle for the trusted ``best_model.pkl`` / ``scaler.pkl`` in
+    ``artifacts_dir``. Unpickling them follows ``load_object``'s rules."""
+    from src.utils.metrics import load_object
+
+    artifacts_dir = Path(artifacts_dir).resolve()
+    sources = {name: artifacts_dir / name for name in MEMBERS}
+    preprocessor = load_object(str(sources["scaler.pkl"]), from_bundle=False, allow_pickle=allow_pickle)
+    return save_artifact_bundle(
+        bundle_path or artifacts_dir / BUNDLE_DIR,
+        load_object(str(sources["best_model.pkl"]), from_bundle=False, allow_pickle=allow_pickle),
+        preprocessor,
+        feature_cols or input_columns(preprocessor),
+        metrics=training_metrics(artifacts_dir),
+        source_files=sources,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the pickled model and scaler to a pickle-free bundle")
+    parser.add_argument("--artifacts", default=str(Path(__file__).resolve().parents[2] / "artifacts"))
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    path = export_from_pickles(args.artifacts, args.out)
+    manifest = read_manifest(path)
+    size = sum(spec["bytes"] for spec in manifest["files"].values())
+    print(f"Wrote {path} ({manifest['model']['class']}, {len(manifest['files'])} files, {size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
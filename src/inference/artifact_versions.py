@@ -0,0 +1,139 @@
+"""Versioned serving artifacts.
+
+Every training run can publish a copy of its serving files into
+``artifacts/versions/<version>/`` and then atomically repoint
+``artifacts/versions/CURRENT`` at it. Running APIs pick the new version up via
+``POST /admin/reload`` or their ``CURRENT`` watcher, so deploying a model never
+rewrites files a live worker is reading.
+
+Pruning never removes the ``CURRENT`` version, the one it replaced (workers
+may not have reloaded yet) or a version listed in ``artifacts/versions/PINNED``.
+The API pins a version while it serves it through ``/admin/reload`` or
+shadows it as ``FRAUDSHIELD_CHALLENGER``.
+"""
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+
+POINTER_NAME = "CURRENT"
+PINS_NAME = "PINNED"
+SERVING_FILES = (
+    "best_model.pkl",
+    "scaler.pkl",
+    "decision_policy.json",
+    "forest_compressed.bin",
+    "forest_compressed.json",
+    "drift_reference.json",
+    "bundle",
+)
+REQUIRED_FILES = ("best_model.pkl", "scaler.pkl")
+
+
+def versions_dir(artifacts_dir) -> Path:
+    return Path(artifacts_dir) / "versions"
+
+
+def current_version(root) -> str | None:
+    pointer = Path(root) / POINTER_NAME
+    if not pointer.exists():
+        return None
+    version = pointer.read_text().strip()
+    return version or None
+
+
+def version_path(root, version: str) -> Path:
+    path = Path(root) / version
+    if path.parent != Path(root) or not path.is_dir():
+        raise FileNotFoundError(f"Unknown artifact version {version!r} under {root}")
+    return path
+
+
+def list_versions(root) -> list:
+    root = Path(root)
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def set_current(root, version: str) -> None:
+    version_path(root, version)
+    tmp = Path(root) / f".{POINTER_NAME}.tmp"
+    tmp.write_text(version + "\n")
+    os.replace(tmp, Path(root) / POINTER_NAME)
+
+
+def _write_pins(root, pins: list) -> None:
+    tmp = Path(root) / f".{PINS_NAME}.tmp"
+    tmp.write_text("".join(f"{version}\n" for version in pins))
+    os.replace(tmp, Path(root) / PINS_NAME)
+
+
+def pinned_versions(root) -> list:
+    """One entry per pin; a version pinned by two processes is listed twice."""
+    path = Path(root) / PINS_NAME
+    if not path.exists():
+        return []
+    return [line.strip() for line in path.read_text().splitlines() if line.strip()]
+
+
+def pin_version(root, version: str) -> None:
+    """Protect ``version`` from pruning until a matching ``unpin_version``."""
+    version_path(root, version)
+    _write_pins(root, pinned_versions(root) + [version])
+
+
+def unpin_version(root, version: str) -> None:
+    """Drop one pin of ``version``; other holders keep theirs."""
+    pins = pinned_versions(root)
+    if version in pins:
+        pins.remove(version)
+        _write_pins(root, pins)
+
+
+def publish_version(artifacts_dir, root=None, keep: int = 5, export_forest: bool = True, exclude=()) -> str:
+    """Copy the serving files of ``artifacts_dir`` into a new version directory,
+    make it ``CURRENT`` and prune all but the ``keep`` most recently published. The
+    previous ``CURRENT``, pinned versions and ``exclude`` are never pruned."""
+    artifacts_dir = Path(artifacts_dir).resolve()
+    root = Path(root).resolve() if root is not None else versions_dir(artifacts_dir)
+    missing = [name for name in REQUIRED_FILES if not (artifacts_dir / name).exists()]
+    if missing:
+        raise FileNotFoundError(f"Cannot publish without {missing} in {artifacts_dir}")
+
+    digest = hashlib.sha256()
+    for name in REQUIRED_FILES:
+        digest.update((artifacts_dir / name).read_bytes())
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{digest.hexdigest()[:8]}"
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = root / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+    for name in SERVING_FILES:
+        if (artifacts_dir / name).is_dir():
+            shutil.copytree(artifacts_dir / name, staging / name)
+        elif (artifacts_dir / name).exists():
+            shutil.copy2(artifacts_dir / name, staging / name)
+    if export_forest:
+        # Shared-model workers map the version's own forest straight from its
+        # directory: the compressed one when training made it, else forest.bin.
+        from src.inference.forest_store import choose_served_forest, export_from_pickles
+
+        try:
+            export_from_pickles(staging, staging / "forest.bin")
+        except ValueError:
+            pass
+        choose_served_forest(staging)
+    os.replace(staging, root / version)
+    previous = current_version(root)
+    set_current(root, version)
+
+    protected = {version, previous, *pinned_versions(root), *exclude}
+    # Publish order: names only resolve to the second, and their hash suffix is random.
+    published = sorted(list_versions(root), key=lambda name: ((root / name).stat().st_mtime_ns, name))
+    for old in published[:-keep] if keep else []:
+        if old not in protected:
+            shutil.rmtree(root / old, ignore_errors=True)
+    return version
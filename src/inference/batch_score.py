@@ -0,0 +1,371 @@
+"""Offline batch scoring of a CSV or NDJSON file across worker processes.
+
+    fraudshield-score transactions.csv scores.csv --workers 8
+
+The input is cut into shards of ``--chunk-rows`` lines by byte offset while it
+is read, so it is never held in memory and no line is parsed twice. Workers
+parse, validate and score their shard (the same parsing and output format as
+``/predict/stream``) and the parent appends the results to the output strictly
+in input order, so at most ``2 * workers`` shards are in flight.
+
+The model and scaler are loaded once in the parent, from the pickle-free
+``bundle/`` when it exists and with ``load_object`` otherwise; the workers inherit them (forked processes share the pages until they are
+written), or with ``--mmap`` every worker maps ``forest.bin`` read-only and
+they all share one page-cache copy of the trees.
+
+After every shard appended, ``<output>.ckpt`` records the shards done, the
+input offset they end at and the output size. Running the same command again
+after a crash or Ctrl-C truncates the output to the last checkpoint and picks
+up from there; ``--restart`` starts over. The checkpoint is refused when the
+input, the model or ``--chunk-rows`` changed since it was written.
+
+``row`` in the output is the 0-based data line of the input; blank lines are
+skipped but keep their number, so rows join back to the input by position.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.inference import bulk
+from src.inference.artifact_bundle import BUNDLE_DIR, MANIFEST, load_artifact_bundle
+from src.inference.artifact_versions import current_version, version_path, versions_dir
+from src.inference.decision_policy import DecisionPolicy, load_policy
+from src.preprocessing.schema import FEATURE_COLS
+from src.utils.metrics import load_object
+
+ROOT = Path(__file__).resolve().parents[2]
+POSITIVE_IDX = np.array([FEATURE_COLS.index("Time"), FEATURE_COLS.index("Amount")])
+CHECKPOINT_FORMAT = 1
+READ_BLOCK_BYTES = 8 << 20
+
+
+class Scorer:
+    """Labels, probabilities and risk tiers for raw FEATURE_COLS rows, from the
+    pickled model (``kernel`` None) or a compiled forest."""
+
+    def __init__(self, policy: DecisionPolicy, model=None, scaler=None, kernel=None):
+        self.policy = policy
+        self.model = model
+        self.scaler = scaler
+        self.kernel = kernel
+
+    def __call__(self, X: np.ndarray):
+        if self.kernel is not None:
+            proba = self.kernel.predict_proba(X)
+            classes = self.kernel.forest.classes
+        else:
+            scaled = self.scaler.transform(pd.DataFrame(X, columns=FEATURE_COLS, copy=False))
+            if not hasattr(self.model, "predict_proba"):
+                return self.model.predict(scaled).astype(int), None, None
+            proba = self.model.predict_proba(scaled)
+            classes = self.model.classes_
+        positive = proba[:, 1]
+        predictions = np.where(self.policy.decide(positive), classes[1], classes[0]).astype(int)
+        return predictions, positive, self.policy.tiers(positive)
+
+
+def _file_sha256(*paths) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_artifacts(artifacts) -> Path:
+    """``artifacts`` itself, or its ``CURRENT`` published version when there is one."""
+    artifacts = Path(artifacts).resolve()
+    version = current_version(versions_dir(artifacts))
+    return version_path(versions_dir(artifacts), version) if version else artifacts
+
+
+def load_policy_for(source: Path) -> DecisionPolicy:
+    """The trained policy, unless it was tuned for a different best_model.pkl."""
+    policy = load_policy(source / "decision_policy.json")
+    expected = policy.metadata.get("model_sha256")
+    if expected and expected != _file_sha256(source / "best_model.pkl"):
+        print(f"{source / 'decision_policy.json'} was tuned for a different model, using the default policy",
+              file=sys.stderr)
+        return DecisionPolicy()
+    return policy
+
+
+def export_forest(source: Path) -> Path:
+    """``source/forest.bin``, exported from the pickles first when missing or stale."""
+    from src.inference.forest_store import export_from_pickles, is_stale
+
+    bin_path = source / "forest.bin"
+    if is_stale(bin_path, source):
+        export_from_pickles(source, bin_path, FEATURE_COLS)
+    return bin_path
+
+
+def load_scorer(source: Path, mmap: bool = False) -> Scorer:
+    policy = load_policy_for(source)
+    if mmap:
+        from src.inference.forest_store import load_compiled
+
+        return Scorer(policy, kernel=load_compiled(source / "forest.bin", mmap=True))
+    if (source / BUNDLE_DIR / MANIFEST).exists():
+        model, scaler, _ = load_artifact_bundle(source / BUNDLE_DIR, FEATURE_COLS)
+        return Scorer(policy, model=model, scaler=scaler)
+    return Scorer(
+        policy,
+        model=load_object(str(source / "best_model.pkl")),
+        scaler=load_object(str(source / "scaler.pkl")),
+    )
+
+
+def shards(path, start: int, chunk_rows: int):
+    """``(offset, end, lines)`` byte ranges of ``chunk_rows`` lines each from
+    ``start`` to the end of the file."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset, position, lines, last = start, start, 0, b"\n"
+        while True:
+            block = f.read(READ_BLOCK_BYTES)
+            if not block:
+                break
+            last = block[-1:]
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+            while lines + len(newlines) >= chunk_rows:
+                end = position + int(newlines[chunk_rows - lines - 1]) + 1
+                yield offset, end, chunk_rows
+                newlines = newlines[chunk_rows - lines:]
+                offset, lines = end, 0
+            lines += len(newlines)
+            position += len(block)
+        if position > offset:
+            yield offset, position, lines + (last != b"\n")
+
+
+# Per-worker state, set by _init_worker in each process.
+_worker = {}
+
+
+def _init_worker(path: str, fmt: str, columns, scorer: Scorer | None, source: str | None):
+    if scorer is None:
+        scorer = load_scorer(Path(source), mmap=True)
+    if scorer.model is not None and "n_jobs" in getattr(scorer.model, "get_params", dict)():
+        # One process per core already; joblib threads would only oversubscribe.
+        scorer.model.set_params(n_jobs=1)
+    _worker.update(path=path, fmt=fmt, columns=columns, scorer=scorer)
+
+
+def _score_shard(offset: int, end: int, first_row: int):
+    """Output bytes and ``(rows, errors)`` for the input lines in ``[offset, end)``."""
+    with open(_worker["path"], "rb") as f:
+        f.seek(offset)
+        raw = f.read(end - offset).split(b"\n")
+    if raw and raw[-1] == b"":
+        raw.pop()
+    index = np.array([i for i, line in enumerate(raw) if line.strip()], dtype=np.int64)
+    lines = [raw[i].rstrip(b"\r") for i in index]
+    if not lines:
+        return b"", 0, 0
+    if _worker["fmt"] == bulk.CSV:
+        X, malformed = bulk.parse_csv(lines, _worker["columns"])
+    else:
+        X, malformed = bulk.parse_ndjson(lines, FEATURE_COLS)
+    errors = bulk.row_errors(X, malformed, POSITIVE_IDX)
+    valid = np.array([e is None for e in errors], dtype=bool)
+    predictions = probabilities = tiers = None
+    if valid.any():
+        predictions, probabilities, tiers = _worker["scorer"](X[valid])
+    body = bulk.format_rows(_worker["fmt"], 0, errors, predictions, probabilities, tiers, index=first_row + index)
+    return body, len(lines), int((~valid).sum())
+
+
+class Checkpoint:
+    """Progress of one run, rewritten atomically after every shard appended."""
+
+    def __init__(self, path: Path, identity: dict):
+        self.path = path
+        self.identity = identity
+        self.state = {"shards": 0, "input_offset": 0, "input_rows": 0, "output_bytes": 0, "rows": 0, "errors": 0}
+
+    def load(self) -> bool:
+        """Whether a matching checkpoint was found; raises when it belongs to another run."""
+        if not self.path.exists():
+            return False
+        with open(self.path) as f:
+            saved = json.load(f)
+        changed = sorted(k for k, v in self.identity.items() if saved.get("identity", {}).get(k) != v)
+        if changed:
+            raise ValueError(f"{self.path} was written for a different run ({', '.join(changed)} changed); "
+                             "use --restart to start over")
+        self.state.update(saved["state"])
+        return True
+
+    def save(self, done: bool = False):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"format": CHECKPOINT_FORMAT, "identity": self.identity, "state": self.state, "done": done}, f)
+        os.replace(tmp, self.path)
+
+
+def _progress(rows: int, elapsed: float, done_bytes: int, total_bytes: int, start_bytes: int):
+    rate = rows / elapsed if elapsed else 0.0
+    scanned = done_bytes - start_bytes
+    eta = elapsed * (total_bytes - done_bytes) / scanned if scanned else 0.0
+    sys.stderr.write(f"\r{rows:>12,} rows {rate:>10,.0f} rows/s {done_bytes / total_bytes:>5.0%}  ETA {eta:5.0f}s ")
+    sys.stderr.flush()
+
+
+def score_file(
+    input_path, output_path, artifacts=ROOT / "artifacts", workers: int | None = None,
+    chunk_rows: int = 100_000, mmap: bool = False, checkpoint_path=None, restart: bool = False,
+    progress: bool = True,
+) -> dict:
+    """Score ``input_path`` into ``output_path``; returns the run report."""
+    input_path, output_path = Path(input_path).resolve(), Path(output_path).resolve()
+    workers = max(1, workers or os.cpu_count() or 1)
+    fmt = bulk.CSV if input_path.suffix.lower() == ".csv" else bulk.NDJSON
+    source = resolve_artifacts(artifacts)
+    stat = input_path.stat()
+    identity = {
+        "input": str(input_path),
+        "input_bytes": stat.st_size,
+        "input_mtime_ns": stat.st_mtime_ns,
+        "model_sha256": _file_sha256(source / "best_model.pkl", source / "scaler.pkl"),
+        "chunk_rows": chunk_rows,
+        "format": fmt,
+    }
+    checkpoint = Checkpoint(Path(checkpoint_path or f"{output_path}.ckpt"), identity)
+    resumed = not restart and checkpoint.load()
+
+    header_bytes, columns = 0, None
+    if fmt == bulk.CSV:
+        with open(input_path, "rb") as f:
+            header = f.readline()
+        header_bytes = len(header)
+        columns = bulk.csv_columns(header.rstrip(b"\r\n"), FEATURE_COLS)
+    if mmap:
+        # Once, here: workers only map it.
+        export_forest(source)
+    scorer = None if mmap else load_scorer(source)
+
+    state = checkpoint.state
+    if resumed:
+        out = open(output_path, "r+b")
+        out.truncate(state["output_bytes"])
+        out.seek(state["output_bytes"])
+    else:
+        out = open(output_path, "wb")
+        if fmt == bulk.CSV:
+            out.write(bulk.csv_header())
+        state.update(input_offset=header_bytes, output_bytes=out.tell())
+        checkpoint.save()
+
+    init_args = (str(input_path), fmt, columns, scorer, None if scorer else str(source))
+    start_bytes, start_rows = state["input_offset"], state["rows"]
+    started = time.perf_counter()
+    pool = None
+    try:
+        if workers == 1:
+            _init_worker(*init_args)
+            submit = lambda *args: _Done(_score_shard(*args))  # noqa: E731
+        else:
+            pool = ProcessPoolExecutor(workers, mp_context=get_context(), initializer=_init_worker, initargs=init_args)
+            submit = lambda *args: pool.submit(_score_shard, *args)  # noqa: E731
+        pending = deque()
+        first_row = state["input_rows"]
+        todo = shards(input_path, state["input_offset"], chunk_rows)
+        while True:
+            while len(pending) < 2 * workers:
+                shard = next(todo, None)
+                if shard is None:
+                    break
+                offset, end, lines = shard
+                pending.append((end, lines, submit(offset, end, first_row)))
+                first_row += lines
+            if not pending:
+                break
+            end, lines, future = pending.popleft()
+            body, rows, errors = future.result()
+            out.write(body)
+            out.flush()
+            state["shards"] += 1
+            state["input_offset"] = end
+            state["input_rows"] += lines
+            state["output_bytes"] = out.tell()
+            state["rows"] += rows
+            state["errors"] += errors
+            checkpoint.save()
+            if progress:
+                _progress(state["rows"] - start_rows, time.perf_counter() - started, end, stat.st_size, start_bytes)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        out.close()
+        if progress:
+            sys.stderr.write("\n")
+    elapsed = time.perf_counter() - started
+    checkpoint.save(done=True)
+    scored = state["rows"] - start_rows
+    return {
+        "input": str(input_path),
+        "output": str(output_path),
+        "rows": state["rows"],
+        "errors": state["errors"],
+        "rows_this_run": scored,
+        "resumed": resumed,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(scored / elapsed, 1) if elapsed else 0.0,
+        "workers": workers,
+        "backend": "mmap" if mmap else "pickle",
+        "model_source": str(source),
+    }
+
+
+class _Done:
+    """A finished result behind the ``Future.result()`` interface (single-process runs)."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or NDJSON file of transactions offline.")
+    parser.add_argument("input", help="CSV with a FEATURE_COLS header, or NDJSON (.ndjson/.jsonl)")
+    parser.add_argument("output", help="scores, in the input's format")
+    parser.add_argument("--artifacts", default=str(ROOT / "artifacts"),
+                        help="model directory; its published CURRENT version is used when there is one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="scoring processes (default: all cores)")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="input lines per shard")
+    parser.add_argument("--mmap", action="store_true",
+                        help="share one memory-mapped forest.bin between workers instead of the pickled model")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.ckpt)")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--quiet", action="store_true", help="no progress line")
+    args = parser.parse_args(argv)
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be >= 1")
+    try:
+        report = score_file(
+            args.input, args.output, args.artifacts, args.workers, args.chunk_rows,
+            args.mmap, args.checkpoint, args.restart, progress=not args.quiet,
+        )
+    except KeyboardInterrupt:
+        sys.exit("Interrupted; run the same command again to resume from the checkpoint.")
+    except (OSError, ValueError) as e:
+        sys.exit(f"fraudshield-score: {e}")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Asyncio micro-batching for single-row inference requests.
+
+Callers ``await batcher.submit(row)``; rows wait in a queue until either
+``max_batch_size`` rows are pending or the oldest has waited ``max_wait_ms``.
+The batch is then scored as one matrix on a worker thread and every caller's
+future receives its own row of the result.
+
+``score_fn(X)`` returns ``(predictions, probabilities, tag)``; ``tag`` is
+handed back to every caller of the batch unchanged, e.g. the model that
+scored it.
+
+``stop()`` fails every pending future with ``RuntimeError``, both the rows
+still queued and a batch cancelled while it is being scored.
+"""
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class CoalescerStats:
+    batches: int = 0
+    rows: int = 0
+    flushed_full: int = 0
+    flushed_deadline: int = 0
+    max_queue_depth: int = 0
+    total_wait_s: float = 0.0
+    total_score_s: float = 0.0
+    batch_sizes: Counter = field(default_factory=Counter)
+
+    def record(self, size: int, full: bool, wait_s: float, score_s: float):
+        self.batches += 1
+        self.rows += size
+        if full:
+            self.flushed_full += 1
+        else:
+            self.flushed_deadline += 1
+        self.total_wait_s += wait_s
+        self.total_score_s += score_s
+        # Power-of-two buckets keep the histogram small for any max batch size.
+        self.batch_sizes[1 << (size - 1).bit_length()] += 1
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.stats = CoalescerStats()
+        self._queue = None
+        self._task = None
+        # Set by ``submit``; ``_collect`` waits on it instead of on ``Queue.get``,
+        # so a gather timeout can never drop a row the queue already handed out.
+        self._arrived = None
+        # Rows taken off the queue and not yet resolved: the batch being
+        # gathered or scored.
+        self._batch = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._arrived = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._fail_pending(RuntimeError("Coalescer stopped"))
+        self._task = self._queue = self._arrived = None
+
+    def _fail_pending(self, exc: Exception):
+        """Fail the in-flight batch and every queued row."""
+        pending, self._batch = self._batch, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(exc)
+
+    async def submit(self, row: np.ndarray):
+        """Score one raw row; resolves to ``(prediction, probability, tag)``."""
+        if self._queue is None:
+            raise RuntimeError("Coalescer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future, time.perf_counter()))
+        self._arrived.set()
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        """Fill ``self._batch`` until it is full or its oldest row's deadline
+        passes. Rows only leave the queue through ``get_nowait``."""
+        batch = self._batch
+        deadline = None
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                if deadline is None:
+                    deadline = batch[0][2] + self.max_wait_s
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            self._arrived.clear()
+            if deadline is None:
+                await self._arrived.wait()
+                continue
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await self._collect()
+                batch = self._batch = [item for item in self._batch if not item[1].cancelled()]
+                if not batch:
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    X = np.vstack([item[0] for item in batch])
+                    predictions, probabilities, tag = await loop.run_in_executor(None, self.score_fn, X)
+                except Exception as exc:
+                    self._batch = []
+                    for _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                finished = time.perf_counter()
+
+                self._batch = []
+                for i, (_, future, _) in enumerate(batch):
+                    if not future.done():
+                        future.set_result(
+                            (predictions[i], probabilities[i] if probabilities is not None else None, tag)
+                        )
+                self.stats.record(
+                    size=len(batch),
+                    full=len(batch) >= self.max_batch_size,
+                    wait_s=started - batch[0][2],
+                    score_s=finished - started,
+                )
+        finally:
+            # Cancelled (``stop``) or crashed: nobody is left to resolve these.
+            self._fail_pending(RuntimeError("Coalescer stopped"))
+
+    def snapshot(self) -> dict:
+        s = self.stats
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": s.max_queue_depth,
+            "batches": s.batches,
+            "rows": s.rows,
+            "mean_batch_size": s.rows / s.batches if s.batches else 0.0,
+            "flushed_full": s.flushed_full,
+            "flushed_deadline": s.flushed_deadline,
+            "mean_queue_wait_ms": s.total_wait_s / s.batches * 1000.0 if s.batches else 0.0,
+            "mean_score_ms": s.total_score_s / s.batches * 1000.0 if s.batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(s.batch_sizes.items())},
+        }
@@ -0,0 +1,93 @@
+"""Decision threshold and risk tiers applied to the class-1 probability.
+
+Training writes ``artifacts/decision_policy.json`` next to ``best_model.pkl``
+(see ``src/models/threshold.py``); the API loads it once and derives the label
+and risk tier from the single ``predict_proba`` pass it already makes.
+"""
+import json
+import os
+from bisect import bisect_right
+from dataclasses import dataclass, field
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.5
+# The Streamlit app's "Moderate Risk" band starts at 60% of the fraud threshold.
+DEFAULT_MODERATE_RATIO = 0.6
+TIER_NAMES = ("Low", "Moderate", "High")
+
+
+@dataclass(frozen=True)
+class DecisionPolicy:
+    """Rows with ``probability >= threshold`` are fraud. ``tier_bounds`` are the
+    ascending lower bounds of every tier after the first in ``tier_names``."""
+
+    threshold: float = DEFAULT_THRESHOLD
+    tier_names: tuple = TIER_NAMES
+    tier_bounds: tuple = (DEFAULT_THRESHOLD * DEFAULT_MODERATE_RATIO, DEFAULT_THRESHOLD)
+    metadata: dict = field(default_factory=dict, compare=False)
+
+    def __post_init__(self):
+        if not 0.0 <= self.threshold <= 1.0:
+            raise ValueError(f"threshold must be in [0, 1], got {self.threshold}")
+        if len(self.tier_bounds) != len(self.tier_names) - 1 or list(self.tier_bounds) != sorted(self.tier_bounds):
+            raise ValueError("tier_bounds must be ascending with one bound per tier after the first")
+
+    @classmethod
+    def from_threshold(cls, threshold: float, moderate_ratio: float = DEFAULT_MODERATE_RATIO, **metadata):
+        return cls(
+            threshold=float(threshold),
+            tier_bounds=(float(threshold) * moderate_ratio, float(threshold)),
+            metadata=metadata,
+        )
+
+    def decide(self, proba: np.ndarray) -> np.ndarray:
+        return np.asarray(proba) >= self.threshold
+
+    def tier(self, probability: float) -> str:
+        return self.tier_names[bisect_right(self.tier_bounds, probability)]
+
+    def tiers(self, proba: np.ndarray) -> np.ndarray:
+        index = np.searchsorted(np.asarray(self.tier_bounds), np.asarray(proba), side="right")
+        return np.asarray(self.tier_names, dtype=object)[index]
+
+    def to_dict(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "tiers": [
+                {"name": name, "min_probability": bound}
+                for name, bound in zip(self.tier_names, (0.0, *self.tier_bounds))
+            ],
+            **self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        data = dict(data)
+        threshold = data.pop("threshold")
+        tiers = data.pop("tiers", None)
+        if not tiers:
+            return cls.from_threshold(threshold, **data)
+        return cls(
+            threshold=float(threshold),
+            tier_names=tuple(t["name"] for t in tiers),
+            tier_bounds=tuple(float(t["min_probability"]) for t in tiers[1:]),
+            metadata=data,
+        )
+
+
+def save_policy(policy: DecisionPolicy, path) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(policy.to_dict(), f, indent=2)
+    os.replace(tmp, path)
+    return str(path)
+
+
+def load_policy(path) -> DecisionPolicy:
+    """The stored policy, or the 0.5 default when none has been trained."""
+    if not os.path.exists(path):
+        return DecisionPolicy()
+    with open(path) as f:
+        return DecisionPolicy.from_dict(json.load(f))
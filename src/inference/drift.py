@@ -0,0 +1,228 @@
+"""Feature and score drift against the training data, in constant memory.
+
+Training stores a ``ReferenceProfile`` in ``artifacts/drift_reference.json``
+(see ``src/models/drift_reference.py``): for every raw feature and for the
+held-out fraud probability, the interior edges of ``n_bins`` quantile bins and
+the share of the reference rows in each bin.
+
+The API feeds every scored row (or every ``1 / sample_rate``-th one) into a
+``DriftMonitor``, which only counts rows per bin: one ``(series, bins)``
+integer matrix for the current window and one for the previous, however much
+traffic passes. ``snapshot`` compares the live counts of both windows with the
+reference by PSI (population stability index) and KS (largest gap between
+the binned CDFs).
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+SCORE_SERIES = "fraud_probability"
+# Common PSI reading: < 0.1 stable, 0.1 - 0.25 moderate shift, > 0.25 drift.
+PSI_WARN = 0.1
+PSI_DRIFT = 0.25
+# Floor for empty bins so PSI stays finite.
+PSI_EPSILON = 1e-4
+UPDATE_CHUNK_ROWS = 4096
+# Up to this many rows a single broadcast comparison is cheapest.
+SMALL_BATCH_ROWS = 32
+
+
+@dataclass(frozen=True)
+class ReferenceProfile:
+    """``edges[i]`` are the ascending interior bin edges of series ``names[i]``
+    (a row falls in bin ``#edges <= value``); ``proportions[i]`` has one more
+    entry than ``edges[i]``."""
+
+    names: tuple
+    edges: tuple
+    proportions: tuple
+    rows: int
+    metadata: dict = None
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "series": [
+                {"name": name, "edges": edges.tolist(), "proportions": proportions.tolist()}
+                for name, edges, proportions in zip(self.names, self.edges, self.proportions)
+            ],
+            **(self.metadata or {}),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        data = dict(data)
+        series, rows = data.pop("series"), int(data.pop("rows"))
+        return cls(
+            names=tuple(s["name"] for s in series),
+            edges=tuple(np.asarray(s["edges"], dtype=np.float64) for s in series),
+            proportions=tuple(np.asarray(s["proportions"], dtype=np.float64) for s in series),
+            rows=rows,
+            metadata=data,
+        )
+
+
+def _bin_edges(values: np.ndarray, n_bins: int) -> np.ndarray:
+    values = values[np.isfinite(values)]
+    if not values.size:
+        return np.empty(0)
+    return np.unique(np.quantile(values, np.linspace(0.0, 1.0, n_bins + 1)[1:-1]))
+
+
+def build_reference(X: np.ndarray, feature_cols, scores=None, n_bins: int = 10, **metadata) -> ReferenceProfile:
+    """Quantile bins of every column of ``X`` (raw rows in ``feature_cols``
+    order) and, when given, of ``scores``."""
+    X = np.asarray(X, dtype=np.float64)
+    columns = [X[:, i] for i in range(X.shape[1])]
+    names = list(feature_cols)
+    if scores is not None:
+        columns.append(np.asarray(scores, dtype=np.float64))
+        names.append(SCORE_SERIES)
+    edges, proportions = [], []
+    for values in columns:
+        e = _bin_edges(values, n_bins)
+        counts = np.bincount(np.searchsorted(e, values, side="right"), minlength=len(e) + 1)
+        edges.append(e)
+        proportions.append(counts / max(len(values), 1))
+    return ReferenceProfile(tuple(names), tuple(edges), tuple(proportions), int(X.shape[0]), metadata)
+
+
+def save_reference(reference: ReferenceProfile, path) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(reference.to_dict(), f)
+    os.replace(tmp, path)
+    return str(path)
+
+
+def load_reference(path):
+    """The stored reference, or None when training has not written one."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return ReferenceProfile.from_dict(json.load(f))
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+def status(value: float) -> str:
+    return "drift" if value > PSI_DRIFT else "warn" if value > PSI_WARN else "ok"
+
+
+class DriftMonitor:
+    """Per-bin row counts of live traffic for the series of ``reference``.
+
+    ``update`` bins a batch by comparing it with the edges of all series at
+    once (padded with +inf to a common width) and counts with one
+    ``bincount``. After
+    ``window_rows`` sampled rows the current window becomes the previous one,
+    so the snapshot covers the last ``window_rows`` to ``2 * window_rows``."""
+
+    def __init__(self, reference: ReferenceProfile, feature_cols, sample_rate: float = 1.0, window_rows: int = 100_000):
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+        if window_rows < 1:
+            raise ValueError("window_rows must be >= 1")
+        names = list(reference.names)
+        missing = [c for c in feature_cols if c not in names]
+        if missing:
+            raise ValueError(f"Drift reference has no bins for {missing}")
+        self.reference = reference
+        self.names = list(feature_cols) + ([SCORE_SERIES] if SCORE_SERIES in names else [])
+        order = [names.index(n) for n in self.names]
+        self.n_features = len(feature_cols)
+        self.n_bins = np.array([len(reference.edges[i]) + 1 for i in order])
+        width = int(self.n_bins.max())
+        self.edges = np.full((len(order), width - 1), np.inf)
+        self.expected = np.zeros((len(order), width))
+        for row, i in enumerate(order):
+            self.edges[row, : len(reference.edges[i])] = reference.edges[i]
+            self.expected[row, : len(reference.proportions[i])] = reference.proportions[i]
+        self.offsets = np.arange(len(order)) * width
+        self.stride = max(int(round(1.0 / sample_rate)), 1)
+        self.window_rows = int(window_rows)
+        self.current = np.zeros((len(order), width), dtype=np.int64)
+        self.previous = np.zeros_like(self.current)
+        self.seen = 0
+        self.sampled = 0
+        self._window_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def has_score(self) -> bool:
+        return len(self.names) > self.n_features
+
+    def _counts(self, values: np.ndarray, series: slice) -> np.ndarray:
+        edges = self.edges[series]
+        if len(values) <= SMALL_BATCH_ROWS:
+            bins = (values[:, :, None] >= edges[None]).sum(axis=2)
+        else:
+            # One comparison per edge column streams through the rows instead
+            # of materializing the (rows, series, edges) array.
+            bins = np.zeros(values.shape, dtype=np.int64)
+            for k in range(edges.shape[1]):
+                bins += values >= edges[:, k]
+        bins += self.offsets[series]
+        return np.bincount(bins.ravel(), minlength=self.current.size).reshape(self.current.shape)
+
+    def update(self, X: np.ndarray, scores=None):
+        """Count the sampled rows of ``X`` (raw, ``feature_cols`` order) and
+        their fraud probabilities."""
+        n_rows = len(X)
+        with self._lock:
+            first = (-self.seen) % self.stride
+            self.seen += n_rows
+        if first >= n_rows:
+            return
+        rows = np.asarray(X, dtype=np.float64)[first::self.stride]
+        if scores is not None and self.has_score:
+            scores = np.asarray(scores, dtype=np.float64)[first::self.stride, None]
+        counts = np.zeros_like(self.current)
+        # Chunks bound the (rows, series, edges) comparison array.
+        for start in range(0, len(rows), UPDATE_CHUNK_ROWS):
+            counts += self._counts(rows[start:start + UPDATE_CHUNK_ROWS], slice(0, self.n_features))
+            if scores is not None and self.has_score:
+                counts += self._counts(scores[start:start + UPDATE_CHUNK_ROWS], slice(self.n_features, None))
+        with self._lock:
+            self.current += counts
+            self.sampled += len(rows)
+            self._window_count += len(rows)
+            if self._window_count >= self.window_rows:
+                self.previous, self.current = self.current, np.zeros_like(self.current)
+                self._window_count = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = self.current + self.previous
+            seen, sampled = self.seen, self.sampled
+        series = {}
+        for row, name in enumerate(self.names):
+            total = counts[row].sum()
+            if not total:
+                series[name] = {"rows": 0, "psi": None, "ks": None, "status": "no_data"}
+                continue
+            n = self.n_bins[row]
+            expected, actual = self.expected[row, :n], counts[row, :n] / total
+            value = psi(expected, actual)
+            series[name] = {"rows": int(total), "psi": value, "ks": ks(expected, actual), "status": status(value)}
+        return {
+            "reference_rows": self.reference.rows,
+            "seen_rows": seen,
+            "sampled_rows": sampled,
+            "sample_rate": 1.0 / self.stride,
+            "window_rows": self.window_rows,
+            "drifted": [name for name, s in series.items() if s["status"] == "drift"],
+            "series": series,
+        }
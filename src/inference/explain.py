@@ -0,0 +1,174 @@
+"""Per-row feature attributions for the compiled forest.
+
+Attributions are path-dependent TreeSHAP values (Lundberg et al., Algorithm 2):
+exact Shapley values of each tree's prediction, where a feature left out of a
+coalition is integrated out by following both children of its splits in
+proportion to the training samples (``CompiledForest.cover``) that went each
+way. Averaged over the trees, the values of a row sum exactly to
+``probability - base_value``, where ``base_value`` is the forest's
+cover-weighted mean prediction (the training fraud rate the trees saw).
+
+Each root-to-leaf path is laid out once as a ``max_depth`` row of split
+features, thresholds and cover fractions, with repeated features merged into
+one player. Instead of recursing per row, all leaves with the same number of
+players are processed at once: the path polynomial is extended one player per
+step and unwound per player, each step a NumPy operation over
+``(rows, leaves)``, and the values are summed per (row, feature) with
+``bincount``. Attributions are reported against the raw ``FEATURE_COLS``,
+undoing the scaler's column permutation.
+"""
+from math import factorial
+
+import numpy as np
+
+from src.inference.forest_kernel import CompiledPipeline
+
+# Upper bound on the (rows x leaves x depth) float64 working set of one chunk.
+CHUNK_ELEMENTS = 1 << 22
+
+
+class PathExplainer:
+    def __init__(self, pipeline: CompiledPipeline, feature_cols):
+        self.scaler = pipeline.scaler
+        self.forest = pipeline.forest
+        self.feature_cols = list(feature_cols)
+        if len(self.feature_cols) != self.forest.n_features:
+            raise ValueError(f"Expected {self.forest.n_features} feature names, got {len(self.feature_cols)}")
+        if self.forest.cover is None:
+            raise ValueError("The compiled forest has no node cover; re-export it to explain its predictions")
+        self._build_paths()
+        self.base_value = float((self._leaf_value * self._zero.prod(axis=1)).sum() / self.forest.n_trees)
+
+    def _build_paths(self):
+        """Per leaf, the splits on its path (leaf first, padded to ``depth``),
+        the slot of each split's feature and the leaves grouped by players."""
+        forest = self.forest
+        cover = np.asarray(forest.cover, dtype=np.float64)
+        is_leaf = forest.is_leaf()
+        internal = np.flatnonzero(~is_leaf)
+        parent = np.full(forest.n_nodes, -1, dtype=np.int64)
+        parent[forest.children[internal, 0]] = internal
+        parent[forest.children[internal, 1]] = internal
+
+        leaves = np.flatnonzero(is_leaf)
+        depth = max(forest.max_depth, 1)
+        shape = (len(leaves), depth)
+        feature = np.zeros(shape, dtype=np.int64)
+        threshold = np.full(shape, np.inf)
+        right = np.zeros(shape, dtype=bool)
+        fraction = np.ones(shape)
+        valid = np.zeros(shape, dtype=bool)
+        node = leaves.astype(np.int64)
+        for k in range(depth):
+            up = parent[node]
+            has = np.flatnonzero(up >= 0)
+            split, child = up[has], node[has]
+            feature[has, k] = forest.feature[split]
+            threshold[has, k] = forest.threshold[split]
+            right[has, k] = forest.children[split, 1] == child
+            fraction[has, k] = cover[child] / cover[split]
+            valid[has, k] = True
+            node = np.where(up >= 0, up, node)
+
+        # A feature split on more than once is one player whose fractions are
+        # the products over its splits.
+        positions = np.arange(depth)
+        same = (feature[:, :, None] == feature[:, None, :]) & valid[:, :, None] & valid[:, None, :]
+        slot = np.where(valid, same.argmax(axis=2), positions)
+        zero = np.ones(shape)
+        rows = np.arange(len(leaves))
+        for k in range(depth):
+            zero[rows, slot[:, k]] *= fraction[:, k]
+
+        self._depth = depth
+        self._leaf_value = forest.value[leaves].astype(np.float64)
+        self._feature, self._threshold, self._right, self._valid, self._slot = feature, threshold, right, valid, slot
+        self._zero = zero
+
+        # Leaves grouped by their number of players d, players first: work per
+        # leaf is O(d^2), not O(max_depth^2).
+        player = valid & (slot == positions)
+        n_players = player.sum(axis=1)
+        players = np.argsort(~player, axis=1, kind="stable")
+        self._groups = []
+        for d in np.unique(n_players[n_players > 0]):
+            members = np.flatnonzero(n_players == d)
+            at = players[members, :d]
+            self._groups.append((
+                members,
+                at,
+                np.take_along_axis(feature[members], at, axis=1),
+                np.take_along_axis(zero[members], at, axis=1),
+                np.array([factorial(s) * factorial(d - 1 - s) / factorial(d) for s in range(d)]),
+            ))
+
+    def _contributions_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape[0], self.forest.n_features
+        n_leaves = len(self._leaf_value)
+
+        # One fraction: 1 when the row itself follows every split of the player.
+        follows = (X[:, self._feature] > self._threshold) == self._right
+        follows |= ~self._valid
+        one_all = np.ones((n_rows, n_leaves, self._depth), dtype=bool)
+        leaves = np.arange(n_leaves)
+        for k in range(self._depth):
+            one_all[:, leaves, self._slot[:, k]] &= follows[:, :, k]
+
+        row_base = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None, None]
+        totals = np.zeros(n_rows * n_features)
+        for members, at, feature, zero, weights in self._groups:
+            d = len(weights)
+            one = np.take_along_axis(one_all[:, members], at[None], axis=2).astype(np.float64)
+
+            # Coefficients of prod_j (zero_j + one_j * t), one player at a time.
+            poly = np.zeros((n_rows, len(members), d + 1))
+            poly[..., 0] = 1.0
+            for k in range(d):
+                extended = poly * zero[:, k, None]
+                extended[..., 1:] += poly[..., :-1] * one[:, :, k, None]
+                poly = extended
+            weighted = poly[..., :d] @ weights
+
+            phi = np.empty((n_rows, len(members), d))
+            value = self._leaf_value[members]
+            for i in range(d):
+                o, z = one[:, :, i], zero[:, i]
+                # sum_s weights[s] * coef_s(prod_{j != i}): with o == 1 divide
+                # (z + t) out from the top, with o == 0 just divide by z.
+                total = np.zeros((n_rows, len(members)))
+                coef = poly[..., d]
+                for s in range(d - 1, -1, -1):
+                    total += weights[s] * coef
+                    coef = poly[..., s] - z * coef
+                total = np.where(o > 0, total, weighted / z)
+                phi[..., i] = value * (o - z) * total
+            totals += np.bincount((row_base + feature).ravel(), weights=phi.ravel(), minlength=n_rows * n_features)
+        return totals.reshape(n_rows, n_features) / self.forest.n_trees
+
+    def contributions(self, X_raw: np.ndarray) -> np.ndarray:
+        """``(n_rows, n_features)`` contributions to the class-1 probability,
+        columns in ``feature_cols`` order."""
+        X = self.forest._prepare(self.scaler.transform(X_raw))
+        scaled = np.empty((X.shape[0], self.forest.n_features), dtype=np.float64)
+        chunk = max(1, CHUNK_ELEMENTS // (len(self._leaf_value) * (self._depth + 1)))
+        for start in range(0, X.shape[0], chunk):
+            scaled[start:start + chunk] = self._contributions_chunk(X[start:start + chunk])
+        # Scaled column j is raw column column_index[j].
+        out = np.empty_like(scaled)
+        out[:, self.scaler.column_index] = scaled
+        return out
+
+    def explain(self, X_raw: np.ndarray, top: int = 5) -> list:
+        """Per row, the ``top`` features pushing the probability up the most,
+        as ``{"feature", "value", "contribution"}`` dicts."""
+        X_raw = np.asarray(X_raw, dtype=np.float64).reshape(-1, len(self.feature_cols))
+        contributions = self.contributions(X_raw)
+        top = min(max(int(top), 1), contributions.shape[1])
+        order = np.argsort(-contributions, axis=1, kind="stable")[:, :top]
+        return [
+            [
+                {"feature": self.feature_cols[j], "value": float(X_raw[i, j]), "contribution": float(contributions[i, j])}
+                for j in order[i]
+            ]
+            for i in range(len(X_raw))
+        ]
@@ -0,0 +1,270 @@
+"""Pandas-free NumPy inference kernel for the fitted scaler + tree ensemble.
+
+``compile_scaler`` folds the fitted ``ColumnTransformer`` produced by
+``Scaler.get_scaler_object`` (median imputer + standard scaler on Time/Amount,
+passthrough for V1..V28) into a column permutation plus one affine vector.
+``compile_forest`` flattens every ``DecisionTreeClassifier`` of a fitted forest
+into packed node arrays that are traversed for all rows and trees at once.
+
+This module deliberately avoids ``src.logger``/``src.exception`` so the API can
+import it without reconfiguring logging; unsupported estimators raise
+``ValueError`` and callers fall back to the sklearn objects.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# Rows per traversal chunk; keeps the (rows x trees) node-index working set in cache.
+CHUNK_ROWS = 512
+
+
+@dataclass(frozen=True)
+class AffineScaler:
+    """``out = (where(isnan(X), fill, X)[:, column_index] - offset) / scale``."""
+
+    input_features: tuple
+    column_index: np.ndarray
+    fill: np.ndarray
+    offset: np.ndarray
+    scale: np.ndarray
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        X = X[:, self.column_index]
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.fill, X)
+        X -= self.offset
+        X /= self.scale
+        return X
+
+
+@dataclass(frozen=True)
+class CompiledForest:
+    """All trees of a binary forest packed into flat node arrays.
+
+    ``children`` is ``(n_nodes, 2)`` with the left child in column 0, so the
+    next node is ``children.ravel()[2 * node + (x > threshold)]``. Leaves point
+    to themselves with an infinite threshold, which makes traversal a fixed
+    ``max_depth`` loop with no per-row branching. ``value`` holds the class-1
+    probability of every node, internal nodes included, and ``cover`` the
+    weighted training samples that reached it (only explanations need it;
+    None for forests stored without it).
+    """
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    max_depth: int
+    n_features: int
+    classes: np.ndarray
+    cover: np.ndarray | None = None
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.children[:, 0]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.children[:, 1]
+
+    def is_leaf(self) -> np.ndarray:
+        return self.left == np.arange(self.n_nodes, dtype=self.children.dtype)
+
+    def _apply_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+        flat = X.ravel()
+        children = self.children.reshape(-1)
+        row_base = (np.arange(n_rows, dtype=np.int64) * self.n_features)[:, None]
+        node = np.broadcast_to(self.roots.astype(np.int64), (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            x = flat.take(row_base + self.feature.take(node))
+            node = children.take(2 * node + (x > self.threshold.take(node)))
+        return node
+
+    def _prepare(self, X: np.ndarray) -> np.ndarray:
+        # sklearn trees compare float32 inputs against their thresholds.
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf index reached in every tree, shape ``(n_rows, n_trees)``."""
+        X = self._prepare(X)
+        out = np.empty((X.shape[0], self.n_trees), dtype=np.int64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            out[start:start + CHUNK_ROWS] = self._apply_chunk(X[start:start + CHUNK_ROWS])
+        return out
+
+    def positive_proba(self, X: np.ndarray) -> np.ndarray:
+        X = self._prepare(X)
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaves = self._apply_chunk(X[start:start + CHUNK_ROWS])
+            out[start:start + CHUNK_ROWS] = self.value.take(leaves).mean(axis=1)
+        return out
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        p = self.positive_proba(X)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+
+@dataclass(frozen=True)
+class CompiledPipeline:
+    """Raw ``FEATURE_COLS`` rows in, class probabilities out."""
+
+    scaler: AffineScaler
+    forest: CompiledForest
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.forest.predict_proba(self.scaler.transform(X))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.forest.predict(self.scaler.transform(X))
+
+
+def _is_passthrough(transformer) -> bool:
+    from sklearn.preprocessing import FunctionTransformer
+
+    if isinstance(transformer, str):
+        return transformer == "passthrough"
+    return isinstance(transformer, FunctionTransformer) and transformer.func is None
+
+
+def compile_scaler(preprocessor, feature_cols) -> AffineScaler:
+    # sklearn is only needed to compile; serving a saved kernel never imports it.
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if not isinstance(preprocessor, ColumnTransformer):
+        raise ValueError(f"Unsupported preprocessor: {type(preprocessor).__name__}")
+    feature_cols = list(feature_cols)
+    fitted_features = list(getattr(preprocessor, "feature_names_in_", feature_cols))
+    if sorted(fitted_features) != sorted(feature_cols):
+        raise ValueError("Preprocessor was fitted on a different feature set")
+
+    column_index, fill, offset, scale = [], [], [], []
+    for _, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, str) and transformer == "drop" or not len(columns):
+            continue
+        columns = [fitted_features[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+        idx = [feature_cols.index(c) for c in columns]
+        n = len(idx)
+
+        if _is_passthrough(transformer):
+            col_fill, col_offset, col_scale = np.full(n, np.nan), np.zeros(n), np.ones(n)
+        elif isinstance(transformer, Pipeline):
+            col_fill, col_offset, col_scale = np.full(n, np.nan), np.zeros(n), np.ones(n)
+            for _, step in transformer.steps:
+                if isinstance(step, SimpleImputer):
+                    if step.strategy not in ("median", "mean", "constant", "most_frequent"):
+                        raise ValueError(f"Unsupported imputer strategy: {step.strategy}")
+                    col_fill = np.asarray(step.statistics_, dtype=np.float64)
+                elif isinstance(step, StandardScaler):
+                    if step.mean_ is not None:
+                        col_offset = np.asarray(step.mean_, dtype=np.float64)
+                    if step.scale_ is not None:
+                        col_scale = np.asarray(step.scale_, dtype=np.float64)
+                elif not _is_passthrough(step):
+                    raise ValueError(f"Unsupported pipeline step: {type(step).__name__}")
+        else:
+            raise ValueError(f"Unsupported transformer: {type(transformer).__name__}")
+
+        column_index.extend(idx)
+        fill.append(col_fill)
+        offset.append(col_offset)
+        scale.append(col_scale)
+
+    return AffineScaler(
+        input_features=tuple(feature_cols),
+        column_index=np.asarray(column_index, dtype=np.intp),
+        fill=np.concatenate(fill),
+        offset=np.concatenate(offset),
+        scale=np.concatenate(scale),
+    )
+
+
+def compile_forest(model) -> CompiledForest:
+    estimators = getattr(model, "estimators_", None)
+    classes = getattr(model, "classes_", None)
+    if not estimators or classes is None or len(classes) != 2:
+        raise ValueError(f"Unsupported model for compilation: {type(model).__name__}")
+
+    features, thresholds, children, values, covers, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for estimator in estimators:
+        tree = getattr(estimator, "tree_", None)
+        if tree is None or tree.n_outputs != 1 or tree.value.shape[2] != 2:
+            raise ValueError(f"Unsupported estimator for compilation: {type(estimator).__name__}")
+
+        n = tree.node_count
+        nodes = np.arange(n)
+        leaf = tree.children_left == -1
+        value = tree.value[:, 0, :]
+        totals = value.sum(axis=1)
+        totals[totals == 0] = 1.0
+
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        children.append(np.column_stack([
+            np.where(leaf, nodes, tree.children_left),
+            np.where(leaf, nodes, tree.children_right),
+        ]) + offset)
+        values.append(value[:, 1] / totals)
+        covers.append(tree.weighted_n_node_samples)
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    return CompiledForest(
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        children=np.ascontiguousarray(np.concatenate(children), dtype=np.int64),
+        value=np.concatenate(values).astype(np.float64),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        n_features=int(model.n_features_in_),
+        classes=np.asarray(classes),
+        cover=np.concatenate(covers).astype(np.float64),
+    )
+
+
+def compile_pipeline(preprocessor, model, feature_cols) -> CompiledPipeline:
+    return CompiledPipeline(scaler=compile_scaler(preprocessor, feature_cols), forest=compile_forest(model))
+
+
+def probe_rows(scaler: AffineScaler, n_rows: int = 256, seed: int = 0) -> np.ndarray:
+    """Synthetic raw rows spread around the fitted scaler statistics."""
+    rng = np.random.default_rng(seed)
+    scaled = rng.normal(0.0, 2.0, size=(n_rows, len(scaler.column_index)))
+    X = np.empty_like(scaled)
+    X[:, scaler.column_index] = scaled * scaler.scale + scaler.offset
+    return X
+
+
+def max_parity_error(compiled: CompiledPipeline, preprocessor, model, X_raw, feature_cols) -> float:
+    """Largest absolute gap between compiled and sklearn class-1 probabilities."""
+    import pandas as pd
+
+    expected = model.predict_proba(preprocessor.transform(pd.DataFrame(X_raw, columns=list(feature_cols))))[:, 1]
+    return float(np.max(np.abs(compiled.predict_proba(X_raw)[:, 1] - expected)))
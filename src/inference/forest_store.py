@@ -0,0 +1,221 @@
+"""Flat binary artifact for a ``CompiledPipeline`` that workers memory-map.
+
+``forest.bin`` holds the packed node arrays back to back (64-byte aligned);
+``forest.json`` next to it records dtypes, shapes and offsets plus the small
+affine scaler. ``load_compiled`` maps the file read-only, so every worker
+process serving the same artifact shares a single page-cache copy of the trees
+instead of unpickling its own.
+
+Export from the pickled artifacts with::
+
+    python -m src.inference.forest_store
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.inference.forest_kernel import AffineScaler, CompiledForest, CompiledPipeline
+from src.preprocessing.schema import FEATURE_COLS
+
+FORMAT_NAME = "fraudshield-forest"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+FOREST_ARRAYS = ("feature", "threshold", "children", "value", "roots")
+# Written when the forest has them; older files load with ``cover=None``.
+OPTIONAL_ARRAYS = ("cover",)
+FOREST_NAME = "forest.bin"
+COMPRESSED_NAME = "forest_compressed.bin"
+# Written into a published version: which of its forests shared-model workers map.
+SERVING_RECORD = "serving.json"
+
+
+def header_path(bin_path) -> Path:
+    return Path(bin_path).with_suffix(".json")
+
+
+def save_compiled(pipeline: CompiledPipeline, bin_path, model_sha256: str | None = None) -> Path:
+    """Write ``bin_path`` and its header. ``model_sha256`` names the
+    ``best_model.pkl`` the forest was compiled or compressed from."""
+    bin_path = Path(bin_path)
+    bin_path.parent.mkdir(parents=True, exist_ok=True)
+    forest, scaler = pipeline.forest, pipeline.scaler
+
+    layout, offset = {}, 0
+    tmp_path = bin_path.with_suffix(".bin.tmp")
+    with open(tmp_path, "wb") as f:
+        for name in FOREST_ARRAYS + OPTIONAL_ARRAYS:
+            if getattr(forest, name) is None:
+                continue
+            arr = np.ascontiguousarray(getattr(forest, name))
+            pad = -offset % ALIGNMENT
+            f.write(b"\0" * pad)
+            offset += pad
+            layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            f.write(arr.tobytes())
+            offset += arr.nbytes
+
+    header = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "max_depth": forest.max_depth,
+        "n_features": forest.n_features,
+        "classes": np.asarray(forest.classes).tolist(),
+        "model_sha256": model_sha256,
+        "arrays": layout,
+        "scaler": {
+            "input_features": list(scaler.input_features),
+            "column_index": scaler.column_index.tolist(),
+            # NaN fill (passthrough columns) is stored as null.
+            "fill": [None if np.isnan(v) else float(v) for v in scaler.fill],
+            "offset": scaler.offset.tolist(),
+            "scale": scaler.scale.tolist(),
+        },
+    }
+    tmp_header = header_path(bin_path).with_suffix(".json.tmp")
+    with open(tmp_header, "w") as f:
+        json.dump(header, f, indent=2)
+
+    os.replace(tmp_path, bin_path)
+    os.replace(tmp_header, header_path(bin_path))
+    return bin_path
+
+
+def read_header(bin_path) -> dict:
+    bin_path = Path(bin_path)
+    with open(header_path(bin_path)) as f:
+        header = json.load(f)
+    if header.get("format") != FORMAT_NAME or header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{bin_path} is not a {FORMAT_NAME} v{FORMAT_VERSION} artifact")
+    return header
+
+
+def load_compiled(bin_path, mmap: bool = True) -> CompiledPipeline:
+    bin_path = Path(bin_path)
+    header = read_header(bin_path)
+
+    if mmap:
+        buffer = np.memmap(bin_path, dtype=np.uint8, mode="r")
+    else:
+        buffer = np.fromfile(bin_path, dtype=np.uint8)
+
+    arrays = {}
+    for name in FOREST_ARRAYS + OPTIONAL_ARRAYS:
+        if name not in header["arrays"]:
+            continue
+        spec = header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = spec["offset"]
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    sc = header["scaler"]
+    scaler = AffineScaler(
+        input_features=tuple(sc["input_features"]),
+        column_index=np.asarray(sc["column_index"], dtype=np.intp),
+        fill=np.asarray([np.nan if v is None else v for v in sc["fill"]], dtype=np.float64),
+        offset=np.asarray(sc["offset"], dtype=np.float64),
+        scale=np.asarray(sc["scale"], dtype=np.float64),
+    )
+    forest = CompiledForest(
+        max_depth=header["max_depth"],
+        n_features=header["n_features"],
+        classes=np.asarray(header["classes"]),
+        **arrays,
+    )
+    return CompiledPipeline(scaler=scaler, forest=forest)
+
+
+def warm_page_cache(pipeline: CompiledPipeline) -> int:
+    """Touch every page of the mapped arrays; returns the bytes read."""
+    total = 0
+    for name in FOREST_ARRAYS:
+        arr = getattr(pipeline.forest, name)
+        np.bitwise_xor.reduce(arr.reshape(-1).view(np.uint8))
+        total += arr.nbytes
+    return total
+
+
+def export_from_pickles(artifacts_dir, bin_path=None, feature_cols=None) -> Path:
+    from src.inference.artifact_bundle import sha256_file
+    from src.inference.forest_kernel import compile_pipeline, max_parity_error, probe_rows
+    from src.utils.metrics import load_object
+
+    artifacts_dir = Path(artifacts_dir)
+    feature_cols = feature_cols or FEATURE_COLS
+    model = load_object(str(artifacts_dir / "best_model.pkl"))
+    preprocessor = load_object(str(artifacts_dir / "scaler.pkl"))
+    pipeline = compile_pipeline(preprocessor, model, feature_cols)
+    error = max_parity_error(pipeline, preprocessor, model, probe_rows(pipeline.scaler, 1024), feature_cols)
+    if error > 1e-9:
+        raise ValueError(f"Compiled forest disagrees with sklearn by {error:.3g}")
+    model_sha256 = sha256_file(artifacts_dir / "best_model.pkl")
+    return save_compiled(pipeline, bin_path or artifacts_dir / FOREST_NAME, model_sha256)
+
+
+def choose_served_forest(version_dir) -> str | None:
+    """Record in ``version_dir`` the forest its shared-model workers map: the
+    compressed one when it was compressed from this version's
+    ``best_model.pkl``, else the plain export. Returns the chosen file name."""
+    from src.inference.artifact_bundle import sha256_file
+
+    version_dir = Path(version_dir)
+    model_sha256 = sha256_file(version_dir / "best_model.pkl")
+    for name in (COMPRESSED_NAME, FOREST_NAME):
+        path = version_dir / name
+        if path.exists() and header_path(path).exists() and read_header(path).get("model_sha256") == model_sha256:
+            with open(version_dir / SERVING_RECORD, "w") as f:
+                json.dump({"forest": name, "model_sha256": model_sha256}, f, indent=2)
+            return name
+    return None
+
+
+def serving_path(source, version: str | None = None, override=None) -> Path:
+    """The forest shared-model serving maps for an artifact source.
+
+    A published version maps the forest its ``serving.json`` names (its
+    compressed forest when there is one), or its own ``forest.bin``; the flat
+    artifacts map ``override`` when one is given. The launcher and every worker
+    resolve the file through here, so the one that gets exported and warmed is
+    the one served.
+    """
+    if version:
+        record = Path(source) / SERVING_RECORD
+        if record.exists():
+            with open(record) as f:
+                return Path(source) / json.load(f)["forest"]
+        return Path(source) / FOREST_NAME
+    if not override:
+        return Path(source) / FOREST_NAME
+    return Path(override)
+
+
+def is_stale(bin_path, artifacts_dir) -> bool:
+    """True when ``bin_path`` is missing, older than the pickles or written
+    without node cover (before explanations needed it)."""
+    bin_path = Path(bin_path)
+    if not bin_path.exists() or not header_path(bin_path).exists():
+        return True
+    try:
+        if "cover" not in read_header(bin_path)["arrays"]:
+            return True
+    except ValueError:
+        return True
+    sources = [Path(artifacts_dir) / "best_model.pkl", Path(artifacts_dir) / "scaler.pkl"]
+    newest = max(p.stat().st_mtime for p in sources if p.exists())
+    return bin_path.stat().st_mtime < newest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the pickled model and scaler to forest.bin")
+    parser.add_argument("--artifacts", default=str(Path(__file__).resolve().parents[2] / "artifacts"))
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    path = export_from_pickles(args.artifacts, args.out)
+    print(f"Wrote {path} ({path.stat().st_size} bytes) and {header_path(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Bounded LRU + TTL cache of single-row predictions.
+
+Keys are a BLAKE2b digest of the model version, an optional client
+idempotency key and the row's float64 feature bytes, so gateway retries and
+re-scoring of the same transaction skip the forest entirely. The cache holds
+at most ``max_entries`` rows (roughly 200 bytes each) and must be cleared
+whenever the serving artifacts change.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class PredictionCache:
+    def __init__(self, max_entries: int = 100_000, ttl_s: float = 300.0, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(row: np.ndarray, model_version: str, idempotency_key: str | None = None) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(model_version.encode())
+        digest.update(b"\0")
+        if idempotency_key:
+            digest.update(idempotency_key.encode())
+        digest.update(b"\0")
+        # ``+ 0.0`` folds -0.0 into 0.0 so equal values always hash alike.
+        digest.update((np.asarray(row, dtype="<f8").ravel() + 0.0).tobytes())
+        return digest.digest()
+
+    def get(self, key: bytes):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, expires = entry
+            if expires < self._clock():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: bytes, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl_s)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats.invalidations += 1
+
+    def snapshot(self) -> dict:
+        s = self.stats
+        lookups = s.hits + s.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": s.hits,
+            "misses": s.misses,
+            "hit_rate": s.hits / lookups if lookups else 0.0,
+            "evictions": s.evictions,
+            "expirations": s.expirations,
+            "invalidations": s.invalidations,
+        }
@@ -0,0 +1,294 @@
+"""Off-path shadow scoring of a challenger model.
+
+The API hands every freshly scored matrix, with the champion's
+probabilities, to ``ShadowScorer.submit``. That call only appends to a
+bounded in-memory queue: when the queue already holds ``max_queued_rows``
+rows the submission is shed, so a slow challenger can never back-pressure
+``/predict``. A low-priority daemon thread polls the queue (``submit`` never
+wakes it, which would cost the caller a context switch), drains it in batches,
+scores them with the challenger and appends one NDJSON line per row to a
+size-rotated log. After each batch it sleeps long enough to stay within
+``duty_cycle`` of one core; whatever it cannot keep up with is shed.
+
+
+    {"ts": ..., "key": ..., "champion_version": ..., "champion_p": ..., "champion_label": ...,
+     "challenger_version": ..., "challenger_p": ..., "challenger_label": ...}
+
+``key`` is the client's ``Idempotency-Key`` when given, otherwise a hash of
+the features, so rows can be joined with chargeback labels later::
+
+    python -m src.inference.shadow artifacts/shadow/scores.ndjson --labels labels.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+
+@dataclass
+class ShadowStats:
+    submitted: int = 0
+    scored: int = 0
+    shed: int = 0
+    sampled_out: int = 0
+    failed: int = 0
+    batches: int = 0
+    total_score_s: float = 0.0
+    max_queued_rows: int = 0
+
+
+def row_key(row: np.ndarray) -> str:
+    # Same normalisation as the prediction cache: -0.0 and 0.0 hash alike.
+    return hashlib.blake2b((np.asarray(row, dtype="<f8").ravel() + 0.0).tobytes(), digest_size=8).hexdigest()
+
+
+class RotatingLog:
+    """Append-only text file rotated to ``path.1`` .. ``path.<backups>`` once it
+    would exceed ``max_bytes``."""
+
+    def __init__(self, path, max_bytes: int = 64 << 20, backups: int = 5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, text: str):
+        if self._file.tell() and self._file.tell() + len(text) > self.max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
+
+
+class ShadowScorer:
+    def __init__(
+        self,
+        score_fn,
+        log: RotatingLog,
+        challenger_version: str,
+        max_queued_rows: int = 10_000,
+        max_batch_rows: int = 1024,
+        sample_rate: float = 1.0,
+        duty_cycle: float = 0.25,
+        nice: int = 10,
+        poll_ms: float = 10.0,
+    ):
+        if max_queued_rows < 1 or max_batch_rows < 1:
+            raise ValueError("max_queued_rows and max_batch_rows must be >= 1")
+        if not 0.0 < duty_cycle <= 1.0:
+            raise ValueError("duty_cycle must be in (0, 1]")
+        self.score_fn = score_fn
+        self.log = log
+        self.challenger_version = challenger_version
+        self.max_queued_rows = max_queued_rows
+        self.max_batch_rows = max_batch_rows
+        self.sample_rate = sample_rate
+        self.duty_cycle = duty_cycle
+        self.nice = nice
+        self.poll_s = poll_ms / 1000.0
+        self.stats = ShadowStats()
+        self._queue = deque()
+        self._queued_rows = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def queued_rows(self) -> int:
+        return self._queued_rows
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Score what is already queued (within ``timeout``), then close the log.
+        Rows still queued after ``timeout`` are shed; a batch still being scored
+        is finished and the worker closes the log itself when it exits."""
+        self._stopping.set()
+        thread, self._thread = self._thread, None
+        if thread is None:
+            self.log.close()
+            return
+        thread.join(timeout)
+        if thread.is_alive():
+            with self._lock:
+                self.stats.shed += self._queued_rows
+                self._queue.clear()
+                self._queued_rows = 0
+
+    def submit(self, X: np.ndarray, champion_proba, champion_labels, champion_version: str, keys=None) -> bool:
+        """Queue rows already scored by the champion. Never blocks; returns False
+        when the rows were sampled out or shed."""
+        n = X.shape[0]
+        with self._lock:
+            self.stats.submitted += n
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                self.stats.sampled_out += n
+                return False
+            if self._stopping.is_set() or self._queued_rows + n > self.max_queued_rows:
+                self.stats.shed += n
+                return False
+            self._queue.append((X, champion_proba, champion_labels, keys, champion_version))
+            self._queued_rows += n
+            self.stats.max_queued_rows = max(self.stats.max_queued_rows, self._queued_rows)
+        return True
+
+    def _take(self):
+        while not self._queue:
+            if self._stopping.wait(self.poll_s):
+                break
+        with self._lock:
+            batch, rows = [], 0
+            while self._queue and (not batch or rows + self._queue[0][0].shape[0] <= self.max_batch_rows):
+                item = self._queue.popleft()
+                rows += item[0].shape[0]
+                batch.append(item)
+            self._queued_rows -= rows
+            return batch
+
+    def _run(self):
+        if self.nice:
+            try:
+                # Linux schedules threads individually; raise only this one's niceness.
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            except (AttributeError, OSError):
+                pass
+        try:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return
+                X = np.vstack([item[0] for item in batch])
+                started = time.perf_counter()
+                try:
+                    labels, proba = self.score_fn(X)
+                except Exception:
+                    self.stats.failed += X.shape[0]
+                    continue
+                self.stats.total_score_s += time.perf_counter() - started
+                self.stats.batches += 1
+                self.stats.scored += X.shape[0]
+                self.log.write(self._lines(batch, labels, proba))
+                if self.duty_cycle < 1.0:
+                    self._stopping.wait((time.perf_counter() - started) * (1.0 / self.duty_cycle - 1.0))
+        finally:
+            # Only the worker knows when its last write is done; ``stop`` may
+            # have given up waiting for it.
+            self.log.close()
+
+    def _lines(self, batch, labels, proba) -> str:
+        ts = time.time()
+        lines, offset = [], 0
+        for X, champion_proba, champion_labels, keys, champion_version in batch:
+            for i in range(X.shape[0]):
+                j = offset + i
+                lines.append(json.dumps({
+                    "ts": ts,
+                    "key": keys[i] if keys is not None and keys[i] else row_key(X[i]),
+                    "champion_version": champion_version,
+                    "champion_p": None if champion_proba is None else float(champion_proba[i]),
+                    "champion_label": int(champion_labels[i]),
+                    "challenger_version": self.challenger_version,
+                    "challenger_p": None if proba is None else float(proba[j]),
+                    "challenger_label": int(labels[j]),
+                }))
+            offset += X.shape[0]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        s = self.stats
+        return {
+            "challenger_version": self.challenger_version,
+            "log_path": str(self.log.path),
+            "sample_rate": self.sample_rate,
+            "duty_cycle": self.duty_cycle,
+            "max_queued_rows": self.max_queued_rows,
+            "queued_rows": self._queued_rows,
+            "peak_queued_rows": s.max_queued_rows,
+            "submitted": s.submitted,
+            "scored": s.scored,
+            "shed": s.shed,
+            "sampled_out": s.sampled_out,
+            "failed": s.failed,
+            "mean_batch_rows": s.scored / s.batches if s.batches else 0.0,
+            "mean_score_ms": s.total_score_s / s.batches * 1000.0 if s.batches else 0.0,
+        }
+
+
+def read_log(path):
+    """All rows of a shadow log, oldest rotated file first."""
+    import pandas as pd
+
+    path = Path(path)
+    files = sorted(path.parent.glob(f"{path.name}.*"), key=lambda p: -int(p.suffix[1:]))
+    frames = [pd.read_json(f, lines=True) for f in [*files, path] if f.exists() and f.stat().st_size]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def summarize(rows, labels=None) -> dict:
+    """Agreement between champion and challenger and, given a ``key -> label``
+    mapping, the ROC AUC of each on the labelled rows."""
+    from sklearn.metrics import roc_auc_score
+
+    if rows.empty:
+        return {"rows": 0}
+    summary = {
+        "rows": int(len(rows)),
+        "label_agreement": float((rows["champion_label"] == rows["challenger_label"]).mean()),
+        "champion_flagged_rate": float(rows["champion_label"].mean()),
+        "challenger_flagged_rate": float(rows["challenger_label"].mean()),
+    }
+    scored = rows.dropna(subset=["champion_p", "challenger_p"])
+    if len(scored):
+        diff = (scored["champion_p"] - scored["challenger_p"]).abs()
+        summary["mean_abs_probability_diff"] = float(diff.mean())
+        summary["p99_abs_probability_diff"] = float(diff.quantile(0.99))
+    if labels is not None:
+        labelled = scored[scored["key"].isin(labels.index)]
+        y = labels.loc[labelled["key"]].to_numpy()
+        summary["labelled_rows"] = int(len(labelled))
+        if len(np.unique(y)) == 2:
+            summary["champion_auc"] = float(roc_auc_score(y, labelled["champion_p"]))
+            summary["challenger_auc"] = float(roc_auc_score(y, labelled["challenger_p"]))
+    return summary
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Compare champion and challenger from a shadow log.")
+    parser.add_argument("log", help="shadow log path (rotated files next to it are included)")
+    parser.add_argument("--labels", help="CSV with 'key' and 'label' columns")
+    args = parser.parse_args()
+
+    rows = read_log(args.log)
+    labels = None
+    if args.labels:
+        frame = pd.read_csv(args.labels, dtype={"key": str})
+        labels = frame.drop_duplicates("key", keep="last").set_index("key")["label"]
+    print(json.dumps(summarize(rows, labels), indent=2))
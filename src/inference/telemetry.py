@@ -0,0 +1,273 @@
+"""Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Counters, gauges and histograms keep one child per label-value tuple; updates
+take a per-child lock and a ``bisect`` so they cost well under a microsecond
+and can stay on in production. ``Registry.render()`` produces the
+``text/plain; version=0.0.4`` exposition format served by ``/metrics``.
+Collectors registered with ``Registry.add_collector`` are called at scrape
+time for values owned elsewhere (e.g. the coalescer's stats).
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans microsecond kernel calls up to multi-second bulk batches.
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = tuple(float(1 << i) for i in range(0, 20, 2))
+
+# perf_counter() at the start of the current HTTP request, set by RequestMetricsMiddleware.
+request_started = ContextVar("request_started", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra="") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        # Raw label values -> child, so hot-path lookups skip the str() conversion.
+        self._lookup = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[n] for n in self.labelnames)
+        child = self._lookup.get(values)
+        if child is not None:
+            return child
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            self._lookup[values] = child
+        return child
+
+    def clear(self):
+        """Drop every labelled series (e.g. the previous model's info labels)."""
+        with self._lock:
+            self._children.clear()
+            self._lookup.clear()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """``(suffix, label string, value)`` for every exposed series."""
+        raise NotImplementedError
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+
+class _ValueChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def samples(self):
+        for key, child in sorted(self._children.items()):
+            yield "", _format_labels(self.labelnames, key), child.value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self._default.set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value, count=1):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += count
+            self.sum += value * count
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value, count=1):
+        self._default.observe(value, count)
+
+    def samples(self):
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), total
+            yield "_count", _format_labels(self.labelnames, key), cumulative
+
+
+class WindowedRate:
+    """Share of positive rows among roughly the last ``window`` rows.
+
+    Rows are counted into ``n_blocks`` fixed-size blocks and the oldest block
+    is dropped as a new one fills, so an update is two integer additions
+    regardless of batch size.
+    """
+
+    def __init__(self, window: int = 10_000, n_blocks: int = 10):
+        self.block_rows = max(1, window // n_blocks)
+        self._blocks = deque(maxlen=n_blocks)
+        self._rows = 0
+        self._positives = 0
+        self._lock = threading.Lock()
+
+    def update(self, rows: int, positives: int) -> None:
+        with self._lock:
+            self._rows += rows
+            self._positives += positives
+            if self._rows >= self.block_rows:
+                self._blocks.append((self._rows, self._positives))
+                self._rows = self._positives = 0
+
+    @property
+    def value(self) -> float:
+        with self._lock:
+            rows = self._rows + sum(r for r, _ in self._blocks)
+            positives = self._positives + sum(p for _, p in self._blocks)
+        return positives / rows if rows else 0.0
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect):
+        """``collect()`` returns an iterable of metrics built fresh at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware counting HTTP requests and their end-to-end latency
+    by route and status; unknown paths share the ``other`` label to bound
+    cardinality. Also publishes the request start time in ``request_started``
+    so handlers can attribute time spent before they run (body read + parsing
+    + validation)."""
+
+    def __init__(self, app, requests: Counter, duration: Histogram, paths=()):
+        self.app = app
+        self.requests = requests
+        self.duration = duration
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = request_started.set(started)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_started.reset(token)
+            path = scope["path"] if scope["path"] in self.paths else "other"
+            self.requests.labels(path, status[0]).inc()
+            self.duration.labels(path).observe(time.perf_counter() - started)
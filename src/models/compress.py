@@ -0,0 +1,303 @@
+"""Post-training compression of a compiled forest.
+
+Works on the flat ``CompiledForest`` arrays rather than the sklearn objects:
+
+1. merge sibling leaves with identical values into their parent (lossless),
+2. cap tree depth, turning nodes at the cap into leaves that predict the
+   node's own class-1 probability,
+3. keep the smallest greedy (forward ensemble selection) subset of trees,
+4. store thresholds and values as float32; thresholds are rounded down, so
+   ``x > threshold`` is unchanged for every float32 input.
+
+Steps 2 and 3 stop as soon as validation ROC AUC would drop more than
+``auc_tolerance`` below the uncompressed forest; the validation rows are the
+slice of train the threshold is tuned on, so the test split stays for reporting. The result is written with
+``forest_store.save_compiled``; shared-model workers serve it from every
+version published with it, or from ``FRAUDSHIELD_FOREST_PATH``.
+"""
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass, asdict
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+from src.exception import CustomException
+from src.logger import logging
+from src.inference.forest_kernel import CompiledForest, CompiledPipeline, compile_forest, compile_scaler
+from src.inference.artifact_bundle import sha256_file
+from src.inference.forest_store import save_compiled
+from src.models.evaluate import batch_throughput, latency_profile
+from src.preprocessing.schema import input_columns
+from src.utils.metrics import load_object
+
+
+@dataclass
+class ForestCompressionConfig:
+    model_path: str = os.path.join("artifacts", "best_model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "scaler.pkl")
+    forest_path: str = os.path.join("artifacts", "forest_compressed.bin")
+    report_path: str = os.path.join("artifacts", "compression_report.json")
+    # Largest allowed drop in validation ROC AUC versus the uncompressed forest.
+    auc_tolerance: float = 0.001
+    min_trees: int = 10
+    min_depth: int = 4
+    float32: bool = True
+    latency_rows: int = 200
+    throughput_rows: int = 10_000
+
+
+def forest_nbytes(forest: CompiledForest) -> int:
+    return sum(getattr(forest, name).nbytes for name in ("feature", "threshold", "children", "value", "roots"))
+
+
+def node_depths(forest: CompiledForest) -> np.ndarray:
+    """Depth of every node reachable from a root; unreachable nodes get -1."""
+    depth = np.full(forest.n_nodes, -1, dtype=np.int64)
+    frontier, level = forest.roots.astype(np.int64), 0
+    while frontier.size:
+        depth[frontier] = level
+        internal = frontier[forest.children[frontier, 0] != frontier]
+        frontier = forest.children[internal].reshape(-1)
+        level += 1
+    return depth
+
+
+def compact(forest: CompiledForest, roots=None) -> CompiledForest:
+    """Drop nodes unreachable from ``roots`` (default: every root) and renumber."""
+    roots = forest.roots if roots is None else np.asarray(roots)
+    subset = forest if roots is forest.roots else CompiledForest(
+        **{**_fields(forest), "roots": np.asarray(roots, dtype=np.int32)}
+    )
+    depth = node_depths(subset)
+    keep = np.flatnonzero(depth >= 0)
+    new_index = np.full(forest.n_nodes, -1, dtype=np.int64)
+    new_index[keep] = np.arange(len(keep))
+    return CompiledForest(
+        feature=np.ascontiguousarray(forest.feature[keep]),
+        threshold=np.ascontiguousarray(forest.threshold[keep]),
+        children=np.ascontiguousarray(new_index[forest.children[keep]]),
+        value=np.ascontiguousarray(forest.value[keep]),
+        roots=new_index[roots].astype(np.int32),
+        max_depth=int(depth.max()) if len(keep) else 0,
+        n_features=forest.n_features,
+        classes=forest.classes,
+        cover=None if forest.cover is None else np.ascontiguousarray(forest.cover[keep]),
+    )
+
+
+def _fields(forest: CompiledForest) -> dict:
+    return {name: getattr(forest, name) for name in CompiledForest.__dataclass_fields__}
+
+
+def _make_leaves(fields: dict, nodes: np.ndarray) -> None:
+    fields["children"][nodes] = nodes[:, None]
+    fields["threshold"][nodes] = np.inf
+    fields["feature"][nodes] = 0
+
+
+def merge_identical_leaves(forest: CompiledForest) -> CompiledForest:
+    """Collapse splits whose two children are leaves with the same value, bottom-up."""
+    fields = {**_fields(forest), **{k: getattr(forest, k).copy() for k in ("feature", "threshold", "children", "value")}}
+    nodes = np.arange(forest.n_nodes)
+    while True:
+        children = fields["children"]
+        leaf = children[:, 0] == nodes
+        left, right = children[:, 0], children[:, 1]
+        mergeable = np.flatnonzero(
+            ~leaf & leaf[left] & leaf[right] & (fields["value"][left] == fields["value"][right])
+        )
+        if not mergeable.size:
+            break
+        fields["value"][mergeable] = fields["value"][left[mergeable]]
+        _make_leaves(fields, mergeable)
+    return compact(CompiledForest(**fields))
+
+
+def cap_depth(forest: CompiledForest, max_depth: int) -> CompiledForest:
+    fields = {**_fields(forest), **{k: getattr(forest, k).copy() for k in ("feature", "threshold", "children")}}
+    depth = node_depths(forest)
+    _make_leaves(fields, np.flatnonzero(depth == max_depth))
+    return merge_identical_leaves(CompiledForest(**fields))
+
+
+def to_float32(forest: CompiledForest) -> CompiledForest:
+    threshold = forest.threshold.astype(np.float32)
+    # Round down so that x > t32 <=> x > t64 for every float32 x.
+    above = threshold.astype(np.float64) > forest.threshold
+    threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+    return CompiledForest(**{
+        **_fields(forest),
+        "threshold": threshold,
+        "value": forest.value.astype(np.float32),
+        "cover": None if forest.cover is None else forest.cover.astype(np.float32),
+    })
+
+
+def tree_probabilities(forest: CompiledForest, X: np.ndarray) -> np.ndarray:
+    """Class-1 probability of every tree, shape ``(n_rows, n_trees)``."""
+    return forest.value.take(forest.apply(X)).astype(np.float64)
+
+
+def greedy_tree_order(per_tree: np.ndarray, y: np.ndarray, floor: float, min_trees: int = 1):
+    """Forward ensemble selection: repeatedly add the tree that maximises the
+    running ensemble's AUC, stopping at the first subset of at least
+    ``min_trees`` trees that reaches ``floor``. Returns ``(tree ids, auc)``."""
+    n_trees = per_tree.shape[1]
+    chosen, remaining = [], list(range(n_trees))
+    total = np.zeros(per_tree.shape[0])
+    auc = -1.0
+    while remaining:
+        scores = [roc_auc_score(y, total + per_tree[:, j]) for j in remaining]
+        best = int(np.argmax(scores))
+        auc = scores[best]
+        tree = remaining.pop(best)
+        chosen.append(tree)
+        total += per_tree[:, tree]
+        if len(chosen) >= min_trees and auc >= floor:
+            break
+    return chosen, auc
+
+
+def forest_auc(forest: CompiledForest, X: np.ndarray, y: np.ndarray) -> float:
+    return float(roc_auc_score(y, forest.positive_proba(X)))
+
+
+def compress_forest(forest: CompiledForest, X: np.ndarray, y: np.ndarray, config: ForestCompressionConfig):
+    """Returns ``(compressed forest, step log)``; every kept step stays within tolerance."""
+    baseline = forest_auc(forest, X, y)
+    floor = baseline - config.auc_tolerance
+    steps = [{"step": "baseline", "auc": baseline, "trees": forest.n_trees, "nodes": forest.n_nodes,
+              "max_depth": forest.max_depth}]
+
+    def record(step, candidate, auc):
+        steps.append({"step": step, "auc": auc, "trees": candidate.n_trees, "nodes": candidate.n_nodes,
+                      "max_depth": candidate.max_depth})
+
+    best = merge_identical_leaves(forest)
+    record("merge_leaves", best, forest_auc(best, X, y))
+
+    for depth in range(best.max_depth - 1, config.min_depth - 1, -1):
+        candidate = cap_depth(best, depth)
+        auc = forest_auc(candidate, X, y)
+        if auc < floor:
+            break
+        best = candidate
+        record(f"cap_depth_{depth}", best, auc)
+
+    if best.n_trees > config.min_trees:
+        chosen, auc = greedy_tree_order(tree_probabilities(best, X), y, floor, config.min_trees)
+        if auc >= floor and len(chosen) < best.n_trees:
+            best = compact(best, roots=best.roots[sorted(chosen)])
+            record(f"select_{len(chosen)}_trees", best, forest_auc(best, X, y))
+
+    if config.float32:
+        candidate = to_float32(best)
+        auc = forest_auc(candidate, X, y)
+        if auc >= floor:
+            best = candidate
+            record("float32", best, auc)
+
+    return best, steps
+
+
+def _cost(forest: CompiledForest, X: np.ndarray, config: ForestCompressionConfig) -> dict:
+    p50, p99 = latency_profile(forest.positive_proba, X, config.latency_rows)
+    return {
+        "trees": forest.n_trees,
+        "nodes": forest.n_nodes,
+        "max_depth": forest.max_depth,
+        "bytes": forest_nbytes(forest),
+        "p50_ms": p50,
+        "p99_ms": p99,
+        "rows_per_s": batch_throughput(forest.positive_proba, X, config.throughput_rows),
+    }
+
+
+class ForestCompression:
+    def __init__(self):
+        self.compression_config = ForestCompressionConfig()
+
+    def initiate_forest_compression(self, val_arr, test_arr=None):
+        """Compress the saved best model against the scaled validation rows; the
+        report adds the test ROC AUC before and after when ``test_arr`` is given.
+
+        Returns the compressed artifact path, or None when the best model is
+        not a forest the kernel can compile.
+        """
+        try:
+            config = self.compression_config
+            model_path = os.path.abspath(config.model_path)
+            model = load_object(model_path)
+            try:
+                forest = compile_forest(model)
+            except ValueError as e:
+                logging.info(f"Skipping forest compression: {e}")
+                return None
+
+            preprocessor = load_object(os.path.abspath(config.preprocessor_path))
+            scaler = compile_scaler(preprocessor, input_columns(preprocessor))
+            X, y = np.asarray(val_arr[:, :-1]), np.asarray(val_arr[:, -1])
+
+            start = time.perf_counter()
+            compressed, steps = compress_forest(forest, X, y, config)
+            elapsed = time.perf_counter() - start
+
+            before, after = _cost(forest, X, config), _cost(compressed, X, config)
+            before["auc"], after["auc"] = steps[0]["auc"], steps[-1]["auc"]
+            path = save_compiled(
+                CompiledPipeline(scaler=scaler, forest=compressed), config.forest_path, sha256_file(model_path)
+            )
+
+            report = {
+                "artifact": str(path),
+                "compress_s": elapsed,
+                "before": before,
+                "after": after,
+                "auc_delta": after["auc"] - before["auc"],
+                "p99_speedup": before["p99_ms"] / max(after["p99_ms"], 1e-9),
+                "size_ratio": after["bytes"] / before["bytes"],
+                "steps": steps,
+                "config": asdict(config),
+            }
+            if test_arr is not None:
+                X_test, y_test = np.asarray(test_arr[:, :-1]), np.asarray(test_arr[:, -1])
+                report["test_auc"] = {
+                    "before": forest_auc(forest, X_test, y_test),
+                    "after": forest_auc(compressed, X_test, y_test),
+                }
+            os.makedirs(os.path.dirname(config.report_path), exist_ok=True)
+            with open(config.report_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+            logging.info(
+                f"Compressed forest: {before['trees']} -> {after['trees']} trees, "
+                f"{before['nodes']} -> {after['nodes']} nodes, depth {before['max_depth']} -> {after['max_depth']}, "
+                f"{before['bytes'] / 1e6:.2f} -> {after['bytes'] / 1e6:.2f} MB, "
+                f"p99 {before['p99_ms']:.3f} -> {after['p99_ms']:.3f} ms, AUC delta {report['auc_delta']:+.5f}"
+            )
+            return str(path)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    from src.models.evaluate import ModelEvaluationConfig
+    from src.models.resample import take_rows
+    from src.models.search import holdout_split
+    from src.models.threshold import DecisionPolicyConfig
+    from src.preprocessing.feature_builder import DataIngestionConfig
+    from src.preprocessing.scaler import ScalerConfig
+    from src.utils.data_store import read_array, table_path
+
+    data_format = DataIngestionConfig().data_format
+    train_arr, _ = read_array(table_path(ScalerConfig().train_array_path, data_format))
+    test_arr, _ = read_array(table_path(ScalerConfig().test_array_path, data_format))
+    # The same validation rows the training pipeline held out.
+    _, val_idx = holdout_split(
+        train_arr[:, -1], DecisionPolicyConfig().validation_size, ModelEvaluationConfig().random_state
+    )
+    print(ForestCompression().initiate_forest_compression(take_rows(train_arr, val_idx), test_arr))
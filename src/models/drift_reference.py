@@ -0,0 +1,76 @@
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.inference.drift import build_reference, save_reference
+from src.inference.forest_kernel import compile_scaler
+from src.preprocessing.schema import FEATURE_COLS, input_columns
+from src.utils.metrics import load_object
+
+
+@dataclass
+class DriftReferenceConfig:
+    model_path: str = os.path.join("artifacts", "best_model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "scaler.pkl")
+    reference_path: str = os.path.join("artifacts", "drift_reference.json")
+    n_bins: int = 10
+    # Quantiles of a random sample of this many training rows are plenty.
+    max_rows: int = 500_000
+    random_state: int = 42
+
+
+def unscale(X_scaled: np.ndarray, preprocessor, feature_cols=FEATURE_COLS) -> np.ndarray:
+    """Raw ``feature_cols`` rows back from the affine scaler's output."""
+    affine = compile_scaler(preprocessor, feature_cols)
+    X = np.empty((len(X_scaled), len(feature_cols)), dtype=np.float64)
+    X[:, affine.column_index] = np.asarray(X_scaled, dtype=np.float64) * affine.scale + affine.offset
+    return X
+
+
+class DriftReference:
+    """Stores the binned distribution of the raw training features and of the
+    model's held-out fraud probabilities as ``drift_reference.json``, the
+    baseline the API's drift monitor compares live traffic with."""
+
+    def __init__(self):
+        self.drift_reference_config = DriftReferenceConfig()
+
+    def initiate_drift_reference(self, train_arr, test_arr):
+        try:
+            config = self.drift_reference_config
+            preprocessor = load_object(os.path.abspath(config.preprocessor_path))
+            model = load_object(os.path.abspath(config.model_path))
+
+            rows = len(train_arr)
+            if rows > config.max_rows:
+                pick = np.sort(np.random.default_rng(config.random_state).choice(rows, config.max_rows, replace=False))
+                train_arr = train_arr[pick]
+            columns = input_columns(preprocessor)
+            X_train = unscale(train_arr[:, :-1], preprocessor, columns)
+            # The API monitors probabilities; models without them get feature bins only.
+            scores = None
+            if hasattr(model, "predict_proba") and len(test_arr):
+                scores = model.predict_proba(np.asarray(test_arr[:, :-1]))[:, 1]
+
+            reference = build_reference(
+                X_train,
+                columns,
+                scores,
+                config.n_bins,
+                model=type(model).__name__,
+                training_rows=int(rows),
+                score_rows=0 if scores is None else int(len(scores)),
+            )
+            path = save_reference(reference, config.reference_path)
+            logging.info(
+                f"Drift reference of {len(X_train)} training rows and "
+                f"{0 if scores is None else len(scores)} scores saved to {path}"
+            )
+            return path
+
+        except Exception as e:
+            raise CustomException(e, sys)
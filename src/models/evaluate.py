@@ -0,0 +1,480 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import pickle
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.metrics import save_object
+
+FULL_FIT = -1
+
+
+def get_candidate_models(random_state=42, n_estimators=100):
+    """Candidates from notebooks/model.ipynb (``models_fast``)."""
+    from sklearn.linear_model import LogisticRegression
+    from imblearn.ensemble import BalancedRandomForestClassifier
+    from xgboost import XGBClassifier
+    from lightgbm import LGBMClassifier
+
+    return {
+        "LogisticRegression": LogisticRegression(
+            class_weight="balanced",
+            max_iter=500,
+            random_state=random_state
+        ),
+        "BalancedRandomForest": BalancedRandomForestClassifier(
+            n_estimators=n_estimators,
+            n_jobs=-1,
+            random_state=random_state
+        ),
+        "XGBoost": XGBClassifier(
+            n_estimators=n_estimators,
+            max_depth=5,
+            learning_rate=0.1,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            scale_pos_weight=580,
+            eval_metric="auc",
+            random_state=random_state
+        ),
+        "LightGBM": LGBMClassifier(
+            n_estimators=n_estimators,
+            learning_rate=0.1,
+            class_weight="balanced",
+            random_state=random_state,
+            verbose=-1
+        ),
+    }
+
+
+@dataclass
+class ModelEvaluationConfig:
+    best_model_path: str = os.path.join("artifacts", "best_model.pkl")
+    report_path: str = os.path.join("artifacts", "model_evaluation.json")
+    cache_dir: str = os.path.join("artifacts", "model_cache")
+    # Total cores for the evaluation; each task gets one, candidates run single-threaded.
+    n_jobs: int = max(1, (os.cpu_count() or 1))
+    cv_folds: int = 3
+    random_state: int = 42
+    use_cache: bool = True
+    # Least recently used fits are deleted once the cache exceeds this; None keeps everything.
+    cache_max_mb: float = 2_048.0
+    # Inference-cost measurement on the held-out split.
+    latency_rows: int = 200
+    throughput_rows: int = 10_000
+    # Serving SLOs; None disables a limit. Latency is the single-row p99 of the
+    # path the API would serve (compiled kernel for forests, else the estimator).
+    max_p99_latency_ms: float = None
+    max_loaded_memory_mb: float = None
+    max_model_size_mb: float = None
+    # "halving" or "hyperband" tunes the candidates on the train split first
+    # (src.models.search); None evaluates them as configured.
+    search: str = None
+    search_time_budget_s: float = 3_600.0
+
+
+@dataclass
+class TaskResult:
+    name: str
+    fold: int
+    score: float = -1.0
+    fit_s: float = 0.0
+    predict_s: float = 0.0
+    cached: bool = False
+    error: str = None
+    model: object = field(default=None, repr=False)
+
+
+def positive_scores(model, X):
+    if hasattr(model, "predict_proba"):
+        return model.predict_proba(X)[:, 1]
+    return model.decision_function(X)
+
+
+def hash_arrays(*arrays):
+    digest = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        digest.update(str((arr.shape, arr.dtype.str)).encode())
+        flat = arr.reshape(-1).view(np.uint8)
+        step = 1 << 26
+        for start in range(0, flat.size, step):
+            digest.update(flat[start:start + step])
+    return digest.hexdigest()
+
+
+def model_signature(model):
+    params = model.get_params(deep=True)
+    return f"{type(model).__module__}.{type(model).__name__}:" + repr(sorted((k, repr(v)) for k, v in params.items()))
+
+
+def _single_threaded(model):
+    params = model.get_params()
+    updates = {k: 1 for k in ("n_jobs", "thread_count") if k in params}
+    if type(model).__module__.startswith("sklearn.linear_model"):
+        # n_jobs is a deprecated no-op on sklearn's linear models.
+        updates.pop("n_jobs", None)
+    return clone(model).set_params(**updates) if updates else clone(model)
+
+
+def _run_task(name, model, fold, X, y, train_idx, eval_idx, X_eval, y_eval, resampling=None):
+    """Fit on one fold (or the full train split when ``eval_idx`` is None) and score.
+    A fold's training rows are rebalanced with ``resampling``; its scored rows never are."""
+    result = TaskResult(name=name, fold=fold)
+    try:
+        if train_idx is not None:
+            X_fit, y_fit = X[train_idx], y[train_idx]
+            X_eval, y_eval = X[eval_idx], y[eval_idx]
+            if resampling is not None:
+                rows = resampling.resample_rows(np.column_stack([X_fit, y_fit]))
+                X_fit, y_fit = rows[:, :-1], rows[:, -1]
+        else:
+            X_fit, y_fit = X, y
+
+        start = time.perf_counter()
+        model.fit(X_fit, y_fit)
+        result.fit_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores = positive_scores(model, X_eval)
+        result.predict_s = time.perf_counter() - start
+
+        result.score = float(roc_auc_score(y_eval, scores))
+        if fold == FULL_FIT:
+            result.model = model
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def latency_profile(score_fn, X, n_rows):
+    """Single-row p50/p99 (ms) over the first ``n_rows`` rows of ``X``."""
+    rows = [X[i:i + 1] for i in range(min(n_rows, len(X)))]
+    for row in rows[:10]:
+        score_fn(row)
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        score_fn(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def batch_throughput(score_fn, X, n_rows):
+    batch = X[:n_rows]
+    start = time.perf_counter()
+    score_fn(batch)
+    return len(batch) / max(time.perf_counter() - start, 1e-9)
+
+
+def measure_inference_cost(model, X, latency_rows=200, throughput_rows=10_000):
+    """Serialized size, loaded memory, single-row latency and batch throughput.
+
+    ``loaded_memory_mb`` is what ``pickle.loads`` leaves allocated according to
+    tracemalloc. sklearn trees and native boosters keep their nodes in buffers
+    tracemalloc cannot see, so the serialized size is used as a floor. Forests that
+    the API can compile are also timed on ``CompiledForest``, and that becomes
+    the ``serving`` path.
+    """
+    X = np.ascontiguousarray(X)
+    blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    loaded = pickle.loads(blob)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    if not was_tracing:
+        tracemalloc.stop()
+    del loaded
+
+    score_fn = lambda rows: positive_scores(model, rows)  # noqa: E731
+    p50, p99 = latency_profile(score_fn, X, latency_rows)
+    cost = {
+        "serialized_mb": len(blob) / 1e6,
+        "loaded_memory_mb": max(retained, len(blob)) / 1e6,
+        "estimator_p50_ms": p50,
+        "estimator_p99_ms": p99,
+        "estimator_rows_per_s": batch_throughput(score_fn, X, throughput_rows),
+        "serving": "estimator",
+    }
+
+    try:
+        from src.inference.forest_kernel import compile_forest
+        forest = compile_forest(model)
+    except ValueError:
+        forest = None
+    if forest is not None:
+        p50, p99 = latency_profile(forest.positive_proba, X, latency_rows)
+        cost.update({
+            "kernel_p50_ms": p50,
+            "kernel_p99_ms": p99,
+            "kernel_rows_per_s": batch_throughput(forest.positive_proba, X, throughput_rows),
+            "serving": "kernel",
+        })
+
+    serving = cost["serving"]
+    cost["p50_ms"] = cost[f"{serving}_p50_ms"]
+    cost["p99_ms"] = cost[f"{serving}_p99_ms"]
+    cost["rows_per_s"] = cost[f"{serving}_rows_per_s"]
+    return cost
+
+
+def slo_violations(cost, config):
+    """Human-readable reasons ``cost`` misses the configured SLOs (empty if it meets them)."""
+    checks = (
+        ("p99_ms", config.max_p99_latency_ms, "p99 latency {:.2f} ms > {} ms"),
+        ("loaded_memory_mb", config.max_loaded_memory_mb, "loaded memory {:.1f} MB > {} MB"),
+        ("serialized_mb", config.max_model_size_mb, "model size {:.1f} MB > {} MB"),
+    )
+    return [message.format(cost[key], limit) for key, limit, message in checks
+            if limit is not None and cost[key] > limit]
+
+
+class ModelEvaluation:
+    """Fits every candidate on every CV fold plus the full train split in a
+    process pool, caches each fitted task on disk keyed by data + hyperparameter
+    hash, measures each fitted candidate's inference cost, and keeps the best
+    held-out ROC AUC among candidates that meet the serving SLOs."""
+
+    def __init__(self, models=None, search: str = None, resampling=None):
+        self.model_evaluation_config = ModelEvaluationConfig()
+        self.models = models
+        # A src.models.resample.Resampling; None (or class_weight) fits the rows as they are.
+        self.resampling = resampling
+        if search:
+            self.model_evaluation_config.search = search
+
+    def _cache_path(self, key):
+        return os.path.join(self.model_evaluation_config.cache_dir, f"{key}.pkl")
+
+    def _load_cached(self, key):
+        path = self._cache_path(key)
+        if not self.model_evaluation_config.use_cache or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            result.cached = True
+            # Mark the entry as recently used for pruning.
+            os.utime(path)
+            return result
+        except Exception as e:
+            logging.info(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def _store_cached(self, key, result):
+        if not self.model_evaluation_config.use_cache or result.error:
+            return
+        os.makedirs(self.model_evaluation_config.cache_dir, exist_ok=True)
+        tmp = self._cache_path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(result, f)
+        os.replace(tmp, self._cache_path(key))
+
+    def _prune_cache(self, keep):
+        """Delete the least recently used entries until the cache fits in
+        ``cache_max_mb``; entries in ``keep`` (this run's tasks) are never deleted."""
+        config = self.model_evaluation_config
+        if not config.use_cache or config.cache_max_mb is None or not os.path.isdir(config.cache_dir):
+            return
+        entries = []
+        for name in os.listdir(config.cache_dir):
+            path = os.path.join(config.cache_dir, name)
+            if name.endswith(".pkl") and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        limit = config.cache_max_mb * 1e6
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            if os.path.basename(path)[:-len(".pkl")] in keep:
+                continue
+            os.remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            logging.info(f"Pruned {removed} model cache entries; {total / 1e6:.1f} MB left in {config.cache_dir}")
+
+    def evaluate(self, X_train, y_train, X_test, y_test, models, resampling=None, fit_arr=None):
+        """Returns ``{name: summary}`` and ``{name: fitted model}`` for every candidate.
+
+        The returned models are fitted on ``fit_arr`` (the rebalanced train split,
+        target last) when given; CV folds are cut from the original train rows
+        and only their training part is rebalanced with ``resampling``.
+        """
+        config = self.model_evaluation_config
+        y_train = np.asarray(y_train)
+        y_test = np.asarray(y_test)
+        data_key = hash_arrays(X_train, y_train, X_test, y_test)
+        if resampling is not None:
+            data_key += "|" + json.dumps(asdict(resampling.resampling_config), sort_keys=True)
+        X_full, y_full = (X_train, y_train) if fit_arr is None else (fit_arr[:, :-1], np.asarray(fit_arr[:, -1]))
+
+        folds = []
+        if config.cv_folds and config.cv_folds > 1:
+            splitter = StratifiedKFold(n_splits=config.cv_folds, shuffle=True, random_state=config.random_state)
+            folds = list(splitter.split(np.zeros(len(y_train)), y_train))
+
+        results, pending, keys = [], [], set()
+        for name, model in models.items():
+            signature = model_signature(model)
+            for fold in [FULL_FIT, *range(len(folds))]:
+                key = hashlib.sha256(
+                    f"{data_key}|{signature}|{fold}|{config.cv_folds}|{config.random_state}".encode()
+                ).hexdigest()
+                keys.add(key)
+                cached = self._load_cached(key)
+                if cached is not None:
+                    results.append(cached)
+                    continue
+                train_idx, eval_idx = folds[fold] if fold != FULL_FIT else (None, None)
+                pending.append((key, name, model, fold, train_idx, eval_idx))
+
+        logging.info(
+            f"Model evaluation: {len(models)} candidates, {len(folds)} folds, "
+            f"{len(results)} cached tasks, {len(pending)} to fit on {config.n_jobs} cores"
+        )
+
+        fitted = Parallel(n_jobs=config.n_jobs, backend="loky")(
+            delayed(_run_task)(
+                name, _single_threaded(model), fold,
+                *((X_full, y_full) if fold == FULL_FIT else (X_train, y_train)),
+                train_idx, eval_idx, X_test, y_test, resampling
+            )
+            for _, name, model, fold, train_idx, eval_idx in pending
+        ) if pending else []
+
+        for (key, *_), result in zip(pending, fitted):
+            self._store_cached(key, result)
+            results.append(result)
+        self._prune_cache(keys)
+
+        report, trained_models = {}, {}
+        for name, model in models.items():
+            own = [r for r in results if r.name == name]
+            full = next(r for r in own if r.fold == FULL_FIT)
+            cv_scores = [r.score for r in sorted(own, key=lambda r: r.fold) if r.fold != FULL_FIT]
+            errors = [r.error for r in own if r.error]
+            report[name] = {
+                "test_roc_auc": full.score,
+                "cv_roc_auc": cv_scores,
+                "cv_roc_auc_mean": float(np.mean(cv_scores)) if cv_scores else None,
+                "fit_s": full.fit_s,
+                "predict_s": full.predict_s,
+                "cv_fit_s": float(sum(r.fit_s for r in own if r.fold != FULL_FIT)),
+                "cached_tasks": sum(r.cached for r in own),
+                "errors": errors,
+            }
+            if errors:
+                logging.info(f"Model {name} failed: {errors[0]}")
+            if full.model is not None:
+                # Restore the candidate's own threading for serving.
+                original = model.get_params()
+                restore = {k: original[k] for k in ("n_jobs", "thread_count") if k in original}
+                trained_models[name] = full.model.set_params(**restore) if restore else full.model
+            logging.info(
+                f"{name}: test ROC AUC {full.score:.5f} | CV {report[name]['cv_roc_auc_mean']} | "
+                f"fit {full.fit_s:.2f}s | predict {full.predict_s:.3f}s | cached {report[name]['cached_tasks']}"
+            )
+
+        return report, trained_models
+
+    def initiate_model_evaluation(self, train_arr, test_arr, fit_arr=None):
+        """Select and save the best candidate. ``fit_arr`` is ``train_arr``
+        rebalanced by ``self.resampling``, which the final models are fitted on;
+        search validation and CV scores use original rows only."""
+        try:
+            config = self.model_evaluation_config
+            X_train, y_train = train_arr[:, :-1], train_arr[:, -1]
+            X_test, y_test = test_arr[:, :-1], test_arr[:, -1]
+            resampling = self.resampling
+            if resampling is not None and resampling.resampling_config.strategy == "class_weight":
+                resampling = None
+
+            models = self.models or get_candidate_models(config.random_state)
+            searches = {}
+            if config.search:
+                from src.models.search import HyperparameterSearch, HyperparameterSearchConfig, holdout_split
+
+                search_config = HyperparameterSearchConfig(
+                    method=config.search,
+                    time_budget_s=config.search_time_budget_s,
+                    n_jobs=config.n_jobs,
+                    random_state=config.random_state,
+                )
+                search = HyperparameterSearch(search_config)
+                if resampling is None:
+                    models, searches = search.initiate_search(models, X_train, y_train)
+                else:
+                    # Hold the validation rows out first so no trial is scored on synthetic rows.
+                    fit_idx, val_idx = holdout_split(y_train, search_config.validation_size, config.random_state)
+                    rows = resampling.resample_rows(np.asarray(train_arr)[fit_idx])
+                    models, searches = search.initiate_search(
+                        models, rows[:, :-1], rows[:, -1], validation=(X_train[val_idx], y_train[val_idx])
+                    )
+                    del rows
+            report, trained_models = self.evaluate(X_train, y_train, X_test, y_test, models, resampling, fit_arr)
+            for name, summary in searches.items():
+                report[name]["search"] = summary
+
+            if not trained_models:
+                raise ValueError("Every candidate model failed to train")
+
+            # Timed sequentially in this process so candidates don't contend for cores.
+            eligible = []
+            for name, model in trained_models.items():
+                cost = measure_inference_cost(model, X_test, config.latency_rows, config.throughput_rows)
+                violations = slo_violations(cost, config)
+                report[name].update({"cost": cost, "slo_violations": violations})
+                if not violations:
+                    eligible.append(name)
+                logging.info(
+                    f"{name}: {cost['serving']} p50 {cost['p50_ms']:.2f}ms p99 {cost['p99_ms']:.2f}ms | "
+                    f"{cost['rows_per_s']:.0f} rows/s | {cost['serialized_mb']:.1f} MB on disk, "
+                    f"{cost['loaded_memory_mb']:.1f} MB loaded | SLO {'ok' if not violations else violations}"
+                )
+
+            best_model_name = max(eligible, key=lambda name: report[name]["test_roc_auc"]) if eligible else None
+
+            os.makedirs(os.path.dirname(config.report_path), exist_ok=True)
+            with open(config.report_path, "w") as f:
+                json.dump(
+                    {
+                        "best_model": best_model_name,
+                        "best_model_cost": report[best_model_name]["cost"] if best_model_name else None,
+                        "eligible_models": eligible,
+                        "config": asdict(config),
+                        "models": report,
+                    },
+                    f, indent=2
+                )
+
+            if best_model_name is None:
+                raise ValueError(f"No candidate meets the serving SLOs; see {config.report_path}")
+
+            best_model_score = report[best_model_name]["test_roc_auc"]
+            save_object(
+                file_path=config.best_model_path,
+                obj=trained_models[best_model_name]
+            )
+
+            logging.info(f"Best model {best_model_name} saved to {config.best_model_path}")
+            return best_model_name, best_model_score
+
+        except Exception as e:
+            raise CustomException(e, sys)
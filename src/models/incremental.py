@@ -0,0 +1,324 @@
+"""Incremental retraining on newly arrived transactions.
+
+One cycle (``python -m src.train_pipeline --incremental new.csv``):
+
+1. split only the new rows (stratified) and append them as one more raw shard
+   under ``state_dir/raw/{train,test}``; earlier shards are never re-read
+   except the last ``recent_shards`` of them;
+2. merge the ``Time``/``Amount`` statistics of every train shard the stored
+   running moments (``RunningMoments``) do not cover yet into them and rebuild
+   the scaler from them. The imputer keeps the median of the full training
+   run: a median cannot be merged from moments;
+3. for sklearn forests, rewrite the split thresholds of the existing trees for
+   the new scaling (the scaler is affine, so every split keeps its decisions),
+   grow new trees on the recent shards with ``warm_start`` in steps of
+   ``trees_per_step`` until ``trees_per_cycle`` trees or ``time_budget_s`` is
+   reached, then retire the oldest trees beyond ``max_trees``. Models without
+   ``warm_start`` are refitted on the recent shards only;
+4. score the old and new model on the recent held-out shards; if the new AUC
+   drops more than ``max_auc_drop`` below the old one the model is kept and
+   the stored moments stay those of its scaler. The rejected shard is still
+   recorded, and merged by the next accepted cycle;
+5. save the model, scaler and moments, re-tune the decision threshold,
+   compress, rebuild the drift reference from the recent shards, write the
+   serving bundle and publish a version as the full pipeline does, and append
+   the cycle to ``history.json``.
+"""
+import os
+import sys
+import copy
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from src.exception import CustomException
+from src.logger import logging
+from src.inference.forest_kernel import compile_scaler
+from src.models.evaluate import positive_scores
+from src.preprocessing.feature_builder import list_shards, write_shard
+from src.preprocessing.scaler import NUMERIC_SCALED_COLS, Scaler
+from src.preprocessing.schema import FEATURE_COLS, input_columns
+from src.preprocessing.streaming_stats import RunningMoments
+from src.utils.metrics import load_object, save_object
+
+# Per-tree lists a fitted forest keeps in step with ``estimators_``
+# (imblearn's balanced forest adds its samplers and pipelines).
+TREE_LISTS = ("estimators_", "samplers_", "pipelines_")
+
+
+@dataclass
+class IncrementalTrainingConfig:
+    model_path: str = os.path.join("artifacts", "best_model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "scaler.pkl")
+    state_dir: str = os.path.join("artifacts", "incremental")
+    target_column: str = "Class"
+    test_size: float = 0.3
+    random_state: int = 42
+    # Shards (cycles) of data the new trees are fitted and evaluated on.
+    recent_shards: int = 7
+    trees_per_cycle: int = 20
+    trees_per_step: int = 5
+    max_trees: int = 200
+    time_budget_s: float = 600.0
+    # Keep the current model when the held-out AUC would drop more than this.
+    max_auc_drop: float = 0.01
+
+
+def is_warm_startable_forest(model) -> bool:
+    return hasattr(model, "estimators_") and "warm_start" in model.get_params()
+
+
+def rescale_forest_thresholds(model, old_preprocessor, new_preprocessor, feature_cols=FEATURE_COLS):
+    """Rewrite the split thresholds of every tree so that the forest makes the
+    same decisions on ``new_preprocessor`` output as it did on ``old_preprocessor``
+    output. Both must be affine (``compile_scaler``) with the same column order.
+    ``model`` is edited in place; pass a copy to keep the original."""
+    old = compile_scaler(old_preprocessor, feature_cols)
+    new = compile_scaler(new_preprocessor, feature_cols)
+    if not np.array_equal(old.column_index, new.column_index):
+        raise ValueError("Preprocessors order their output columns differently")
+    changed = np.flatnonzero((old.offset != new.offset) | (old.scale != new.scale))
+    if not changed.size:
+        return model
+    for tree in model.estimators_:
+        nodes = tree.tree_
+        split = np.flatnonzero(np.isin(nodes.feature, changed))
+        j = nodes.feature[split]
+        raw = nodes.threshold[split] * old.scale[j] + old.offset[j]
+        # Writes through to the tree's node array.
+        nodes.threshold[split] = (raw - new.offset[j]) / new.scale[j]
+    return model
+
+
+def retire_oldest_trees(model, max_trees: int) -> int:
+    """Drop the oldest trees beyond ``max_trees``; returns how many were dropped."""
+    excess = len(model.estimators_) - max_trees
+    if excess <= 0:
+        return 0
+    for name in TREE_LISTS:
+        trees = getattr(model, name, None)
+        if isinstance(trees, list) and len(trees) == excess + max_trees:
+            setattr(model, name, trees[excess:])
+    model.set_params(n_estimators=max_trees)
+    return excess
+
+
+class IncrementalTraining:
+    def __init__(self):
+        self.incremental_training_config = IncrementalTrainingConfig()
+
+    def _paths(self):
+        state_dir = self.incremental_training_config.state_dir
+        return (
+            os.path.join(state_dir, "raw", "train"),
+            os.path.join(state_dir, "raw", "test"),
+            os.path.join(state_dir, "scaler_moments.npz"),
+            os.path.join(state_dir, "history.json"),
+        )
+
+    def append_new_data(self, new_data_path):
+        """Split the new rows and write them as the next raw shard; returns the
+        shard index and the number of rows."""
+        config = self.incremental_training_config
+        train_dir, test_dir, _, _ = self._paths()
+        columns = [*FEATURE_COLS, config.target_column]
+        df = pd.read_csv(new_data_path)
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"{new_data_path} is missing columns: {missing}")
+        arr = df[columns].to_numpy(dtype=np.float64)
+        y = arr[:, -1]
+        _, counts = np.unique(y, return_counts=True)
+        stratify = y if len(counts) > 1 and counts.min() >= 2 else None
+        train, test = train_test_split(arr, test_size=config.test_size, random_state=config.random_state, stratify=stratify)
+        index = len(list_shards(train_dir)) if os.path.isdir(train_dir) else 0
+        write_shard(train_dir, index, train, columns)
+        write_shard(test_dir, index, test, columns)
+        return index, len(arr)
+
+    def update_scaler(self, old_preprocessor):
+        """``(scaler, moments, shards)``: the scaler rebuilt from the stored
+        moments merged with every train shard they do not cover yet, and the
+        number of shards the merged moments cover. The first cycle starts from
+        ``old_preprocessor``. Nothing is saved; see ``save_moments``."""
+        train_dir, _, moments_path, _ = self._paths()
+        num = old_preprocessor.named_transformers_["num"]
+        imputer, scaler = num.named_steps["imputer"], num.named_steps["scaler"]
+        # The full run's median, carried from scaler to scaler.
+        median = np.asarray(imputer.statistics_, dtype=np.float64)
+        if os.path.exists(moments_path):
+            state = np.load(moments_path)
+            moments = RunningMoments(len(NUMERIC_SCALED_COLS), state["count"], state["mean"], state["m2"])
+            # Files written before shards were counted merged every earlier cycle.
+            merged = int(state["shards"]) if "shards" in state else len(list_shards(train_dir)) - 1
+        else:
+            count = np.full(len(NUMERIC_SCALED_COLS), float(np.max(scaler.n_samples_seen_)))
+            moments = RunningMoments(len(NUMERIC_SCALED_COLS), count, scaler.mean_.copy(), scaler.var_ * count)
+            merged = 0
+
+        shards = list_shards(train_dir)
+        idx = [FEATURE_COLS.index(c) for c in NUMERIC_SCALED_COLS]
+        for path in shards[merged:]:
+            block = np.load(path)[:, idx]
+            moments.update(block)
+            # Missing values reach StandardScaler as copies of the median (see
+            # Scaler.fit_streaming_statistics).
+            moments.merge_moments(np.isnan(block).sum(axis=0), median, np.zeros(len(idx)))
+
+        target = self.incremental_training_config.target_column
+        columns = [*FEATURE_COLS, target]
+        preprocessor = Scaler().build_fitted_scaler(columns, median, moments, target)
+        return preprocessor, moments, len(shards)
+
+    def save_moments(self, moments, shards: int):
+        """Make ``moments`` (covering the first ``shards`` train shards) the
+        reference the next cycle merges into; only for an accepted model."""
+        _, _, moments_path, _ = self._paths()
+        tmp = moments_path + ".tmp.npz"
+        np.savez(tmp, count=moments.count, mean=moments.mean, m2=moments.m2, shards=shards)
+        os.replace(tmp, moments_path)
+
+    def _recent(self, shard_dir):
+        paths = list_shards(shard_dir)[-self.incremental_training_config.recent_shards:]
+        arr = np.concatenate([np.load(p) for p in paths])
+        return arr[:, :-1], arr[:, -1]
+
+    def grow_forest(self, model, X, y, cycle: int = 0):
+        """Add up to ``trees_per_cycle`` trees within the time budget; returns
+        the number of trees added.
+
+        ``warm_start`` seeds tree ``i`` from the ``i``-th draw of ``random_state``,
+        so once old trees are retired the next trees would repeat seeds already
+        in the forest. Every cycle therefore draws from its own ``random_state``.
+        """
+        config = self.incremental_training_config
+        started, added, step_s = time.perf_counter(), 0, 0.0
+        seed = int(np.random.SeedSequence([config.random_state, cycle]).generate_state(1)[0])
+        model.set_params(warm_start=True, random_state=seed)
+        while added < config.trees_per_cycle:
+            if added and time.perf_counter() - started + step_s > config.time_budget_s:
+                logging.info(f"Time budget of {config.time_budget_s}s reached after {added} new trees")
+                break
+            step = min(config.trees_per_step, config.trees_per_cycle - added)
+            step_started = time.perf_counter()
+            model.set_params(n_estimators=len(model.estimators_) + step)
+            model.fit(X, y)
+            step_s = time.perf_counter() - step_started
+            added += step
+        model.set_params(warm_start=False)
+        return added
+
+    def _history(self, entry):
+        _, _, _, history_path = self._paths()
+        history = []
+        if os.path.exists(history_path):
+            with open(history_path) as f:
+                history = json.load(f)
+        history.append(entry)
+        tmp = history_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp, history_path)
+        return history
+
+    def initiate_incremental_training(self, new_data_path):
+        """Run one cycle; returns its ``history.json`` entry."""
+        try:
+            config = self.incremental_training_config
+            started = time.perf_counter()
+            train_dir, test_dir, _, _ = self._paths()
+
+            cycle, new_rows = self.append_new_data(new_data_path)
+            logging.info(f"Incremental cycle {cycle}: appended {new_rows} new rows")
+
+            model_path = os.path.abspath(config.model_path)
+            preprocessor_path = os.path.abspath(config.preprocessor_path)
+            # Warm starts need the forest's training state (imblearn's per-tree
+            # samplers), which only the pickle keeps; unpickling it needs
+            # FRAUDSHIELD_ALLOW_PICKLE=1.
+            model = load_object(model_path, from_bundle=False)
+            old_preprocessor = load_object(preprocessor_path, from_bundle=False)
+            if input_columns(old_preprocessor) != FEATURE_COLS:
+                raise ValueError("Incremental cycles only update models trained on FEATURE_COLS, not window features")
+            preprocessor, moments, merged_shards = self.update_scaler(old_preprocessor)
+
+            X_recent, y_recent = self._recent(train_dir)
+            X_holdout, y_holdout = self._recent(test_dir)
+            holdout_old = old_preprocessor.transform(pd.DataFrame(X_holdout, columns=FEATURE_COLS))
+            holdout_new = preprocessor.transform(pd.DataFrame(X_holdout, columns=FEATURE_COLS))
+            recent = preprocessor.transform(pd.DataFrame(X_recent, columns=FEATURE_COLS))
+            scorable = len(np.unique(y_holdout)) == 2
+            auc_before = float(roc_auc_score(y_holdout, positive_scores(model, holdout_old))) if scorable else None
+
+            fit_started = time.perf_counter()
+            if is_warm_startable_forest(model):
+                mode = "warm_start"
+                # The loaded model still scores the "before" AUC and stays the
+                # production model if the candidate is rejected.
+                candidate = rescale_forest_thresholds(copy.deepcopy(model), old_preprocessor, preprocessor)
+                added = self.grow_forest(candidate, recent, y_recent, cycle)
+                retired = retire_oldest_trees(candidate, config.max_trees)
+            else:
+                mode = "refit"
+                logging.info(f"{type(model).__name__} cannot warm start; refitting on the recent shards")
+                candidate = clone(model).fit(recent, y_recent)
+                added = retired = 0
+            fit_s = time.perf_counter() - fit_started
+
+            auc_after = float(roc_auc_score(y_holdout, positive_scores(candidate, holdout_new))) if scorable else None
+            accepted = auc_before is None or auc_after >= auc_before - config.max_auc_drop
+            entry = {
+                "cycle": cycle,
+                "timestamp": time.time(),
+                "new_rows": new_rows,
+                "train_rows": int(len(y_recent)),
+                "holdout_rows": int(len(y_holdout)),
+                "mode": mode,
+                "model": type(model).__name__,
+                "trees_added": added,
+                "trees_retired": retired,
+                "trees": len(candidate.estimators_) if mode == "warm_start" else None,
+                "holdout_auc_before": auc_before,
+                "holdout_auc_after": auc_after,
+                "accepted": accepted,
+                "fit_s": fit_s,
+            }
+
+            if accepted:
+                from src.inference.artifact_bundle import export_from_pickles
+                from src.inference.artifact_versions import publish_version
+                from src.models.compress import ForestCompression
+                from src.models.drift_reference import DriftReference
+                from src.models.threshold import DecisionThreshold
+
+                save_object(file_path=model_path, obj=candidate)
+                save_object(file_path=preprocessor_path, obj=preprocessor)
+                self.save_moments(moments, merged_shards)
+                holdout_arr = np.c_[holdout_new, y_holdout]
+                DecisionThreshold().initiate_threshold_tuning(holdout_arr)
+                ForestCompression().initiate_forest_compression(holdout_arr)
+                DriftReference().initiate_drift_reference(np.c_[recent, y_recent], holdout_arr)
+                export_from_pickles(os.path.dirname(model_path))
+                entry["version"] = publish_version(os.path.dirname(model_path))
+            else:
+                logging.info(
+                    f"Keeping the current model: holdout AUC {auc_after:.5f} vs {auc_before:.5f} "
+                    f"(max drop {config.max_auc_drop})"
+                )
+
+            entry["seconds"] = time.perf_counter() - started
+            self._history(entry)
+            logging.info(
+                f"Incremental cycle {cycle} ({mode}): +{added} / -{retired} trees in {fit_s:.1f}s | "
+                f"holdout AUC {auc_before} -> {auc_after} | {'published' if accepted else 'rejected'}"
+            )
+            return entry
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.neighbors import NearestNeighbors
+
+from src.exception import CustomException
+from src.logger import logging
+from src.models.evaluate import get_candidate_models, positive_scores
+
+STRATEGIES = ("class_weight", "undersample", "smote")
+
+
+@dataclass
+class ResamplingConfig:
+    report_path: str = os.path.join("artifacts", "resampling_report.json")
+    # The SMOTE training rows (originals then synthetic) are written here and
+    # memory-mapped, so the full split is never copied in memory.
+    output_path: str = os.path.join("artifacts", "train_resampled.npy")
+    # "class_weight" keeps the rows and relies on the candidates' own class
+    # weights; "undersample" and "smote" rebalance the rows instead.
+    strategy: str = "class_weight"
+    # Minority / majority rows after resampling, as imblearn's float sampling_strategy.
+    sampling_ratio: float = 0.1
+    k_neighbors: int = 5
+    chunk_rows: int = 65_536
+    dtype: str = "float32"
+    random_state: int = 42
+    # Also time every strategy and fit ``reference_model`` on each for the report,
+    # scored on the validation rows the pipeline holds out of train.
+    compare: bool = True
+    reference_model: str = "LightGBM"
+
+
+def _chunks(n_rows, chunk_rows):
+    for start in range(0, n_rows, chunk_rows):
+        yield start, min(start + chunk_rows, n_rows)
+
+
+def minority_rows(arr, chunk_rows=65_536, dtype=np.float32) -> np.ndarray:
+    """Features of the ``label == 1`` rows of ``arr``, gathered one chunk at a time."""
+    y = np.asarray(arr[:, -1])
+    out = np.empty((int((y == 1).sum()), arr.shape[1] - 1), dtype=dtype)
+    filled = 0
+    for start, stop in _chunks(len(y), chunk_rows):
+        rows = np.flatnonzero(y[start:stop] == 1) + start
+        out[filled:filled + len(rows)] = arr[rows, :-1]
+        filled += len(rows)
+    return out
+
+
+def undersample(arr, sampling_ratio=0.1, chunk_rows=65_536, dtype=np.float32, random_state=42) -> np.ndarray:
+    """Every minority row plus an exact random subset of the majority rows.
+
+    The kept majority rows are split over the chunks with a multivariate
+    hypergeometric draw, so each chunk is sampled on its own and only the output
+    is ever allocated; row order is preserved.
+    """
+    rng = np.random.default_rng(random_state)
+    y = np.asarray(arr[:, -1])
+    bounds = list(_chunks(len(y), chunk_rows))
+    majority = np.array([int((y[start:stop] == 0).sum()) for start, stop in bounds], dtype=np.int64)
+    n_minority = len(y) - int(majority.sum())
+    target = min(int(majority.sum()), int(np.ceil(n_minority / sampling_ratio)))
+    keep = rng.multivariate_hypergeometric(majority, target)
+
+    out = np.empty((n_minority + target, arr.shape[1]), dtype=dtype)
+    filled = 0
+    for (start, stop), n_keep in zip(bounds, keep):
+        labels = y[start:stop]
+        picked = rng.choice(np.flatnonzero(labels == 0), size=n_keep, replace=False)
+        rows = np.sort(np.concatenate([picked, np.flatnonzero(labels != 0)])) + start
+        out[filled:filled + len(rows)] = arr[rows]
+        filled += len(rows)
+    return out
+
+
+def smote(arr, sampling_ratio=0.1, k_neighbors=5, chunk_rows=65_536, dtype=np.float32, random_state=42) -> np.ndarray:
+    """The synthetic minority rows (label 1 last) SMOTE adds to ``arr``; ``arr``
+    itself is not copied.
+
+    Only the minority rows are indexed for neighbours. Each synthetic row lies
+    on the segment between a random minority row and one of its ``k_neighbors``
+    nearest minority rows, generated ``chunk_rows`` at a time straight into the
+    output.
+    """
+    rng = np.random.default_rng(random_state)
+    y = np.asarray(arr[:, -1])
+    minority = minority_rows(arr, chunk_rows, dtype)
+    if len(minority) < 2:
+        raise ValueError(f"SMOTE needs at least 2 minority rows, got {len(minority)}")
+    k = min(k_neighbors, len(minority) - 1)
+    neighbors = NearestNeighbors(n_neighbors=k + 1).fit(minority).kneighbors(minority, return_distance=False)[:, 1:]
+    n_synthetic = max(0, int(sampling_ratio * int((y == 0).sum())) - len(minority))
+
+    out = np.empty((n_synthetic, arr.shape[1]), dtype=dtype)
+    for start, stop in _chunks(n_synthetic, chunk_rows):
+        base = rng.integers(0, len(minority), stop - start)
+        other = neighbors[base, rng.integers(0, k, stop - start)]
+        gap = rng.random((stop - start, 1), dtype=np.float32).astype(dtype, copy=False)
+        rows = out[start:stop]
+        np.subtract(minority[other], minority[base], out=rows[:, :-1])
+        rows[:, :-1] *= gap
+        rows[:, :-1] += minority[base]
+        rows[:, -1] = 1
+    return out
+
+
+def append_rows(arr, extra, chunk_rows=65_536, dtype=np.float32, out_path=None) -> np.ndarray:
+    """``arr`` followed by ``extra``, copied ``chunk_rows`` at a time. With
+    ``out_path`` the rows go to that ``.npy`` file and come back memory-mapped
+    read-only, so only one chunk of ``arr`` is ever held in memory."""
+    shape = (len(arr) + len(extra), arr.shape[1])
+    if out_path:
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        out = np.lib.format.open_memmap(out_path, mode="w+", dtype=dtype, shape=shape)
+    else:
+        out = np.empty(shape, dtype=dtype)
+    for start, stop in _chunks(len(arr), chunk_rows):
+        out[start:stop] = arr[start:stop]
+    out[len(arr):] = extra
+    if not out_path:
+        return out
+    out.flush()
+    del out
+    return np.load(out_path, mmap_mode="r")
+
+
+def take_rows(arr, rows, chunk_rows=65_536, out_path=None) -> np.ndarray:
+    """``arr[rows]`` gathered ``chunk_rows`` at a time, in ``arr``'s dtype. With
+    ``out_path`` the rows go to that ``.npy`` file and come back memory-mapped
+    read-only, as in ``append_rows``."""
+    rows = np.asarray(rows)
+    shape = (len(rows), arr.shape[1])
+    if out_path:
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        out = np.lib.format.open_memmap(out_path, mode="w+", dtype=arr.dtype, shape=shape)
+    else:
+        out = np.empty(shape, dtype=arr.dtype)
+    for start, stop in _chunks(len(rows), chunk_rows):
+        out[start:stop] = arr[rows[start:stop]]
+    if not out_path:
+        return out
+    out.flush()
+    del out
+    return np.load(out_path, mmap_mode="r")
+
+
+def resample(arr, strategy, config: ResamplingConfig = None, out_path=None):
+    """Training rows for ``strategy``; ``class_weight`` returns ``arr`` itself.
+    SMOTE rows are written to ``out_path`` and memory-mapped when it is given."""
+    config = config or ResamplingConfig()
+    dtype = np.dtype(config.dtype)
+    if strategy == "class_weight":
+        return arr
+    if strategy == "undersample":
+        return undersample(arr, config.sampling_ratio, config.chunk_rows, dtype, config.random_state)
+    if strategy == "smote":
+        synthetic = smote(arr, config.sampling_ratio, config.k_neighbors, config.chunk_rows, dtype, config.random_state)
+        return append_rows(arr, synthetic, config.chunk_rows, dtype, out_path)
+    raise ValueError(f"strategy must be one of {STRATEGIES}, got {strategy!r}")
+
+
+def adjust_models(models: dict, strategy: str) -> dict:
+    """Candidates for rows resampled with ``strategy``.
+
+    Rebalanced rows already carry the class prior, so class weights and
+    XGBoost's ``scale_pos_weight`` are reset rather than applied twice. The
+    balanced forest keeps its own per-tree undersampling.
+    """
+    if strategy == "class_weight":
+        return models
+    adjusted = {}
+    for name, model in models.items():
+        params = model.get_params()
+        updates = {}
+        if "scale_pos_weight" in params:
+            updates["scale_pos_weight"] = 1
+        if params.get("class_weight") == "balanced" and "imblearn" not in type(model).__module__:
+            updates["class_weight"] = None
+        adjusted[name] = clone(model).set_params(**updates) if updates else model
+    return adjusted
+
+
+def measured(fn, *args, **kwargs):
+    """``(result, seconds, peak MB)``; the peak counts Python and numpy allocations
+    made by ``fn``, not pages of a memory-mapped input."""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - before
+    if not was_tracing:
+        tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+class Resampling:
+    """Rebalances the scaled training split the final model is fitted on and
+    writes the strategy's time, peak memory and row counts to
+    ``resampling_report.json``. Model evaluation calls ``resample_rows`` on
+    the fit part of every CV fold and of the search split, so scoring only ever
+    sees original rows. With ``compare`` (the default) every strategy is also
+    scored by fitting the reference candidate on its rows."""
+
+    def __init__(self, strategy: str = None):
+        self.resampling_config = ResamplingConfig()
+        if strategy:
+            self.resampling_config.strategy = strategy
+
+    def resample_rows(self, arr, out_path=None):
+        config = self.resampling_config
+        return resample(arr, config.strategy, config, out_path)
+
+    def summarize(self, arr, out, seconds, peak_mb):
+        y = np.asarray(out[:, -1])
+        return {
+            "rows_before": int(len(arr)),
+            "rows_after": int(len(out)),
+            "minority_after": int((y == 1).sum()),
+            "dtype": str(out.dtype),
+            "output_mb": 0.0 if out is arr else out.nbytes / 1e6,
+            "seconds": seconds,
+            "peak_mb": peak_mb,
+        }
+
+    def compare_strategies(self, train_arr, val_arr):
+        """``{strategy: summary}`` with the reference candidate's fit time and
+        ROC AUC on ``val_arr``."""
+        config = self.resampling_config
+        reference = get_candidate_models(config.random_state)[config.reference_model]
+        results = {}
+        for strategy in STRATEGIES:
+            out, seconds, peak_mb = measured(resample, train_arr, strategy, config, config.output_path)
+            summary = self.summarize(train_arr, out, seconds, peak_mb)
+            model = clone(adjust_models({"reference": reference}, strategy)["reference"])
+            start = time.perf_counter()
+            model.fit(out[:, :-1], out[:, -1])
+            summary["fit_s"] = time.perf_counter() - start
+            summary["validation_roc_auc"] = float(
+                roc_auc_score(val_arr[:, -1], positive_scores(model, val_arr[:, :-1]))
+            )
+            results[strategy] = summary
+            logging.info(
+                f"Resampling {strategy}: {summary['rows_after']} rows in {seconds:.2f}s, peak {peak_mb:.1f} MB | "
+                f"{config.reference_model} fit {summary['fit_s']:.1f}s, "
+                f"validation ROC AUC {summary['validation_roc_auc']:.5f}"
+            )
+            del out, model
+        return results
+
+    def initiate_resampling(self, train_arr, val_arr):
+        """Resample ``train_arr`` (the rows models are fitted on); ``val_arr``
+        only scores the strategy comparison."""
+        try:
+            config = self.resampling_config
+            if config.strategy not in STRATEGIES:
+                raise ValueError(f"strategy must be one of {STRATEGIES}, got {config.strategy!r}")
+
+            comparison = self.compare_strategies(train_arr, val_arr) if config.compare else None
+            out, seconds, peak_mb = measured(self.resample_rows, train_arr, config.output_path)
+            summary = self.summarize(train_arr, out, seconds, peak_mb)
+            logging.info(
+                f"Resampled the training split with {config.strategy}: {summary['rows_before']} -> "
+                f"{summary['rows_after']} rows ({summary['minority_after']} fraud) in {seconds:.2f}s, "
+                f"peak {peak_mb:.1f} MB"
+            )
+
+            os.makedirs(os.path.dirname(config.report_path), exist_ok=True)
+            with open(config.report_path, "w") as f:
+                json.dump({"config": asdict(config), "result": summary, "strategies": comparison}, f, indent=2)
+            return out
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    from src.models.evaluate import ModelEvaluationConfig
+    from src.models.search import holdout_split
+    from src.models.threshold import DecisionPolicyConfig
+    from src.preprocessing.feature_builder import DataIngestionConfig
+    from src.preprocessing.scaler import ScalerConfig
+    from src.utils.data_store import read_array, table_path
+
+    train_arr, _ = read_array(table_path(ScalerConfig().train_array_path, DataIngestionConfig().data_format))
+    resampling = Resampling(sys.argv[1] if len(sys.argv) > 1 else None)
+    # The same split the training pipeline makes.
+    fit_idx, val_idx = holdout_split(
+        train_arr[:, -1], DecisionPolicyConfig().validation_size, ModelEvaluationConfig().random_state
+    )
+    resampling.resampling_config.compare = True
+    resampling.initiate_resampling(take_rows(train_arr, fit_idx), take_rows(train_arr, val_idx))
+    print(json.dumps(json.load(open(resampling.resampling_config.report_path))["strategies"], indent=2))
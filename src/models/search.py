@@ -0,0 +1,287 @@
+"""Successive-halving / Hyperband hyperparameter search for the candidates.
+
+A stratified ``validation_size`` slice of the train split is held out once.
+Each bracket samples configurations from the candidate's space, fits them all
+on a small stratified prefix of the remaining rows, keeps the best
+``1 / eta`` by validation ROC AUC and gives those ``eta`` times more rows,
+until the survivors train on every row. ``hyperband`` runs brackets from many
+cheap configurations down to a few full-budget ones; ``halving`` runs only the
+most aggressive bracket with ``n_candidates`` configurations.
+
+XGBoost and LightGBM get ``max_estimators`` trees and stop natively once the
+validation AUC has not improved for ``early_stopping_rounds``; the tuned model
+keeps the number of trees that scored best. Trials of a rung run in a process
+pool, ``n_jobs`` at a time, and no new trials start once ``time_budget_s`` is
+spent. Every trial (rows, trees, fit seconds, score) is logged and appended
+to ``trials_path``.
+"""
+import os
+import sys
+import json
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler
+
+from src.exception import CustomException
+from src.logger import logging
+from src.models.evaluate import _single_threaded, positive_scores
+
+SEARCH_METHODS = ("halving", "hyperband")
+
+SEARCH_SPACES = {
+    "LogisticRegression": {
+        "C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0],
+    },
+    "BalancedRandomForest": {
+        "max_depth": [None, 8, 12, 16, 24],
+        "min_samples_leaf": [1, 2, 5, 10],
+        "max_features": ["sqrt", 0.2, 0.35, 0.5],
+    },
+    "XGBoost": {
+        "max_depth": [3, 4, 5, 6, 8],
+        "learning_rate": [0.02, 0.05, 0.1, 0.2],
+        "subsample": [0.6, 0.8, 1.0],
+        "colsample_bytree": [0.5, 0.8, 1.0],
+        "min_child_weight": [1, 3, 10],
+        "scale_pos_weight": [1, 10, 100, 580],
+    },
+    "LightGBM": {
+        "num_leaves": [15, 31, 63, 127],
+        "learning_rate": [0.02, 0.05, 0.1, 0.2],
+        "min_child_samples": [10, 20, 50, 100],
+        "subsample": [0.6, 0.8, 1.0],
+        "subsample_freq": [1],
+        "colsample_bytree": [0.5, 0.8, 1.0],
+        "reg_lambda": [0.0, 1.0, 10.0],
+    },
+}
+
+
+@dataclass
+class HyperparameterSearchConfig:
+    method: str = "hyperband"
+    trials_path: str = os.path.join("artifacts", "search_trials.jsonl")
+    # Configurations of the single ``halving`` bracket.
+    n_candidates: int = 27
+    eta: int = 3
+    # Rows of the cheapest rung; the last rung uses every non-validation row.
+    min_rows: int = 5_000
+    validation_size: float = 0.2
+    early_stopping_rounds: int = 50
+    max_estimators: int = 1_000
+    # Wall clock for the whole search, shared out over the candidates.
+    time_budget_s: float = 3_600.0
+    n_jobs: int = max(1, (os.cpu_count() or 1))
+    random_state: int = 42
+
+
+def boosting_library(model):
+    module = type(model).__module__
+    for library in ("xgboost", "lightgbm"):
+        if module.startswith(library):
+            return library
+    return None
+
+
+def stratified_order(y, random_state=42) -> np.ndarray:
+    """A permutation of the rows whose every prefix keeps the class ratio of ``y``."""
+    rng = np.random.default_rng(random_state)
+    position = np.empty(len(y))
+    for label in np.unique(y):
+        rows = np.flatnonzero(y == label)
+        # The k-th shuffled row of a class sits at fraction (k + u) / n_class.
+        position[rng.permutation(rows)] = (np.arange(len(rows)) + rng.random(len(rows))) / len(rows)
+    return np.argsort(position, kind="stable")
+
+
+def holdout_split(y, validation_size, random_state=42):
+    """``(fit rows, validation rows)``: a stratified ``validation_size`` slice of
+    ``y`` held out, both sorted."""
+    order = stratified_order(np.asarray(y), random_state)
+    n_val = int(len(order) * validation_size)
+    return np.sort(order[n_val:]), np.sort(order[:n_val])
+
+
+def _early_stopping(model, X_val, y_val, rounds: int) -> dict:
+    """Fit keyword arguments that stop boosting on the validation AUC."""
+    library = boosting_library(model)
+    if library == "xgboost":
+        model.set_params(early_stopping_rounds=rounds, eval_metric="auc")
+        return {"eval_set": [(X_val, y_val)], "verbose": False}
+    if library == "lightgbm":
+        import lightgbm
+
+        return {
+            "eval_set": [(X_val, y_val)],
+            "eval_metric": "auc",
+            "callbacks": [lightgbm.early_stopping(rounds, first_metric_only=True, verbose=False)],
+        }
+    return {}
+
+
+def _best_trees(model):
+    library = boosting_library(model)
+    if library == "xgboost":
+        return int(model.best_iteration) + 1
+    if library == "lightgbm":
+        return int(model.best_iteration_ or model.n_estimators)
+    return None
+
+
+def _run_trial(model, params, X, y, fit_idx, X_val, y_val, rounds):
+    trial = {"params": params, "rows": int(len(fit_idx)), "trees": None, "score": None, "error": None}
+    try:
+        model = clone(model).set_params(**params)
+        fit_kwargs = _early_stopping(model, X_val, y_val, rounds)
+        start = time.perf_counter()
+        model.fit(X[fit_idx], y[fit_idx], **fit_kwargs)
+        trial["fit_s"] = time.perf_counter() - start
+        trial["trees"] = _best_trees(model)
+        start = time.perf_counter()
+        scores = positive_scores(model, X_val)
+        trial["score_s"] = time.perf_counter() - start
+        trial["score"] = float(roc_auc_score(y_val, scores))
+    except Exception as e:
+        trial["error"] = f"{type(e).__name__}: {e}"
+    return trial
+
+
+def brackets(method: str, n_candidates: int, eta: int, max_rows: int, min_rows: int) -> list:
+    """``(n_configs, rung_rows)`` per bracket; rung rows grow by ``eta`` up to ``max_rows``."""
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"method must be one of {SEARCH_METHODS}, got {method!r}")
+    s_max = max(int(math.floor(math.log(max(max_rows / max(min_rows, 1), 1.0), eta))), 0)
+    out = []
+    for s in ([s_max] if method == "halving" else range(s_max, -1, -1)):
+        n = n_candidates if method == "halving" else int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        rows = [min(max_rows, int(max_rows * eta ** (i - s))) for i in range(s + 1)]
+        out.append((n, rows))
+    return out
+
+
+class HyperparameterSearch:
+    def __init__(self, config: HyperparameterSearchConfig = None):
+        self.search_config = config or HyperparameterSearchConfig()
+
+    def _log_trial(self, trial):
+        logging.info(
+            f"Search {trial['model']} b{trial['bracket']} r{trial['rung']} #{trial['trial']}: "
+            f"{trial['rows']} rows, trees {trial['trees']}, fit {trial.get('fit_s', 0.0):.2f}s, "
+            f"AUC {trial['score']} {trial['error'] or ''}| {trial['params']}"
+        )
+        with open(self.search_config.trials_path, "a") as f:
+            f.write(json.dumps(trial, default=str) + "\n")
+
+    def search_model(self, name, model, space, X, y, X_val, y_val, deadline):
+        """Run the brackets for one candidate; returns ``(tuned model, summary)``."""
+        config = self.search_config
+        original = model
+        model = _single_threaded(model)
+        if boosting_library(model):
+            model.set_params(n_estimators=config.max_estimators)
+        order = stratified_order(y, config.random_state)
+        plan = brackets(config.method, config.n_candidates, config.eta, len(y), config.min_rows)
+        trials, started, stopped = [], time.perf_counter(), False
+
+        for b, (n_configs, rung_rows) in enumerate(plan):
+            configs = list(ParameterSampler(space, n_configs, random_state=config.random_state + b))
+            for rung, rows in enumerate(rung_rows):
+                results = []
+                for start in range(0, len(configs), config.n_jobs):
+                    if time.perf_counter() > deadline:
+                        stopped = True
+                        break
+                    chunk = configs[start:start + config.n_jobs]
+                    results += Parallel(n_jobs=min(config.n_jobs, len(chunk)), backend="loky")(
+                        delayed(_run_trial)(model, params, X, y, order[:rows], X_val, y_val, config.early_stopping_rounds)
+                        for params in chunk
+                    )
+                for i, trial in enumerate(results):
+                    trial.update({"model": name, "method": config.method, "bracket": b, "rung": rung, "trial": i})
+                    self._log_trial(trial)
+                trials += results
+                scored = sorted((t for t in results if t["score"] is not None), key=lambda t: -t["score"])
+                if stopped or not scored:
+                    break
+                configs = [t["params"] for t in scored[: max(1, len(scored) // config.eta)]]
+            if stopped:
+                logging.info(f"Search time budget spent; stopping {name} after bracket {b} rung {rung}")
+                break
+
+        scored = [t for t in trials if t["score"] is not None]
+        if not scored:
+            raise ValueError(f"Every search trial of {name} failed: {trials[0]['error'] if trials else 'no trials ran'}")
+        # Most rows first: a lucky score on a small rung does not beat a full-budget one.
+        best = max(scored, key=lambda t: (t["rows"], t["score"]))
+        tuned = clone(original).set_params(**best["params"])
+        if best["trees"] is not None:
+            tuned.set_params(n_estimators=best["trees"])
+        summary = {
+            "method": config.method,
+            "best_params": best["params"],
+            "best_trees": best["trees"],
+            "best_validation_roc_auc": best["score"],
+            "best_rows": best["rows"],
+            "trials": len(trials),
+            "failed_trials": len(trials) - len(scored),
+            "trial_fit_s": float(sum(t.get("fit_s", 0.0) for t in trials)),
+            "seconds": time.perf_counter() - started,
+            "budget_exhausted": stopped,
+        }
+        return tuned, summary
+
+    def initiate_search(self, models: dict, X_train, y_train, validation=None):
+        """Tuned copies of ``models`` (candidates without a search space are
+        returned unchanged) and ``{name: summary}``.
+
+        ``validation`` is an ``(X, y)`` pair to score the trials on; all of
+        ``X_train`` is then fitted on. Without it the validation slice is held
+        out of ``X_train``.
+        """
+        try:
+            config = self.search_config
+            y_train = np.asarray(y_train)
+            if validation is None:
+                fit_idx, val_idx = holdout_split(y_train, config.validation_size, config.random_state)
+                X, y = np.asarray(X_train)[fit_idx], y_train[fit_idx]
+                X_val, y_val = np.asarray(X_train)[val_idx], y_train[val_idx]
+            else:
+                X, y = np.asarray(X_train), y_train
+                X_val, y_val = np.asarray(validation[0]), np.asarray(validation[1])
+            os.makedirs(os.path.dirname(config.trials_path) or ".", exist_ok=True)
+
+            searched = [name for name in models if name in SEARCH_SPACES]
+            logging.info(
+                f"{config.method} search over {searched}: {len(y)} fit rows, {len(y_val)} validation rows, "
+                f"{config.time_budget_s:.0f}s budget on {config.n_jobs} cores"
+            )
+            started = time.perf_counter()
+            tuned, summaries = dict(models), {}
+            for i, name in enumerate(searched):
+                # Each remaining candidate gets an equal share of what is left.
+                remaining = config.time_budget_s - (time.perf_counter() - started)
+                deadline = time.perf_counter() + remaining / (len(searched) - i)
+                try:
+                    tuned[name], summaries[name] = self.search_model(
+                        name, models[name], SEARCH_SPACES[name], X, y, X_val, y_val, deadline
+                    )
+                except ValueError as e:
+                    logging.info(f"Keeping the default {name}: {e}")
+                    summaries[name] = {"method": config.method, "error": str(e)}
+                    continue
+                s = summaries[name]
+                logging.info(
+                    f"{name}: best validation AUC {s['best_validation_roc_auc']:.5f} with {s['best_params']} "
+                    f"(trees {s['best_trees']}) | {s['trials']} trials, {s['trial_fit_s']:.1f}s fitting, "
+                    f"{s['seconds']:.1f}s wall"
+                )
+            return tuned, summaries
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,133 @@
+import os
+import sys
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.metrics import f1_score, precision_recall_curve, precision_score, recall_score
+
+from src.exception import CustomException
+from src.logger import logging
+from src.inference.decision_policy import DecisionPolicy, save_policy
+from src.utils.metrics import load_object
+
+TARGET_METRICS = ("recall", "precision")
+
+
+@dataclass
+class DecisionPolicyConfig:
+    model_path: str = os.path.join("artifacts", "best_model.pkl")
+    policy_path: str = os.path.join("artifacts", "decision_policy.json")
+    # Keep at least ``target_value`` of this metric and maximise the other one;
+    # falls back to the best-F1 threshold when the target is unreachable.
+    target_metric: str = "recall"
+    target_value: float = 0.90
+    moderate_ratio: float = 0.6
+    # Stratified share of the training rows the pipeline holds out of model
+    # fitting to tune the threshold (and compress the forest) on.
+    validation_size: float = 0.2
+    # Where the training pipeline writes the held-out and the remaining rows
+    # when the split is memory-mapped (--streaming).
+    validation_array_path: str = os.path.join("artifacts", "val_arr.npy")
+    fit_array_path: str = os.path.join("artifacts", "fit_arr.npy")
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def classification_summary(y_true, scores, threshold):
+    y_pred = scores >= threshold
+    return {
+        "precision": float(precision_score(y_true, y_pred, zero_division=0)),
+        "recall": float(recall_score(y_true, y_pred, zero_division=0)),
+        "f1": float(f1_score(y_true, y_pred, zero_division=0)),
+        "flagged_rate": float(np.mean(y_pred)),
+    }
+
+
+def tune_threshold(y_true, scores, target_metric="recall", target_value=0.90):
+    """Returns ``(threshold, target_met)`` for labels ``scores >= threshold``."""
+    if target_metric not in TARGET_METRICS:
+        raise ValueError(f"target_metric must be one of {TARGET_METRICS}, got {target_metric!r}")
+
+    precision, recall, thresholds = precision_recall_curve(y_true, scores)
+    # The curve has one more point than thresholds (recall 0 at the end).
+    precision, recall = precision[:-1], recall[:-1]
+    kept, other = (recall, precision) if target_metric == "recall" else (precision, recall)
+
+    feasible = np.flatnonzero(kept >= target_value)
+    if feasible.size:
+        # Best secondary metric; ties go to the best targeted metric.
+        tied = feasible[other[feasible] == other[feasible].max()]
+        best = tied[np.argmax(kept[tied])]
+        return float(thresholds[best]), True
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return float(thresholds[int(np.argmax(f1))]), False
+
+
+class DecisionThreshold:
+    """Tunes the fraud threshold of the saved best model on validation rows the
+    model was not fitted on and stores it as ``decision_policy.json`` next to
+    the model, with the metrics it reaches on the test split when one is given."""
+
+    def __init__(self):
+        self.decision_policy_config = DecisionPolicyConfig()
+
+    def initiate_threshold_tuning(self, val_arr, test_arr=None):
+        try:
+            config = self.decision_policy_config
+            model_path = os.path.abspath(config.model_path)
+            model = load_object(model_path)
+            if not hasattr(model, "predict_proba"):
+                logging.info(f"{type(model).__name__} has no predict_proba; keeping the default 0.5 policy")
+                return None
+
+            y_val = np.asarray(val_arr[:, -1])
+            scores = model.predict_proba(val_arr[:, :-1])[:, 1]
+            threshold, target_met = tune_threshold(y_val, scores, config.target_metric, config.target_value)
+            if not target_met:
+                logging.info(
+                    f"No threshold reaches {config.target_metric} >= {config.target_value}; using the best-F1 threshold"
+                )
+
+            tuned = classification_summary(y_val, scores, threshold)
+            reported = {}
+            if test_arr is not None:
+                y_test = np.asarray(test_arr[:, -1])
+                test_scores = model.predict_proba(test_arr[:, :-1])[:, 1]
+                reported = {
+                    "test_metrics": classification_summary(y_test, test_scores, threshold),
+                    "test_metrics_at_0_5": classification_summary(y_test, test_scores, 0.5),
+                }
+            policy = DecisionPolicy.from_threshold(
+                threshold,
+                config.moderate_ratio,
+                model=type(model).__name__,
+                model_sha256=file_checksum(model_path),
+                target={"metric": config.target_metric, "value": config.target_value, "met": target_met},
+                validation_metrics=tuned,
+                **reported,
+            )
+            path = save_policy(policy, config.policy_path)
+
+            logging.info(
+                f"Decision threshold {threshold:.4f} (validation): precision {tuned['precision']:.4f}, "
+                f"recall {tuned['recall']:.4f}, flagged {tuned['flagged_rate']:.4%}; saved to {path}"
+            )
+            if reported:
+                test = reported["test_metrics"]
+                logging.info(
+                    f"At that threshold on test: precision {test['precision']:.4f}, recall {test['recall']:.4f}, "
+                    f"flagged {test['flagged_rate']:.4%}"
+                )
+            return path
+
+        except Exception as e:
+            raise CustomException(e, sys)
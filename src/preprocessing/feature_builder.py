@@ -1,44 +1,194 @@
 import os
 import sys
+import json
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 from sklearn.model_selection import train_test_split
 from src.exception import CustomException
 from src.logger import logging
+from src.preprocessing.feature_store import FeatureStore, FeatureStoreConfig
+from src.utils.data_store import FLOAT_DTYPES, STAGE_FORMATS, schema_path, table_path, write_table
 
 @dataclass
 class DataIngestionConfig:
-    train_data_path: str = os.path.join("artifacts", "train.csv")
-    test_data_path: str = os.path.join("artifacts", "test.csv")
-    raw_data_path: str = os.path.join("artifacts", "data.csv")
+    # Base paths; the extension comes from data_format.
+    train_data_path: str = os.path.join("artifacts", "train")
+    test_data_path: str = os.path.join("artifacts", "test")
+    raw_data_path: str = os.path.join("artifacts", "data")
+    data_format: str = "npy"
+    float_dtype: str = "float64"
+    export_csv: bool = False
+    source_data_path: str = os.path.join("notebooks", "eda_done_data.csv")
+    shard_dir: str = os.path.join("artifacts", "shards", "raw")
+    chunksize: int = 100_000
+    test_size: float = 0.3
+    random_state: int = 42
+    target_column: str = "Class"
+    # Window features of Amount (see feature_store.py) appended to every row
+    # before the split; None keeps the raw columns only.
+    feature_store: FeatureStoreConfig = None
+
+
+def write_shard(shard_dir, index, arr, columns):
+    os.makedirs(shard_dir, exist_ok=True)
+    schema_path = os.path.join(shard_dir, "columns.json")
+    if index == 0 or not os.path.exists(schema_path):
+        with open(schema_path, "w") as f:
+            json.dump(list(columns), f)
+    path = os.path.join(shard_dir, f"part-{index:05d}.npy")
+    np.save(path, np.ascontiguousarray(arr))
+    return path
+
+
+def list_shards(shard_dir):
+    return sorted(
+        os.path.join(shard_dir, name)
+        for name in os.listdir(shard_dir)
+        if name.startswith("part-") and name.endswith(".npy")
+    )
+
+
+def read_shard_columns(shard_dir):
+    with open(os.path.join(shard_dir, "columns.json")) as f:
+        return json.load(f)
+
+
+def load_shards(shard_dir, out_path):
+    """Concatenate every shard of a split into the ``.npy`` table ``out_path``,
+    one shard at a time, and return it memory-mapped read-only.
+
+    Peak memory is one shard however many rows the split has; the model fits
+    downstream page the matrix in from disk.
+    """
+    paths = list_shards(shard_dir)
+    shapes = [np.load(path, mmap_mode="r").shape for path in paths]
+    first = np.load(paths[0], mmap_mode="r")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=first.dtype, shape=(sum(s[0] for s in shapes), shapes[0][1]))
+    start = 0
+    for path, shape in zip(paths, shapes):
+        out[start:start + shape[0]] = np.load(path, mmap_mode="r")
+        start += shape[0]
+    out.flush()
+    del out
+    with open(schema_path(out_path), "w") as f:
+        json.dump({"columns": read_shard_columns(shard_dir), "dtype": str(first.dtype), "rows": int(start)}, f)
+    return np.load(out_path, mmap_mode="r")
+
+
 class DataIngestion:
     def __init__(self):
         self.ingestion_config = DataIngestionConfig()
+        self.feature_store = None
+    def _with_window_features(self, df):
+        """``df`` with the feature store's columns added before the target and
+        the entity column dropped. Chunks must come in file order: the store
+        carries every entity's history from one call to the next, and each
+        ingestion run starts a fresh one."""
+        if self.feature_store is None:
+            return df
+        target, entity = self.ingestion_config.target_column, self.feature_store.config.entity_column
+        df = self.feature_store.add_features(df)
+        return df[[c for c in df.columns if c not in (target, entity)] + [target]]
+    def _write_split(self, base_path, df):
+        config = self.ingestion_config
+        path = table_path(base_path, config.data_format)
+        write_table(path, df, dtype=config.float_dtype)
+        if config.export_csv:
+            write_table(table_path(base_path, "csv"), df, dtype=config.float_dtype)
+        return path
     def initiate_data_ingestion(self):
         logging.info("Data ingestion started")
         try:
-            df= pd.read_csv("notebooks/eda_done_data.csv")
+            config = self.ingestion_config
+            if config.data_format not in STAGE_FORMATS:
+                raise ValueError(f"data_format must be one of {STAGE_FORMATS}, got {config.data_format!r}")
+            if config.float_dtype not in FLOAT_DTYPES:
+                raise ValueError(f"float_dtype must be one of {FLOAT_DTYPES}, got {config.float_dtype!r}")
+            self.feature_store = FeatureStore(config.feature_store) if config.feature_store else None
+            df= pd.read_csv(config.source_data_path)
             logging.info("Dataset read successfully")
             logging.info(f"Dataset shape: {df.shape}")
             logging.info(f"Class distribution:\n{df['Class'].value_counts()}")
-            os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok=True)
-            df.to_csv(self.ingestion_config.raw_data_path, index=False)
-            logging.info("Raw data saved")
+            df = self._with_window_features(df)
+            if self.feature_store is not None:
+                logging.info(f"Window features added: {self.feature_store.feature_names()}")
+            os.makedirs(os.path.dirname(config.train_data_path), exist_ok=True)
+            self._write_split(config.raw_data_path, df)
+            logging.info(f"Raw data saved as {config.data_format} ({config.float_dtype})")
             train_set, test_set = train_test_split(
                 df,
-                test_size=0.3,
-                random_state=42,
-                stratify=df["Class"]
+                test_size=config.test_size,
+                random_state=config.random_state,
+                stratify=df[config.target_column]
             )
-            train_set.to_csv(self.ingestion_config.train_data_path, index=False)
-            test_set.to_csv(self.ingestion_config.test_data_path, index=False)
+            train_path = self._write_split(config.train_data_path, train_set)
+            test_path = self._write_split(config.test_data_path, test_set)
             logging.info("Data ingestion completed successfully")
             return (
-                self.ingestion_config.train_data_path,
-                self.ingestion_config.test_data_path
+                train_path,
+                test_path
             )
         except Exception as e:
             raise CustomException(e, sys)
+
+    def initiate_streaming_ingestion(self):
+        """Stratified train/test split in chunks of ``chunksize`` rows.
+
+        Each chunk is split per class; the fractional test quota left over from
+        one chunk carries into the next, so the overall class ratios match a
+        full ``train_test_split`` without ever holding the dataset in memory.
+        Splits are written as ``.npy`` shards (target as last column) under
+        ``shard_dir/train`` and ``shard_dir/test``.
+        """
+        logging.info("Streaming data ingestion started")
+        try:
+            config = self.ingestion_config
+            train_dir = os.path.join(config.shard_dir, "train")
+            test_dir = os.path.join(config.shard_dir, "test")
+            for shard_dir in (train_dir, test_dir):
+                os.makedirs(shard_dir, exist_ok=True)
+                for old in list_shards(shard_dir):
+                    os.remove(old)
+
+            rng = np.random.default_rng(config.random_state)
+            carry = {}
+            class_counts = {"train": {}, "test": {}}
+            n_rows = 0
+
+            self.feature_store = FeatureStore(config.feature_store) if config.feature_store else None
+            reader = pd.read_csv(config.source_data_path, chunksize=config.chunksize)
+            for index, chunk in enumerate(reader):
+                chunk = self._with_window_features(chunk)
+                columns = [c for c in chunk.columns if c != config.target_column] + [config.target_column]
+                arr = chunk[columns].to_numpy(dtype=config.float_dtype)
+                y = arr[:, -1]
+
+                is_test = np.zeros(len(arr), dtype=bool)
+                for label in np.unique(y):
+                    rows = np.flatnonzero(y == label)
+                    quota = carry.get(label, 0.0) + len(rows) * config.test_size
+                    n_test = int(quota)
+                    carry[label] = quota - n_test
+                    is_test[rng.permutation(rows)[:n_test]] = True
+
+                write_shard(train_dir, index, arr[~is_test], columns)
+                write_shard(test_dir, index, arr[is_test], columns)
+
+                for split, mask in (("train", ~is_test), ("test", is_test)):
+                    labels, counts = np.unique(y[mask], return_counts=True)
+                    for label, count in zip(labels.tolist(), counts.tolist()):
+                        class_counts[split][label] = class_counts[split].get(label, 0) + count
+                n_rows += len(arr)
+
+            logging.info(f"Streamed {n_rows} rows in chunks of {config.chunksize}")
+            logging.info(f"Class distribution per split: {class_counts}")
+            logging.info("Streaming data ingestion completed successfully")
+            return train_dir, test_dir
+
+        except Exception as e:
+            raise CustomException(e, sys)
 if __name__ == "__main__":
     obj = DataIngestion()
     train_data, test_data = obj.initiate_data_ingestion()
@@ -0,0 +1,223 @@
+"""Per-entity sliding-window aggregates of ``Amount`` over ``Time``.
+
+For every window of ``windows`` seconds the store keeps, per entity (card,
+account, merchant...), the count, sum, mean and max of the amounts of its
+transactions with ``Time`` in ``(t - window, t]``, the current one included.
+Each entity holds its latest ``capacity`` (time, amount) pairs in two
+``array('d')`` ring buffers plus, per window, the oldest position still inside
+it, a running sum and a monotonic queue for the max. ``update`` and
+``features`` are amortized O(1) in the window sizes: each transaction enters
+and leaves every window once.
+
+Memory is bounded two ways: entities idle for longer than ``idle_seconds`` (of
+``Time``, not wall clock) are dropped, and past ``max_entities`` or
+``max_bytes`` the least recently updated entity goes first. A dropped entity
+simply starts again from an empty history. Windows never look further back
+than ``capacity`` transactions of an entity.
+
+Training computes the same features with ``compute_bulk``, which replays the
+rows in ``Time`` order through ``update``, so offline and online values come
+from one implementation, evictions included. ``DataIngestion`` does this for
+the whole dataset before the train/test split when
+``DataIngestionConfig.feature_store`` is set (``python -m src.train_pipeline
+--window-features``).
+"""
+import sys
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+
+AGGREGATES = ("count", "sum", "mean", "max")
+# Size of an entity before any transaction (object, lists, arrays and its
+# dictionary slot) and per window, as measured with tracemalloc.
+ENTITY_BYTES = 700
+WINDOW_BYTES = 136
+# Compact a window's max queue once this many dead entries sit at its head.
+QUEUE_COMPACT = 32
+
+
+@dataclass
+class FeatureStoreConfig:
+    windows: tuple = (3600.0, 86400.0)
+    capacity: int = 256
+    max_entities: int = 1_000_000
+    max_bytes: int = 512 << 20
+    # None: the longest window; an idle entity's windows are all empty by then.
+    idle_seconds: float = None
+    # None: every row belongs to one entity (the dataset has no card id).
+    entity_column: str = None
+
+    def __post_init__(self):
+        self.windows = tuple(float(w) for w in self.windows)
+        if not self.windows or min(self.windows) <= 0:
+            raise ValueError("windows must be positive numbers of seconds")
+        if self.capacity < 1 or self.max_entities < 1 or self.max_bytes < 1:
+            raise ValueError("capacity, max_entities and max_bytes must be >= 1")
+        if self.idle_seconds is None:
+            self.idle_seconds = max(self.windows)
+        if self.idle_seconds < max(self.windows):
+            raise ValueError("idle_seconds must be at least the longest window")
+
+
+class _Entity:
+    __slots__ = ("times", "amounts", "n", "last", "lo", "sums", "queues", "heads")
+
+    def __init__(self, n_windows: int):
+        self.times = array("d")
+        self.amounts = array("d")
+        self.n = 0
+        self.last = -np.inf
+        self.lo = [0] * n_windows
+        self.sums = [0.0] * n_windows
+        self.queues = [[] for _ in range(n_windows)]
+        self.heads = [0] * n_windows
+
+
+class FeatureStore:
+    def __init__(self, config: FeatureStoreConfig = None):
+        self.config = config or FeatureStoreConfig()
+        self._entities = OrderedDict()
+        self._spans = self.config.windows
+        self._entity_bytes = ENTITY_BYTES + WINDOW_BYTES * len(self._spans)
+        self.nbytes = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def feature_names(self) -> list:
+        return [f"amount_{agg}_{span:g}s" for span in self._spans for agg in AGGREGATES]
+
+    def _expire(self, e: _Entity, t: float, keep: int):
+        """Move every window's start past transactions older than its span and,
+        when ``keep`` is below ``e.n``, past positions before ``e.n - keep``."""
+        cap = self.config.capacity
+        times, amounts, floor = e.times, e.amounts, e.n - keep
+        for w, span in enumerate(self._spans):
+            lo, total, cutoff = e.lo[w], e.sums[w], t - span
+            while lo < e.n and (lo < floor or times[lo % cap] <= cutoff):
+                total -= amounts[lo % cap]
+                lo += 1
+            if lo == e.n:
+                total = 0.0
+            e.lo[w], e.sums[w] = lo, total
+            queue, head = e.queues[w], e.heads[w]
+            while head < len(queue) and queue[head] < lo:
+                head += 1
+            if head >= QUEUE_COMPACT:
+                del queue[:head]
+                head = 0
+            e.heads[w] = head
+
+    def _aggregates(self, e: _Entity) -> tuple:
+        cap, out = self.config.capacity, []
+        for w in range(len(self._spans)):
+            count = e.n - e.lo[w]
+            total = e.sums[w]
+            queue, head = e.queues[w], e.heads[w]
+            peak = e.amounts[queue[head] % cap] if head < len(queue) else 0.0
+            out += (float(count), total, total / count if count else 0.0, peak)
+        return tuple(out)
+
+    def update(self, entity, time: float, amount: float) -> tuple:
+        """Record a transaction and return its window features (in
+        ``feature_names()`` order). Times earlier than the entity's latest are
+        treated as that latest time."""
+        e = self._entities.get(entity)
+        if e is None:
+            e = self._entities[entity] = _Entity(len(self._spans))
+            self.nbytes += self._entity_bytes
+        else:
+            self._entities.move_to_end(entity)
+        t = time if time > e.last else e.last
+        cap = self.config.capacity
+        # The slot about to be reused must leave every window first.
+        self._expire(e, t, cap - 1)
+        seq = e.n
+        if seq < cap:
+            e.times.append(t)
+            e.amounts.append(amount)
+            self.nbytes += 16
+        else:
+            e.times[seq % cap] = t
+            e.amounts[seq % cap] = amount
+        e.n = seq + 1
+        e.last = t
+        amounts = e.amounts
+        for w in range(len(self._spans)):
+            e.sums[w] += amount
+            queue, head = e.queues[w], e.heads[w]
+            while len(queue) > head and amounts[queue[-1] % cap] <= amount:
+                queue.pop()
+            queue.append(seq)
+        features = self._aggregates(e)
+        self._evict(t)
+        return features
+
+    def features(self, entity, time: float) -> tuple:
+        """Window features of ``entity`` as of ``time``, without recording a
+        transaction; zeros for an unknown entity."""
+        e = self._entities.get(entity)
+        if e is None:
+            return (0.0,) * (len(AGGREGATES) * len(self._spans))
+        self._expire(e, max(time, e.last), self.config.capacity)
+        return self._aggregates(e)
+
+    def _evict(self, now: float):
+        config, entities = self.config, self._entities
+        idle_before = now - config.idle_seconds
+        while len(entities) > 1:
+            key, oldest = next(iter(entities.items()))
+            if oldest.last < idle_before:
+                self.evicted_idle += 1
+            elif len(entities) > config.max_entities or self.nbytes > config.max_bytes:
+                self.evicted_lru += 1
+            else:
+                break
+            del entities[key]
+            self.nbytes -= self._entity_bytes + 16 * len(oldest.times)
+
+    def stats(self) -> dict:
+        return {
+            "entities": len(self._entities),
+            "nbytes": self.nbytes,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+        }
+
+    def compute_bulk(self, times, amounts, entities=None) -> np.ndarray:
+        """Features of every row, replayed through ``update`` in ``Time`` order
+        (stable, so ties keep their input order). Rows come back in input order."""
+        try:
+            times = np.asarray(times, dtype=np.float64)
+            amounts = np.asarray(amounts, dtype=np.float64)
+            if entities is None:
+                entities = np.zeros(len(times), dtype=np.int64)
+            entities = np.asarray(entities)
+            if not len(times) == len(amounts) == len(entities):
+                raise ValueError("times, amounts and entities must have the same length")
+            order = np.argsort(times, kind="stable")
+            update = self.update
+            rows = [
+                update(entity, t, a)
+                for entity, t, a in zip(entities[order].tolist(), times[order].tolist(), amounts[order].tolist())
+            ]
+            out = np.empty((len(times), len(AGGREGATES) * len(self._spans)), dtype=np.float64)
+            if rows:
+                out[order] = np.array(rows, dtype=np.float64)
+            return out
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def add_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """``df`` with the window feature columns appended."""
+        entity_column = self.config.entity_column
+        entities = df[entity_column].to_numpy() if entity_column else None
+        values = self.compute_bulk(df["Time"].to_numpy(), df["Amount"].to_numpy(), entities)
+        return df.assign(**dict(zip(self.feature_names(), values.T)))
@@ -10,17 +10,28 @@ from src.logger import logging
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from src.utils.metrics import save_object
+from src.utils.data_store import read_array, read_table, table_path, write_table
+from src.preprocessing.feature_builder import list_shards, read_shard_columns, write_shard
+from src.preprocessing.streaming_stats import Reservoir, RunningMoments
+
+NUMERIC_SCALED_COLS = ["Time", "Amount"]
+
 
 @dataclass
 class ScalerConfig:
     scaler_object_path: str = os.path.join("artifacts", "scaler.pkl")
+    # Scaled matrices (target last) that downstream stages memory-map.
+    train_array_path: str = os.path.join("artifacts", "train_arr")
+    test_array_path: str = os.path.join("artifacts", "test_arr")
+    scaled_shard_dir: str = os.path.join("artifacts", "shards", "scaled")
+    median_sample_size: int = 100_000
 class Scaler:
     def __init__(self):
         self.scaler_config = ScalerConfig()
 
     def get_scaler_object(self, X: pd.DataFrame):
         try:
-            numeric_scaled_cols = ["Time", "Amount"]
+            numeric_scaled_cols = NUMERIC_SCALED_COLS
             pca_cols = [col for col in X.columns if col not in numeric_scaled_cols]
 
             logging.info(f"Scaling columns: {numeric_scaled_cols}")
@@ -46,8 +57,8 @@ class Scaler:
             raise CustomException(e, sys)
     def initiate_data_transformation(self, train_path, test_path):
         try:
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            train_df = read_table(train_path)
+            test_df = read_table(test_path)
             logging.info(f"Train columns: {train_df.columns.tolist()}")
             logging.info("Train and test data loaded")
 
@@ -76,6 +87,18 @@ class Scaler:
 
             logging.info("Preprocessing object saved")
 
+            # Keep the input's typed format and precision; legacy CSV input becomes npy.
+            data_format = os.path.splitext(train_path)[1].lstrip(".")
+            data_format = data_format if data_format in ("npy", "parquet") else "npy"
+            dtype = train_df.dtypes.iloc[0]
+            dtype = dtype if dtype in (np.float32, np.float64) else np.float64
+            columns = [*preprocessing_obj.get_feature_names_out(), target_column]
+            train_out = write_table(table_path(self.scaler_config.train_array_path, data_format), train_arr, columns, dtype)
+            test_out = write_table(table_path(self.scaler_config.test_array_path, data_format), test_arr, columns, dtype)
+            train_arr, _ = read_array(train_out)
+            test_arr, _ = read_array(test_out)
+            logging.info(f"Scaled arrays written to {train_out} and {test_out}")
+
             return (
                 train_arr,
                 test_arr,
@@ -84,3 +107,98 @@ class Scaler:
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def fit_streaming_statistics(self, train_dir, target_column="Class"):
+        """One pass over the train shards: NaN-aware running mean/variance and a
+        reservoir-sampled median for the scaled columns, in bounded memory."""
+        try:
+            columns = read_shard_columns(train_dir)
+            idx = [columns.index(c) for c in NUMERIC_SCALED_COLS]
+            moments = RunningMoments(len(idx))
+            reservoir = Reservoir(len(idx), capacity=self.scaler_config.median_sample_size)
+            n_missing = np.zeros(len(idx))
+
+            for path in list_shards(train_dir):
+                block = np.load(path, mmap_mode="r")[:, idx]
+                moments.update(block)
+                reservoir.update(block)
+                n_missing += np.isnan(block).sum(axis=0)
+
+            median = reservoir.median()
+            # SimpleImputer runs before StandardScaler, so missing values enter the
+            # scaler statistics as copies of the median.
+            moments.merge_moments(n_missing, median, np.zeros(len(idx)))
+            logging.info(
+                f"Streaming statistics over {int(moments.count[0])} rows | "
+                f"median={median.tolist()} mean={moments.mean.tolist()} var={moments.var.tolist()}"
+            )
+            return median, moments
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def build_fitted_scaler(self, columns, median, moments: RunningMoments, target_column="Class"):
+        """A ColumnTransformer identical in structure to ``get_scaler_object`` whose
+        fitted state comes from streamed statistics instead of a full ``fit``."""
+        try:
+            feature_cols = [c for c in columns if c != target_column]
+            template = pd.DataFrame(np.ones((2, len(feature_cols))), columns=feature_cols)
+            preprocessor = self.get_scaler_object(template)
+            preprocessor.fit(template)
+
+            num_pipeline = preprocessor.named_transformers_["num"]
+            imputer = num_pipeline.named_steps["imputer"]
+            scaler = num_pipeline.named_steps["scaler"]
+
+            imputer.statistics_ = np.asarray(median, dtype=np.float64)
+            scaler.mean_ = moments.mean.copy()
+            scaler.var_ = moments.var.copy()
+            scale = np.sqrt(scaler.var_)
+            scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+            scaler.scale_ = scale
+            scaler.n_samples_seen_ = moments.count.astype(np.int64)
+            return preprocessor
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_streaming_transformation(self, train_dir, test_dir, target_column="Class"):
+        """Fit imputer + scaler statistics incrementally from the train shards, then
+        write scaled ``.npy`` shards (target last, as in ``train_arr``) one shard at a
+        time. Peak memory is one shard regardless of dataset size."""
+        try:
+            columns = read_shard_columns(train_dir)
+            feature_cols = [c for c in columns if c != target_column]
+
+            median, moments = self.fit_streaming_statistics(train_dir, target_column)
+            preprocessing_obj = self.build_fitted_scaler(columns, median, moments, target_column)
+
+            save_object(
+                file_path=self.scaler_config.scaler_object_path,
+                obj=preprocessing_obj
+            )
+            logging.info("Preprocessing object saved")
+
+            output_dirs = []
+            for split, source_dir in (("train", train_dir), ("test", test_dir)):
+                out_dir = os.path.join(self.scaler_config.scaled_shard_dir, split)
+                os.makedirs(out_dir, exist_ok=True)
+                for old in list_shards(out_dir):
+                    os.remove(old)
+
+                for index, path in enumerate(list_shards(source_dir)):
+                    block = np.load(path, mmap_mode="r")
+                    X = pd.DataFrame(np.asarray(block[:, :-1]), columns=feature_cols)
+                    scaled = preprocessing_obj.transform(X)
+                    write_shard(out_dir, index, np.c_[scaled, block[:, -1]], [*preprocessing_obj.get_feature_names_out(), target_column])
+                output_dirs.append(out_dir)
+                logging.info(f"Scaled {split} shards written to {out_dir}")
+
+            return (
+                output_dirs[0],
+                output_dirs[1],
+                self.scaler_config.scaler_object_path
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,10 @@
+"""Column layout of a transaction, shared by training, serving and the benchmarks."""
+
+# Model input order: the raw columns of notebooks/eda_done_data.csv minus the target.
+FEATURE_COLS = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+
+
+def input_columns(preprocessor) -> list:
+    """Raw columns ``preprocessor`` was fitted on: FEATURE_COLS, plus the window
+    features when training added them (see feature_store.py)."""
+    return list(getattr(preprocessor, "feature_names_in_", FEATURE_COLS))
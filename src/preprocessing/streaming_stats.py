@@ -0,0 +1,91 @@
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.exception import CustomException
+
+
+@dataclass
+class RunningMoments:
+    """Per-column count/mean/M2 that can be updated chunk by chunk and merged
+    (Chan et al. parallel variance), ignoring NaNs."""
+
+    n_features: int
+    count: np.ndarray = field(default=None)
+    mean: np.ndarray = field(default=None)
+    m2: np.ndarray = field(default=None)
+
+    def __post_init__(self):
+        if self.count is None:
+            self.count = np.zeros(self.n_features, dtype=np.float64)
+            self.mean = np.zeros(self.n_features, dtype=np.float64)
+            self.m2 = np.zeros(self.n_features, dtype=np.float64)
+
+    @property
+    def var(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.m2 / self.count, 0.0)
+
+    def merge_moments(self, count, mean, m2):
+        count = np.asarray(count, dtype=np.float64)
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = np.asarray(mean, dtype=np.float64) - self.mean
+            new_mean = np.where(total > 0, self.mean + delta * count / total, 0.0)
+            new_m2 = np.where(total > 0, self.m2 + m2 + delta ** 2 * self.count * count / total, 0.0)
+        self.count, self.mean, self.m2 = total, new_mean, new_m2
+        return self
+
+    def merge(self, other: "RunningMoments"):
+        return self.merge_moments(other.count, other.mean, other.m2)
+
+    def update(self, X: np.ndarray):
+        try:
+            X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_features)
+            count = np.sum(~np.isnan(X), axis=0).astype(np.float64)
+            with np.errstate(invalid="ignore"):
+                mean = np.where(count > 0, np.nansum(X, axis=0) / np.maximum(count, 1), 0.0)
+                m2 = np.nansum((X - mean) ** 2, axis=0)
+            return self.merge_moments(count, mean, m2)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+class Reservoir:
+    """Fixed-size uniform sample per column (Algorithm R, vectorized per chunk),
+    used to estimate medians in bounded memory. NaNs are not sampled."""
+
+    def __init__(self, n_features: int, capacity: int = 100_000, random_state: int = 42):
+        self.capacity = capacity
+        self.samples = [np.empty(0, dtype=np.float64) for _ in range(n_features)]
+        self.seen = np.zeros(n_features, dtype=np.int64)
+        self.rng = np.random.default_rng(random_state)
+
+    def update(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.samples))
+        for j in range(X.shape[1]):
+            values = X[:, j][~np.isnan(X[:, j])]
+            sample = self.samples[j]
+
+            room = self.capacity - len(sample)
+            if room > 0:
+                sample = np.concatenate([sample, values[:room]])
+                self.seen[j] += min(room, len(values))
+                values = values[room:]
+
+            if len(values):
+                positions = self.seen[j] + np.arange(len(values))
+                keep = self.rng.random(len(values)) < self.capacity / (positions + 1)
+                slots = self.rng.integers(0, self.capacity, int(keep.sum()))
+                sample[slots] = values[keep]
+                self.seen[j] += len(values)
+
+            self.samples[j] = sample
+        return self
+
+    def quantile(self, q: float) -> np.ndarray:
+        return np.array([np.quantile(s, q) if len(s) else np.nan for s in self.samples])
+
+    def median(self) -> np.ndarray:
+        return self.quantile(0.5)
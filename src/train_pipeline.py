@@ -1,52 +1,166 @@
+import os
 import sys
+import numpy as np
 from src.exception import CustomException
 from src.logger import logging
 
-from src.preprocessing.feature_builder import DataIngestion
-from src.preprocessing.scaler import Scaler
-from src.models.evaluate import ModelEvaluation
+from src.preprocessing.feature_builder import DataIngestion, load_shards
+from src.preprocessing.feature_store import FeatureStoreConfig
+from src.preprocessing.scaler import Scaler, ScalerConfig
+from src.models.evaluate import ModelEvaluation, ModelEvaluationConfig, get_candidate_models
+from src.models.resample import Resampling, adjust_models, take_rows
+from src.models.search import holdout_split
+from src.models.compress import ForestCompression
+from src.models.threshold import DecisionPolicyConfig, DecisionThreshold
+from src.models.drift_reference import DriftReference
+from src.models.incremental import IncrementalTraining
+from src.inference.artifact_versions import publish_version
+from src.inference.artifact_bundle import export_from_pickles
+from src.utils.data_store import table_path
 
 
 class TrainPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, streaming: bool = False, incremental_data: str = None, search: str = None, resample: str = None,
+                 window_features: bool = False):
+        self.streaming = streaming
+        # A CSV of new transactions: update the current model instead of retraining.
+        self.incremental_data = incremental_data
+        # "halving" or "hyperband": tune the candidates before selecting one.
+        self.search = search
+        # "class_weight" (default), "undersample" or "smote".
+        self.resample = resample
+        # Add the feature store's Amount window features to the model inputs.
+        self.window_features = window_features
 
     def run(self):
         try:
             logging.info("Training pipeline started")
 
-            # 1. Data ingestion (your current feature builder)
-            ingestion = DataIngestion()
-            train_path, test_path = ingestion.initiate_data_ingestion()
+            if self.incremental_data:
+                entry = IncrementalTraining().initiate_incremental_training(self.incremental_data)
+                logging.info(f"Incremental training completed: {entry}")
+                return
 
-            logging.info("Data ingestion completed")
+            if self.streaming:
+                train_arr, test_arr = self._run_streaming_stages()
+            else:
+                # 1. Data ingestion (your current feature builder)
+                ingestion = self._ingestion()
+                train_path, test_path = ingestion.initiate_data_ingestion()
 
-            # 2. Scaling and preprocessing
-            scaler = Scaler()
-            train_arr, test_arr, scaler_path = scaler.initiate_data_transformation(
-                train_path,
-                test_path
-            )
+                logging.info("Data ingestion completed")
+
+                # 2. Scaling and preprocessing
+                scaler = Scaler()
+                train_arr, test_arr, scaler_path = scaler.initiate_data_transformation(
+                    train_path,
+                    test_path
+                )
 
             logging.info("Data transformation completed")
 
-            # 3. Model evaluation and selection
-            model_eval = ModelEvaluation()
+            # 3. Hold a stratified validation slice of train out of model fitting
+            # to tune the threshold and compress the forest on; test stays for
+            # selection and reporting
+            model_arr, val_arr = self._validation_split(train_arr)
+
+            # 4. Rebalance the training rows the final model is fitted on; later
+            # stages keep the original split. Every strategy is also compared
+            # on the validation rows for resampling_report.json
+            resampling = Resampling(self.resample)
+            fit_arr = resampling.initiate_resampling(model_arr, val_arr)
+            models = adjust_models(
+                get_candidate_models(ModelEvaluationConfig().random_state),
+                resampling.resampling_config.strategy
+            )
+
+            # 5. Model evaluation and selection; CV folds and the search's
+            # validation rows are cut from the original rows before resampling
+            model_eval = ModelEvaluation(models=models, search=self.search, resampling=resampling)
             best_model_name, best_model_score = model_eval.initiate_model_evaluation(
-                train_arr,
-                test_arr
+                model_arr,
+                test_arr,
+                fit_arr
             )
 
+            # 6. Tune the fraud threshold of the selected model on the held-out
+            # validation rows and report it on test
+            DecisionThreshold().initiate_threshold_tuning(val_arr, test_arr)
+
+            # 7. Compress the selected forest for serving
+            ForestCompression().initiate_forest_compression(val_arr, test_arr)
+
+            # 8. Baseline distributions for the API's drift monitor
+            DriftReference().initiate_drift_reference(train_arr, test_arr)
+
+            # 9. Pickle-free copy of the model and scaler for serving
+            artifacts_dir = os.path.dirname(ModelEvaluationConfig().best_model_path)
+            bundle_path = export_from_pickles(artifacts_dir)
+            logging.info(f"Serving bundle written to {bundle_path}")
+
+            # 10. Publish the serving files as a new version for hot reload. The
+            # API takes FEATURE_COLS rows without an entity history, so a model
+            # on window features stays an offline artifact
+            if self.window_features:
+                logging.info("Window-feature model not published: the API cannot compute its inputs")
+            else:
+                version = publish_version(artifacts_dir)
+                logging.info(f"Published artifact version {version}")
+
             logging.info(
                 f"Training completed | "
                 f"Best Model: {best_model_name} | "
+                f"Resampling: {resampling.resampling_config.strategy} | "
                 f"ROC AUC: {best_model_score}"
             )
 
         except Exception as e:
             raise CustomException(e, sys)
 
+    def _ingestion(self):
+        ingestion = DataIngestion()
+        if self.window_features:
+            ingestion.ingestion_config.feature_store = FeatureStoreConfig()
+        return ingestion
+
+    def _validation_split(self, train_arr):
+        """``(rows to fit on, validation rows)`` of the scaled train split. A
+        memory-mapped split (--streaming) is copied to memory-mapped files too."""
+        config = DecisionPolicyConfig()
+        fit_idx, val_idx = holdout_split(
+            train_arr[:, -1], config.validation_size, ModelEvaluationConfig().random_state
+        )
+        mapped = isinstance(train_arr, np.memmap)
+        model_arr = take_rows(train_arr, fit_idx, out_path=config.fit_array_path if mapped else None)
+        val_arr = take_rows(train_arr, val_idx, out_path=config.validation_array_path if mapped else None)
+        logging.info(f"Validation split: {len(fit_idx)} rows to fit on, {len(val_idx)} to tune on")
+        return model_arr, val_arr
+
+    def _run_streaming_stages(self):
+        # Split and scaling stay within one chunk of memory. The scaled shards
+        # are joined into memory-mapped train_arr/test_arr tables, so the later
+        # stages page rows in from disk instead of holding the dataset.
+        ingestion = self._ingestion()
+        train_dir, test_dir = ingestion.initiate_streaming_ingestion()
+        logging.info("Streaming data ingestion completed")
+
+        scaler = Scaler()
+        train_dir, test_dir, scaler_path = scaler.initiate_streaming_transformation(train_dir, test_dir)
+        logging.info("Streaming data transformation completed")
+
+        config = ScalerConfig()
+        return (
+            load_shards(train_dir, table_path(config.train_array_path, "npy")),
+            load_shards(test_dir, table_path(config.test_array_path, "npy"))
+        )
+
 
 if __name__ == "__main__":
-    pipeline = TrainPipeline()
+    incremental_data = sys.argv[sys.argv.index("--incremental") + 1] if "--incremental" in sys.argv else None
+    search = sys.argv[sys.argv.index("--search") + 1] if "--search" in sys.argv else None
+    resample = sys.argv[sys.argv.index("--resample") + 1] if "--resample" in sys.argv else None
+    pipeline = TrainPipeline(
+        streaming="--streaming" in sys.argv, incremental_data=incremental_data, search=search, resample=resample,
+        window_features="--window-features" in sys.argv
+    )
     pipeline.run()
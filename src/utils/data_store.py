@@ -0,0 +1,99 @@
+"""Typed columnar tables for moving data between training stages.
+
+The file extension picks the format:
+
+* ``.npy`` - one dense C-ordered matrix plus a ``<name>.schema.json`` sidecar
+  with column names, dtype and row count. Read back with ``mmap_mode="r"``, so
+  downstream stages map the file zero-copy instead of re-parsing text.
+* ``.parquet`` - Arrow/Parquet via ``pyarrow`` (optional dependency).
+* ``.csv`` - export/legacy input only; never used between stages.
+"""
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+
+STAGE_FORMATS = ("npy", "parquet")
+FLOAT_DTYPES = ("float64", "float32")
+
+
+def schema_path(path):
+    return os.path.splitext(path)[0] + ".schema.json"
+
+
+def table_path(base_path, data_format):
+    """``artifacts/train`` + ``npy`` -> ``artifacts/train.npy``."""
+    return f"{os.path.splitext(base_path)[0]}.{data_format}"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet tables need pyarrow: pip install pyarrow") from e
+
+
+def write_table(path, data, columns=None, dtype="float64"):
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if isinstance(data, pd.DataFrame):
+            columns = list(data.columns)
+            arr = data.to_numpy(dtype=dtype)
+        else:
+            arr = np.asarray(data, dtype=dtype)
+            columns = list(columns)
+
+        ext = os.path.splitext(path)[1]
+        if ext == ".npy":
+            np.save(path, np.ascontiguousarray(arr))
+            with open(schema_path(path), "w") as f:
+                json.dump({"columns": columns, "dtype": str(arr.dtype), "rows": int(arr.shape[0])}, f)
+        elif ext == ".parquet":
+            _require_pyarrow()
+            pd.DataFrame(arr, columns=columns, copy=False).to_parquet(path, index=False)
+        elif ext == ".csv":
+            pd.DataFrame(arr, columns=columns, copy=False).to_csv(path, index=False)
+        else:
+            raise ValueError(f"Unsupported table format: {path}")
+        return path
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_array(path, mmap=True):
+    """Return ``(matrix, columns)``; ``.npy`` tables come back memory-mapped."""
+    try:
+        ext = os.path.splitext(path)[1]
+        if ext == ".npy":
+            with open(schema_path(path)) as f:
+                schema = json.load(f)
+            return np.load(path, mmap_mode="r" if mmap else None), schema["columns"]
+        if ext == ".parquet":
+            _require_pyarrow()
+            df = pd.read_parquet(path)
+        elif ext == ".csv":
+            df = pd.read_csv(path)
+        else:
+            raise ValueError(f"Unsupported table format: {path}")
+        return df.to_numpy(), list(df.columns)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_table(path, mmap=True):
+    arr, columns = read_array(path, mmap=mmap)
+    return pd.DataFrame(arr, columns=columns, copy=False)
+
+
+def footprint(path):
+    """Bytes on disk for a table including its sidecar."""
+    total = os.path.getsize(path)
+    if os.path.exists(schema_path(path)) and path.endswith(".npy"):
+        total += os.path.getsize(schema_path(path))
+    return total
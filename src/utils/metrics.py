@@ -1,5 +1,3 @@
-from sklearn.model_selection import StratifiedKFold, GridSearchCV
-from sklearn.metrics import roc_auc_score
 import sys
 import pickle 
 import os
@@ -7,42 +5,74 @@ import numpy as np
 import pandas as pd
 
 from src.exception import CustomException
+
+# SHA-256 of every pickle this process wrote, by absolute path: the pipeline may
+# read back what it saved itself without the FRAUDSHIELD_ALLOW_PICKLE opt-in.
+_WRITTEN = {}
+
+
+def pickle_allowed():
+    """True when FRAUDSHIELD_ALLOW_PICKLE=1, the opt-in the API also honours."""
+    return os.getenv("FRAUDSHIELD_ALLOW_PICKLE", "0") == "1"
+
+
 def save_object(file_path, obj):
     try:
+        from src.inference.artifact_bundle import sha256_file
+
         dir_path = os.path.dirname(file_path)
 
         os.makedirs(dir_path, exist_ok=True)
 
         with open(file_path, "wb") as file_obj:
             pickle.dump(obj, file_obj)
+        _WRITTEN[os.path.abspath(file_path)] = sha256_file(file_path)
 
     except Exception as e:
         raise CustomException(e, sys)
 
 def evaluate_models(X_train, y_train, X_test, y_test, models):
-    report = {}
-    trained_models = {}
-
-    for name, model in models.items():
-        try:
-            model.fit(X_train, y_train)
-            if hasattr(model, "predict_proba"):
-                y_test_prob = model.predict_proba(X_test)[:, 1]
-            else:
-                y_test_prob = model.decision_function(X_test)
+    """Thin wrapper over ``ModelEvaluation.evaluate``: parallel, cached fits.
+    Returns ``({name: test ROC AUC or -1}, {name: fitted model})``."""
+    from src.models.evaluate import ModelEvaluation
 
-            score = roc_auc_score(y_test, y_test_prob)
+    summary, trained_models = ModelEvaluation().evaluate(X_train, y_train, X_test, y_test, models)
+    report = {
+        name: (result["test_roc_auc"] if name in trained_models else -1)
+        for name, result in summary.items()
+    }
+    return report, trained_models
 
-            report[name] = score
-            trained_models[name] = model
+def _load_from_bundle(file_path):
+    """The model or scaler saved as ``file_path`` (``best_model.pkl`` or
+    ``scaler.pkl``), rebuilt from the ``bundle/`` next to it without unpickling.
+    None when there is no bundle exported from this exact file. Only the
+    manifest is read before the staleness check, and only the requested
+    member's payloads are verified and loaded."""
+    from src.inference.artifact_bundle import (
+        BUNDLE_DIR, MANIFEST, MEMBERS, BundleError, load_bundle_member, read_manifest, sha256_file,
+    )
 
-        except Exception as e:
-            report[name] = -1
-            print(f"Model {name} failed: {e}")
+    name = os.path.basename(file_path)
+    bundle_dir = os.path.join(os.path.dirname(file_path), BUNDLE_DIR)
+    if name not in MEMBERS or not os.path.exists(os.path.join(bundle_dir, MANIFEST)):
+        return None
+    try:
+        manifest = read_manifest(bundle_dir, verify=False)
+        # A bundle exported before the pickle was rewritten describes an older model.
+        if manifest["sources"].get(name) != sha256_file(file_path):
+            return None
+        return load_bundle_member(bundle_dir, MEMBERS[name], manifest=manifest)
+    except BundleError:
+        return None
 
-    return report, trained_models
 
-def load_object(file_path):
+def load_object(file_path, from_bundle=True, allow_pickle=None):
+    """Load a saved object. ``best_model.pkl`` and ``scaler.pkl`` come from the
+    pickle-free bundle when one was exported from them. Anything else is
+    unpickled only if this process wrote that exact file with ``save_object``,
+    or with ``allow_pickle`` (default: ``pickle_allowed()``); otherwise a
+    ``PermissionError`` is raised."""
     try:
         if not os.path.isabs(file_path):
             BASE_DIR = os.path.abspath(
@@ -50,6 +80,24 @@ def load_object(file_path):
             )
             file_path = os.path.join(BASE_DIR, file_path)
 
+        if from_bundle:
+            obj = _load_from_bundle(file_path)
+            if obj is not None:
+                return obj
+
+        if allow_pickle is None:
+            allow_pickle = pickle_allowed()
+        if not allow_pickle:
+            from src.inference.artifact_bundle import sha256_file
+
+            written = _WRITTEN.get(os.path.abspath(file_path))
+            if written is None or written != sha256_file(file_path):
+                raise PermissionError(
+                    f"Refusing to unpickle {file_path}: no matching artifact bundle. Export one with "
+                    "`FRAUDSHIELD_ALLOW_PICKLE=1 python -m src.inference.artifact_bundle` "
+                    "or set FRAUDSHIELD_ALLOW_PICKLE=1 for trusted pickles"
+                )
+
         with open(file_path, "rb") as file_obj:
             return pickle.load(file_obj)
 
@@ -0,0 +1,97 @@
+import json
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from imblearn.ensemble import BalancedRandomForestClassifier
+
+from src.inference.artifact_bundle import BUNDLE_DIR, MANIFEST, BundleError, export_from_pickles, load_artifact_bundle
+from src.preprocessing.scaler import Scaler
+from src.preprocessing.schema import FEATURE_COLS
+from src.exception import CustomException
+from src.utils import metrics
+from src.utils.metrics import load_object, save_object
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(0.0, 1.5, size=(1_000, len(FEATURE_COLS)))
+    X[:, 0] = rng.uniform(1.0, 172_792.0, len(X))
+    X[:, -1] = np.round(rng.lognormal(3.0, 1.5, len(X)), 2)
+    y = (X[:, 1] - X[:, 3] > 2.0).astype(int)
+    frame = pd.DataFrame(X, columns=FEATURE_COLS)
+    preprocessor = Scaler().get_scaler_object(frame).fit(frame)
+    model = BalancedRandomForestClassifier(
+        n_estimators=10, max_depth=6, sampling_strategy="all", replacement=True, bootstrap=False, random_state=0,
+    ).fit(preprocessor.transform(frame), y)
+    save_object(str(tmp_path / "best_model.pkl"), model)
+    save_object(str(tmp_path / "scaler.pkl"), preprocessor)
+    export_from_pickles(tmp_path)
+    return tmp_path, frame
+
+
+def test_load_object_reads_the_bundle_instead_of_unpickling(artifacts, monkeypatch):
+    path, frame = artifacts
+    with open(path / "best_model.pkl", "rb") as f:
+        pickled = pickle.load(f)
+
+    def refuse(*_args, **_kwargs):
+        raise AssertionError("unpickled although a matching bundle exists")
+
+    monkeypatch.setattr(pickle, "load", refuse)
+    model = load_object(str(path / "best_model.pkl"))
+    X = load_object(str(path / "scaler.pkl")).transform(frame)
+    np.testing.assert_array_equal(model.predict_proba(X), pickled.predict_proba(X))
+
+
+def test_load_object_unpickles_when_the_bundle_is_stale(artifacts):
+    path, _ = artifacts
+    model = load_object(str(path / "best_model.pkl"))
+    model.set_params(n_jobs=2)
+    save_object(str(path / "best_model.pkl"), model)
+    # Rebuilding from the bundle would lose the n_jobs the new pickle carries.
+    assert load_object(str(path / "best_model.pkl")).n_jobs == 2
+
+
+def test_payload_missing_from_the_manifest_is_rejected(artifacts):
+    path, _ = artifacts
+    bundle = path / BUNDLE_DIR
+    manifest = json.loads((bundle / MANIFEST).read_text())
+    del manifest["files"]["values.npy"]
+    (bundle / MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(BundleError, match="values.npy"):
+        load_artifact_bundle(bundle)
+
+
+def test_pickle_without_a_bundle_needs_the_opt_in(artifacts, monkeypatch):
+    path, _ = artifacts
+    (path / "other.pkl").write_bytes((path / "scaler.pkl").read_bytes())
+    monkeypatch.delenv("FRAUDSHIELD_ALLOW_PICKLE", raising=False)
+    with pytest.raises(CustomException, match="Refusing to unpickle"):
+        load_object(str(path / "other.pkl"))
+    monkeypatch.setenv("FRAUDSHIELD_ALLOW_PICKLE", "1")
+    assert load_object(str(path / "other.pkl")) is not None
+
+
+def test_stale_bundle_written_elsewhere_is_not_unpickled(artifacts, monkeypatch):
+    path, _ = artifacts
+    monkeypatch.delenv("FRAUDSHIELD_ALLOW_PICKLE", raising=False)
+    model = load_object(str(path / "best_model.pkl"))
+    model.set_params(n_jobs=2)
+    save_object(str(path / "best_model.pkl"), model)
+    # As if another process had rewritten the pickle after the export.
+    monkeypatch.setattr(metrics, "_WRITTEN", {})
+    with pytest.raises(CustomException, match="Refusing to unpickle"):
+        load_object(str(path / "best_model.pkl"))
+
+
+def test_load_object_only_reads_the_requested_member(artifacts, monkeypatch):
+    path, frame = artifacts
+    monkeypatch.delenv("FRAUDSHIELD_ALLOW_PICKLE", raising=False)
+    monkeypatch.setattr(metrics, "_WRITTEN", {})
+    # A corrupt model payload must not stop the scaler from loading.
+    (path / BUNDLE_DIR / "values.npy").write_bytes(b"corrupt")
+    scaler = load_object(str(path / "scaler.pkl"))
+    assert scaler.transform(frame).shape == frame.shape
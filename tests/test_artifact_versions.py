@@ -0,0 +1,144 @@
+import asyncio
+import importlib
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from imblearn.ensemble import BalancedRandomForestClassifier
+
+from src.inference.artifact_bundle import export_from_pickles, sha256_file
+from src.inference.artifact_versions import (
+    current_version, list_versions, pin_version, pinned_versions, publish_version, set_current, unpin_version, version_path,
+)
+from src.inference.decision_policy import DecisionPolicy, save_policy
+from src.inference.forest_kernel import compile_pipeline
+from src.inference.forest_store import COMPRESSED_NAME, FOREST_NAME, read_header, save_compiled, serving_path
+from src.models.compress import ForestCompressionConfig, compress_forest
+from src.preprocessing.scaler import Scaler
+from src.preprocessing.schema import FEATURE_COLS
+from src.utils.metrics import load_object, save_object
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(0.0, 1.5, size=(600, len(FEATURE_COLS)))
+    y = (X[:, 1] - X[:, 3] > 2.0).astype(int)
+    frame = pd.DataFrame(X, columns=FEATURE_COLS)
+    preprocessor = Scaler().get_scaler_object(frame).fit(frame)
+    model = BalancedRandomForestClassifier(
+        n_estimators=20, max_depth=6, sampling_strategy="all", replacement=True, bootstrap=False, random_state=0,
+    ).fit(preprocessor.transform(frame), y)
+    path = tmp_path / "artifacts"
+    save_object(str(path / "best_model.pkl"), model)
+    save_object(str(path / "scaler.pkl"), preprocessor)
+    export_from_pickles(path)
+    return path, preprocessor.transform(frame), y
+
+
+def compress_into(path, X, y, model_sha256):
+    pipeline = compile_pipeline(load_object(str(path / "scaler.pkl")), load_object(str(path / "best_model.pkl")),
+                                FEATURE_COLS)
+    config = ForestCompressionConfig(min_trees=2, auc_tolerance=0.05)
+    forest, _ = compress_forest(pipeline.forest, X, y, config)
+    save_compiled(type(pipeline)(scaler=pipeline.scaler, forest=forest), path / COMPRESSED_NAME, model_sha256)
+
+
+def test_published_version_serves_its_compressed_forest(artifacts):
+    path, X, y = artifacts
+    compress_into(path, X, y, sha256_file(path / "best_model.pkl"))
+    root = path / "versions"
+    version = publish_version(path, root)
+    source = version_path(root, version)
+    served = serving_path(source, version)
+    assert served == source / COMPRESSED_NAME
+    assert read_header(served)["model_sha256"] == sha256_file(source / "best_model.pkl")
+    assert json.loads((source / "serving.json").read_text())["forest"] == COMPRESSED_NAME
+
+
+def test_compressed_forest_of_another_model_is_not_served(artifacts):
+    path, X, y = artifacts
+    compress_into(path, X, y, "0" * 64)
+    root = path / "versions"
+    version = publish_version(path, root)
+    assert serving_path(version_path(root, version), version).name == FOREST_NAME
+
+
+@pytest.mark.parametrize("tuned_for_served_model", [True, False])
+def test_shared_model_policy_is_checked_against_the_served_forest(artifacts, monkeypatch, tuned_for_served_model):
+    app = importlib.import_module("dev.backend.app")
+    path, X, y = artifacts
+    model_sha256 = sha256_file(path / "best_model.pkl")
+    compress_into(path, X, y, model_sha256)
+    policy = DecisionPolicy.from_threshold(0.3, model_sha256=model_sha256 if tuned_for_served_model else "0" * 64)
+    save_policy(policy, str(path / "decision_policy.json"))
+    root = path / "versions"
+    version = publish_version(path, root)
+    monkeypatch.setattr(app, "SHARED_MODEL", True)
+    bundle = app._load_bundle(version_path(root, version), version)
+    assert bundle.kernel.forest.n_trees < 20
+    assert bundle.policy.threshold == (0.3 if tuned_for_served_model else DecisionPolicy().threshold)
+
+
+_distinct = itertools.count(1)
+
+
+def publish_n(path, root, n, **kwargs):
+    """Publish ``n`` versions, each from a distinct model pickle."""
+    model = load_object(str(path / "best_model.pkl"))
+    versions = []
+    for _ in range(n):
+        save_object(str(path / "best_model.pkl"), model.set_params(n_jobs=next(_distinct)))
+        versions.append(publish_version(path, root, keep=2, export_forest=False, **kwargs))
+    return versions
+
+
+def test_pruning_keeps_the_newest_versions(artifacts):
+    path, _, _ = artifacts
+    root = path / "versions"
+    versions = publish_n(path, root, 4)
+    assert list_versions(root) == sorted(versions[-2:])
+    assert current_version(root) == versions[-1]
+
+
+def test_pruning_spares_pinned_excluded_and_rolled_back_versions(artifacts):
+    path, _, _ = artifacts
+    root = path / "versions"
+    first, second, third = publish_n(path, root, 3)
+    assert first not in list_versions(root)
+    pin_version(root, second)
+    pin_version(root, second)
+    set_current(root, third)
+    fourth, fifth, sixth = publish_n(path, root, 3, exclude={third})
+    assert set(list_versions(root)) == {second, third, fifth, sixth}
+
+    # A rollback: CURRENT points back at an old version when the next one is published.
+    set_current(root, second)
+    unpin_version(root, second)
+    seventh, = publish_n(path, root, 1)
+    assert second in list_versions(root)
+    unpin_version(root, second)
+    eighth, = publish_n(path, root, 1)
+    assert set(list_versions(root)) == {seventh, eighth}
+
+
+def test_explicit_reload_pins_the_version_until_the_api_follows_current(artifacts, monkeypatch):
+    app = importlib.import_module("dev.backend.app")
+    path, _, _ = artifacts
+    root = path / "versions"
+    old, new = publish_n(path, root, 2)
+    monkeypatch.setattr(app, "VERSIONS_DIR", root)
+    monkeypatch.setattr(app, "_bundle", None)
+    monkeypatch.setattr(app, "_reload_pin", None)
+
+    async def scenario():
+        monkeypatch.setattr(app, "_reload_lock", asyncio.Lock())
+        await app.reload_model(old)
+        pinned = pinned_versions(root)
+        await app.reload_model()
+        return pinned
+
+    assert asyncio.run(scenario()) == [old]
+    assert pinned_versions(root) == [] and app._bundle.version == new
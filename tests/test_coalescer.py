@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from src.inference.coalescer import MicroBatcher
+
+
+def score(X):
+    return X[:, 0] > 0, X[:, 0], "model"
+
+
+def test_rows_within_the_deadline_are_scored_as_one_batch():
+    async def scenario():
+        batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50.0)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(np.array([[float(i)]])) for i in range(5)))
+        await batcher.stop()
+        return results, batcher.stats
+
+    results, stats = asyncio.run(scenario())
+    assert [r[1] for r in results] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert stats.batches == 1 and stats.rows == 5
+
+
+def test_stop_fails_the_batch_being_scored_and_the_queued_rows():
+    release = threading.Event()
+
+    def slow_score(X):
+        release.wait(5.0)
+        return score(X)
+
+    async def scenario():
+        batcher = MicroBatcher(slow_score, max_batch_size=2, max_wait_ms=1.0)
+        await batcher.start()
+        in_flight = [asyncio.ensure_future(batcher.submit(np.array([[1.0]]))) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(batcher.submit(np.array([[2.0]])))
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*in_flight, queued, return_exceptions=True), 1.0)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_submit_after_stop_is_refused():
+    async def scenario():
+        batcher = MicroBatcher(score)
+        await batcher.start()
+        await batcher.stop()
+        with pytest.raises(RuntimeError, match="not running"):
+            await batcher.submit(np.array([[1.0]]))
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.inference.explain import PathExplainer
+from src.inference.forest_kernel import AffineScaler, CompiledPipeline, compile_forest, compile_pipeline
+from src.inference.forest_store import load_compiled, save_compiled
+from src.models.compress import ForestCompressionConfig, compress_forest
+from src.preprocessing.scaler import Scaler
+from src.preprocessing.schema import FEATURE_COLS
+
+N_FEATURES = 4
+
+
+def identity_scaler(n_features):
+    return AffineScaler(
+        input_features=tuple(f"x{j}" for j in range(n_features)), column_index=np.arange(n_features),
+        fill=np.full(n_features, np.nan), offset=np.zeros(n_features), scale=np.ones(n_features),
+    )
+
+
+def conditional_expectation(forest, root, x, coalition):
+    """E[tree(x) | x_S] the path-dependent way: splits on features outside
+    ``coalition`` follow both children, weighted by their training cover."""
+    def walk(node):
+        left, right = forest.children[node]
+        if left == node:
+            return forest.value[node]
+        if forest.feature[node] in coalition:
+            return walk(right if x[forest.feature[node]] > forest.threshold[node] else left)
+        return (forest.cover[left] * walk(left) + forest.cover[right] * walk(right)) / forest.cover[node]
+    return walk(root)
+
+
+def brute_force_shap(forest, x):
+    n = forest.n_features
+    phi = np.zeros(n)
+    for root in forest.roots:
+        for i in range(n):
+            others = [j for j in range(n) if j != i]
+            for size in range(n):
+                weight = factorial(size) * factorial(n - size - 1) / factorial(n)
+                for subset in combinations(others, size):
+                    with_i = conditional_expectation(forest, root, x, {*subset, i})
+                    without = conditional_expectation(forest, root, x, set(subset))
+                    phi[i] += weight * (with_i - without)
+    return phi / forest.n_trees
+
+
+@pytest.fixture(scope="module")
+def small_forest():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, N_FEATURES))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + 0.3 * rng.normal(size=400) > 0.5).astype(int)
+    model = RandomForestClassifier(n_estimators=5, max_depth=6, random_state=0).fit(X, y)
+    return CompiledPipeline(scaler=identity_scaler(N_FEATURES), forest=compile_forest(model)), X
+
+
+def test_matches_brute_force_shapley_values(small_forest):
+    pipeline, X = small_forest
+    explainer = PathExplainer(pipeline, [f"x{j}" for j in range(N_FEATURES)])
+    rows = X[:6]
+    got = explainer.contributions(rows)
+    expected = np.array([brute_force_shap(pipeline.forest, x.astype(np.float32)) for x in rows])
+    np.testing.assert_allclose(got, expected, atol=1e-12)
+
+
+def test_base_value_plus_contributions_is_the_probability(small_forest):
+    pipeline, X = small_forest
+    explainer = PathExplainer(pipeline, [f"x{j}" for j in range(N_FEATURES)])
+    gap = explainer.contributions(X).sum(axis=1) + explainer.base_value - pipeline.predict_proba(X)[:, 1]
+    assert np.abs(gap).max() < 1e-12
+
+
+def test_compressed_and_stored_forests_keep_their_cover(tmp_path):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(2_000, len(FEATURE_COLS)))
+    y = (X[:, 1] - X[:, 3] > 1.5).astype(int)
+    frame = pd.DataFrame(X, columns=FEATURE_COLS)
+    preprocessor = Scaler().get_scaler_object(frame).fit(frame)
+    model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0).fit(preprocessor.transform(frame), y)
+    pipeline = compile_pipeline(preprocessor, model, FEATURE_COLS)
+    forest, _ = compress_forest(
+        pipeline.forest, preprocessor.transform(frame), y, ForestCompressionConfig(min_trees=5, auc_tolerance=0.01)
+    )
+    path = save_compiled(CompiledPipeline(scaler=pipeline.scaler, forest=forest), tmp_path / "forest.bin")
+    stored = load_compiled(path)
+    explainer = PathExplainer(stored, FEATURE_COLS)
+    gap = explainer.contributions(X[:50]).sum(axis=1) + explainer.base_value - stored.predict_proba(X[:50])[:, 1]
+    # float32 node values and cover.
+    assert np.abs(gap).max() < 1e-5
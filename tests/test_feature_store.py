@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessing.feature_builder import DataIngestion
+from src.preprocessing.feature_store import FeatureStore, FeatureStoreConfig
+from src.utils.data_store import read_table
+
+
+def brute_force(times, amounts, entities, config):
+    """Window features of every row (input order) straight from the raw rows."""
+    order = np.argsort(times, kind="stable")
+    out = np.empty((len(times), 4 * len(config.windows)))
+    for pos, i in enumerate(order):
+        earlier = order[: pos + 1]
+        same = earlier[entities[earlier] == entities[i]][-config.capacity:]
+        row = []
+        for span in config.windows:
+            values = amounts[same[times[same] > times[i] - span]]
+            row += [len(values), values.sum(), values.mean(), values.max()]
+        out[i] = row
+    return out
+
+
+@pytest.fixture
+def transactions():
+    rng = np.random.default_rng(0)
+    n = 400
+    times = np.round(rng.uniform(0.0, 2_000.0, n), 1)
+    amounts = np.round(rng.lognormal(3.0, 1.0, n), 2)
+    entities = rng.integers(0, 7, n)
+    return times, amounts, entities
+
+
+def test_bulk_features_match_a_brute_force_recomputation(transactions):
+    times, amounts, entities = transactions
+    config = FeatureStoreConfig(windows=(60.0, 600.0), capacity=16)
+    got = FeatureStore(config).compute_bulk(times, amounts, entities)
+    np.testing.assert_allclose(got, brute_force(times, amounts, entities, config), rtol=1e-12, atol=1e-9)
+
+
+def test_online_updates_give_the_bulk_values(transactions):
+    times, amounts, entities = transactions
+    config = FeatureStoreConfig(windows=(60.0, 600.0), capacity=16)
+    bulk = FeatureStore(config).compute_bulk(times, amounts, entities)
+    store = FeatureStore(config)
+    for i in np.argsort(times, kind="stable"):
+        assert store.update(int(entities[i]), times[i], amounts[i]) == tuple(bulk[i])
+
+
+def test_rows_are_one_entity_unless_an_entity_column_is_set(transactions):
+    times, amounts, entities = transactions
+    frame = pd.DataFrame({"Time": times, "Amount": amounts, "card": entities})
+    config = FeatureStoreConfig(windows=(600.0,))
+    single = FeatureStore(config).add_features(frame)
+    np.testing.assert_array_equal(
+        single["amount_count_600s"], brute_force(times, amounts, np.zeros(len(times)), config)[:, 0]
+    )
+    config = FeatureStoreConfig(windows=(600.0,), entity_column="card")
+    per_card = FeatureStore(config).add_features(frame)
+    assert (per_card["amount_count_600s"] < single["amount_count_600s"]).any()
+    np.testing.assert_array_equal(per_card["amount_count_600s"], brute_force(times, amounts, entities, config)[:, 0])
+
+
+def test_idle_entities_are_evicted_and_start_over():
+    store = FeatureStore(FeatureStoreConfig(windows=(10.0,), idle_seconds=10.0))
+    store.update("a", 0.0, 5.0)
+    store.update("a", 1.0, 7.0)
+    store.update("b", 50.0, 1.0)
+    assert len(store) == 1 and store.stats()["evicted_idle"] == 1
+    assert store.features("a", 50.0) == (0.0, 0.0, 0.0, 0.0)
+    assert store.update("a", 51.0, 3.0) == (1.0, 3.0, 3.0, 3.0)
+
+
+def test_memory_limits_drop_the_least_recently_used_entity():
+    config = FeatureStoreConfig(windows=(1e9,), max_entities=3)
+    store = FeatureStore(config)
+    for t, entity in enumerate("abcad"):
+        store.update(entity, float(t), 1.0)
+    # "b" is the least recently updated once "a" came back.
+    assert len(store) == 3 and store.features("b", 5.0)[0] == 0.0
+    assert store.features("a", 5.0)[0] == 2.0
+
+    one_entity = FeatureStore(config)
+    one_entity.update("a", 0.0, 1.0)
+    budget = FeatureStore(FeatureStoreConfig(windows=(1e9,), max_bytes=one_entity.nbytes * 2))
+    for t in range(10):
+        budget.update(t, float(t), 1.0)
+    assert budget.nbytes <= budget.config.max_bytes and budget.stats()["evicted_lru"] == 8
+
+
+def test_ingestion_adds_window_features_before_the_split(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    n = 300
+    frame = pd.DataFrame({"Time": np.sort(rng.uniform(0.0, 5_000.0, n)), "V1": rng.normal(size=n),
+                          "Amount": rng.lognormal(3.0, 1.0, n), "card": rng.integers(0, 5, n),
+                          "Class": (rng.random(n) < 0.2).astype(int)})
+    (tmp_path / "notebooks").mkdir()
+    frame.to_csv(tmp_path / "notebooks" / "eda_done_data.csv", index=False)
+    monkeypatch.chdir(tmp_path)
+
+    ingestion = DataIngestion()
+    config = FeatureStoreConfig(windows=(600.0,), entity_column="card")
+    ingestion.ingestion_config.feature_store = config
+    train_path, test_path = ingestion.initiate_data_ingestion()
+    train, test = read_table(train_path), read_table(test_path)
+
+    names = FeatureStore(config).feature_names()
+    assert list(train.columns) == ["Time", "V1", "Amount", *names, "Class"]
+    # Every row sees the history of the whole dataset, whichever split it lands in.
+    expected = FeatureStore(config).add_features(frame)[names].to_numpy()
+    both = pd.concat([train, test]).sort_values("Time")[names].to_numpy()
+    np.testing.assert_allclose(both, expected)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from imblearn.ensemble import BalancedRandomForestClassifier
+
+from src.inference.forest_kernel import compile_pipeline
+from src.preprocessing.scaler import NUMERIC_SCALED_COLS, Scaler
+from src.preprocessing.schema import FEATURE_COLS
+
+TOLERANCE = 1e-9
+
+
+def _raw_rows(n_rows, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0.0, 1.5, size=(n_rows, len(FEATURE_COLS)))
+    X[:, FEATURE_COLS.index("Time")] = rng.uniform(1.0, 172_792.0, n_rows)
+    X[:, FEATURE_COLS.index("Amount")] = np.round(rng.lognormal(3.0, 1.5, n_rows), 2)
+    return X
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    X = _raw_rows(3_000, seed=0)
+    y = (X[:, 1] - X[:, 3] + 0.5 * np.log(X[:, -1] + 1) + np.random.default_rng(1).normal(0, 1, len(X)) > 2.5)
+    frame = pd.DataFrame(X, columns=FEATURE_COLS)
+    # Missing values in the imputed columns during fit, as in the raw data.
+    frame.loc[::97, "Amount"] = np.nan
+    frame.loc[::89, "Time"] = np.nan
+    preprocessor = Scaler().get_scaler_object(frame).fit(frame)
+    model = BalancedRandomForestClassifier(
+        n_estimators=25, max_depth=8, sampling_strategy="all", replacement=True, bootstrap=False, random_state=0
+    ).fit(preprocessor.transform(frame), y.astype(int))
+    return preprocessor, model, compile_pipeline(preprocessor, model, FEATURE_COLS)
+
+
+def _sklearn_proba(preprocessor, model, X):
+    return model.predict_proba(preprocessor.transform(pd.DataFrame(X, columns=FEATURE_COLS)))
+
+
+def test_matches_sklearn_on_random_rows(fitted):
+    preprocessor, model, kernel = fitted
+    X = _raw_rows(2_000, seed=2)
+    np.testing.assert_allclose(kernel.predict_proba(X), _sklearn_proba(preprocessor, model, X), rtol=0, atol=TOLERANCE)
+    np.testing.assert_array_equal(kernel.predict(X), model.predict(preprocessor.transform(pd.DataFrame(X, columns=FEATURE_COLS))))
+
+
+def test_imputes_missing_scaled_columns_like_sklearn(fitted):
+    preprocessor, model, kernel = fitted
+    X = _raw_rows(500, seed=3)
+    for i, column in enumerate(NUMERIC_SCALED_COLS):
+        X[i::3, FEATURE_COLS.index(column)] = np.nan
+    X[2::5, [FEATURE_COLS.index(c) for c in NUMERIC_SCALED_COLS]] = np.nan
+    np.testing.assert_allclose(kernel.predict_proba(X), _sklearn_proba(preprocessor, model, X), rtol=0, atol=TOLERANCE)
+
+
+def test_float32_threshold_ties(fitted):
+    preprocessor, model, kernel = fitted
+    # Put passthrough features exactly on (and one float32 step either side of)
+    # the split thresholds; sklearn sends ``x <= threshold`` in float32 left.
+    passthrough = [FEATURE_COLS.index(c) for c in FEATURE_COLS if c not in NUMERIC_SCALED_COLS]
+    rows = []
+    base = _raw_rows(1, seed=4)[0]
+    for estimator in model.estimators_[:5]:
+        tree = estimator.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            raw = int(kernel.scaler.column_index[tree.feature[node]])
+            if raw not in passthrough:
+                continue
+            tie = np.float32(tree.threshold[node])
+            for value in (np.nextafter(tie, np.float32(-np.inf)), tie, np.nextafter(tie, np.float32(np.inf))):
+                row = base.copy()
+                row[raw] = value
+                rows.append(row)
+    X = np.asarray(rows)
+    assert len(X) > 0
+    np.testing.assert_allclose(kernel.predict_proba(X), _sklearn_proba(preprocessor, model, X), rtol=0, atol=TOLERANCE)
+
+
+def test_single_row_input(fitted):
+    preprocessor, model, kernel = fitted
+    X = _raw_rows(20, seed=5)
+    for row in X:
+        expected = _sklearn_proba(preprocessor, model, row.reshape(1, -1))
+        np.testing.assert_allclose(kernel.predict_proba(row.reshape(1, -1)), expected, rtol=0, atol=TOLERANCE)
+        # A 1-D row is treated as one transaction.
+        np.testing.assert_allclose(kernel.predict_proba(row), expected, rtol=0, atol=TOLERANCE)
@@ -0,0 +1,133 @@
+import asyncio
+import dataclasses
+import importlib
+import shutil
+
+import numpy as np
+import pytest
+from fastapi import Response
+
+from src.inference.artifact_bundle import export_from_pickles
+from src.inference.forest_kernel import probe_rows
+from src.inference.prediction_cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def keys(n, version="v1"):
+    return [PredictionCache.key(np.full(30, float(i)), version) for i in range(n)]
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = PredictionCache(max_entries=3)
+    a, b, c, d = keys(4)
+    for key in (a, b, c):
+        cache.put(key, key)
+    # Reading "a" makes "b" the oldest.
+    assert cache.get(a) == a
+    cache.put(d, d)
+    assert cache.get(b) is None
+    assert [cache.get(key) for key in (a, c, d)] == [a, c, d]
+    # Rewriting an entry refreshes it too.
+    cache.put(a, "again")
+    cache.put(b, b)
+    assert cache.get(c) is None and cache.get(a) == "again"
+    assert cache.stats.evictions == 2
+
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=10, ttl_s=5.0, clock=clock)
+    a, b = keys(2)
+    cache.put(a, 1)
+    clock.now = 3.0
+    cache.put(b, 2)
+    # A hit does not extend the entry's lifetime.
+    assert cache.get(a) == 1
+    clock.now = 5.0
+    assert cache.get(a) == 1
+    clock.now = 5.5
+    assert cache.get(a) is None and cache.get(b) == 2
+    clock.now = 8.5
+    assert cache.get(b) is None
+    assert len(cache) == 0
+    assert cache.stats.expirations == 2 and cache.stats.hits == 3 and cache.stats.misses == 2
+
+
+def test_size_never_exceeds_max_entries():
+    cache = PredictionCache(max_entries=16)
+    for i, key in enumerate(keys(100)):
+        cache.put(key, i)
+        assert len(cache) <= 16
+    assert len(cache) == 16 and cache.stats.evictions == 84
+    assert cache.snapshot()["entries"] == 16
+    with pytest.raises(ValueError):
+        PredictionCache(max_entries=0)
+
+
+def test_a_new_model_version_never_sees_old_entries():
+    cache = PredictionCache()
+    row = np.linspace(-1.0, 1.0, 30)
+    cache.put(PredictionCache.key(row, "v1"), "old")
+    assert cache.get(PredictionCache.key(row, "v2")) is None
+    assert cache.get(PredictionCache.key(row, "v1", "retry-1")) is None
+    # -0.0 and 0.0 are the same row.
+    assert PredictionCache.key(np.zeros(30), "v1") == PredictionCache.key(-np.zeros(30), "v1")
+    cache.invalidate()
+    assert len(cache) == 0 and cache.get(PredictionCache.key(row, "v1")) is None
+    assert cache.stats.invalidations == 1
+
+
+def test_activating_a_bundle_clears_the_cache(monkeypatch, tmp_path):
+    app = importlib.import_module("dev.backend.app")
+    for name in ("best_model.pkl", "scaler.pkl"):
+        shutil.copy2(app.ARTIFACTS / name, tmp_path / name)
+    export_from_pickles(tmp_path, allow_pickle=True)
+    cache = PredictionCache()
+    monkeypatch.setattr(app, "_cache", cache)
+    monkeypatch.setattr(app, "_bundle", None)
+    key = PredictionCache.key(np.ones(30), "v1")
+    cache.put(key, "old")
+    bundle = app._load_bundle(tmp_path, "v2")
+    app._activate(bundle)
+    assert cache.get(key) is None and cache.stats.invalidations == 1
+
+
+def test_coalesced_result_is_cached_under_the_bundle_that_scored_it(monkeypatch, tmp_path):
+    app = importlib.import_module("dev.backend.app")
+    # The API only loads the pickle-free bundle; build one for the shipped pickles.
+    for name in ("best_model.pkl", "scaler.pkl"):
+        shutil.copy2(app.ARTIFACTS / name, tmp_path / name)
+    export_from_pickles(tmp_path, allow_pickle=True)
+    monkeypatch.setattr(app, "ARTIFACTS", tmp_path)
+    monkeypatch.setattr(app, "VERSIONS_DIR", tmp_path / "versions")
+    monkeypatch.setattr(app, "COALESCE", True)
+
+    async def scenario():
+        async with app.lifespan(app.app):
+            old = app._bundle
+            reloaded = dataclasses.replace(old, version="reloaded")
+            submit = app._batcher.submit
+
+            async def submit_across_reload(X):
+                # A reload lands while the row waits in the coalescer queue.
+                app._bundle = reloaded
+                return await submit(X)
+
+            monkeypatch.setattr(app._batcher, "submit", submit_across_reload)
+            X = np.ascontiguousarray(probe_rows(old.kernel.scaler, 1, seed=7)) if old.kernel else np.ones((1, 30))
+            await app._predict_row(X, old, Response(), None)
+            return (
+                app._cache.get(PredictionCache.key(X, "reloaded")),
+                app._cache.get(PredictionCache.key(X, old.version)),
+            )
+
+    new_entry, old_entry = asyncio.run(scenario())
+    assert new_entry is not None
+    assert old_entry is None
@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+
+from src.inference.shadow import RotatingLog, ShadowScorer, read_log
+
+
+def score(X):
+    return (X[:, 0] > 0).astype(int), X[:, 0]
+
+
+def submit(scorer, n):
+    X = np.arange(n, dtype=float).reshape(-1, 1)
+    return scorer.submit(X, X[:, 0], np.zeros(n, dtype=int), "champion")
+
+
+def test_stop_scores_the_queue_then_closes_the_log(tmp_path):
+    log = RotatingLog(tmp_path / "scores.ndjson")
+    scorer = ShadowScorer(score, log, "challenger", duty_cycle=1.0, poll_ms=1000.0)
+    scorer.start()
+    assert submit(scorer, 5)
+    scorer.stop()
+    assert log._file.closed
+    assert len(read_log(log.path)) == 5
+
+
+def test_stop_leaves_the_close_to_a_worker_that_outlives_the_timeout(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_score(X):
+        started.set()
+        release.wait(5.0)
+        return score(X)
+
+    log = RotatingLog(tmp_path / "scores.ndjson")
+    scorer = ShadowScorer(slow_score, log, "challenger", max_batch_rows=2, duty_cycle=1.0, poll_ms=1.0)
+    scorer.start()
+    thread = scorer._thread
+    submit(scorer, 2)
+    assert started.wait(5.0)
+    submit(scorer, 2)
+    scorer.stop(timeout=0.01)
+    # The batch being scored still has to be written.
+    assert thread.is_alive() and not log._file.closed
+    assert scorer.stats.shed == 2
+
+    release.set()
+    thread.join(5.0)
+    assert log._file.closed
+    assert len(read_log(log.path)) == 2
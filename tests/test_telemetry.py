@@ -0,0 +1,135 @@
+import importlib
+
+import pytest
+
+from src.inference.telemetry import Counter, Gauge, Histogram, Registry, WindowedRate
+
+# Per-request instrumentation budget stated in the README (Metrics section).
+BUDGET_US = 25.0
+
+
+def _lines(text):
+    return [line for line in text.splitlines() if line]
+
+
+def test_counter_renders_help_type_and_labelled_series():
+    registry = Registry()
+    requests = registry.counter("app_requests_total", "Requests served.", ("path", "status"))
+    requests.labels("/predict", 200).inc()
+    requests.labels("/predict", 200).inc(2)
+    requests.labels(path="/health", status=200).inc()
+
+    assert _lines(registry.render()) == [
+        "# HELP app_requests_total Requests served.",
+        "# TYPE app_requests_total counter",
+        'app_requests_total{path="/health",status="200"} 1.0',
+        'app_requests_total{path="/predict",status="200"} 3.0',
+    ]
+
+
+def test_unlabelled_gauge_and_counter():
+    registry = Registry()
+    registry.gauge("app_threshold", "Threshold.").set(0.35)
+    registry.counter("app_reloads_total", "Reloads.").inc()
+
+    assert _lines(registry.render()) == [
+        "# HELP app_threshold Threshold.",
+        "# TYPE app_threshold gauge",
+        "app_threshold 0.35",
+        "# HELP app_reloads_total Reloads.",
+        "# TYPE app_reloads_total counter",
+        "app_reloads_total 1.0",
+    ]
+
+
+def test_label_values_and_help_are_escaped():
+    registry = Registry()
+    info = registry.gauge("app_info", 'Model "info"\\ with\nnewline.', ("version",))
+    info.labels('v1 "quoted" back\\slash\nnewline').set(1)
+
+    lines = _lines(registry.render())
+    assert lines[0] == '# HELP app_info Model \\"info\\"\\\\ with\\nnewline.'
+    assert lines[2] == 'app_info{version="v1 \\"quoted\\" back\\\\slash\\nnewline"} 1.0'
+
+
+def test_histogram_buckets_sum_and_count():
+    registry = Registry()
+    seconds = registry.histogram("app_seconds", "Latency.", ("stage",), buckets=(0.25, 0.5, 1.0))
+    stage = seconds.labels("predict")
+    # A value on a bound counts in that bucket (``le``).
+    for value in (0.125, 0.25, 0.375, 2.0):
+        stage.observe(value)
+    stage.observe(0.75, count=2)
+
+    assert _lines(registry.render())[1:] == [
+        "# TYPE app_seconds histogram",
+        'app_seconds_bucket{stage="predict",le="0.25"} 2.0',
+        'app_seconds_bucket{stage="predict",le="0.5"} 3.0',
+        'app_seconds_bucket{stage="predict",le="1.0"} 5.0',
+        'app_seconds_bucket{stage="predict",le="+Inf"} 6.0',
+        'app_seconds_sum{stage="predict"} 4.25',
+        'app_seconds_count{stage="predict"} 6.0',
+    ]
+
+
+def test_unlabelled_histogram_has_only_le_label():
+    histogram = Histogram("app_rows", "Rows.", buckets=(1, 4))
+    histogram.observe(3)
+    assert histogram.render()[2:] == [
+        'app_rows_bucket{le="1.0"} 0.0',
+        'app_rows_bucket{le="4.0"} 1.0',
+        'app_rows_bucket{le="+Inf"} 1.0',
+        "app_rows_sum 3.0",
+        "app_rows_count 1.0",
+    ]
+
+
+def test_clear_drops_labelled_series():
+    info = Gauge("app_info", "Info.", ("version",))
+    info.labels("old").set(1)
+    info.clear()
+    info.labels("new").set(1)
+    assert info.render()[2:] == ['app_info{version="new"} 1.0']
+
+
+def test_clear_resets_unlabelled_metric():
+    counter = Counter("app_total", "Total.")
+    counter.inc(5)
+    counter.clear()
+    counter.inc()
+    assert counter.render()[2:] == ["app_total 1.0"]
+
+
+def test_wrong_label_count_is_rejected():
+    counter = Counter("app_total", "Total.", ("path",))
+    with pytest.raises(ValueError):
+        counter.labels("/predict", 200)
+
+
+def test_collectors_render_at_scrape_time():
+    registry = Registry()
+    rate = WindowedRate(window=100, n_blocks=10)
+    rate.update(10, 1)
+
+    def collect():
+        gauge = Gauge("app_fraud_rate", "Fraud rate.")
+        gauge.set(rate.value)
+        yield gauge
+
+    registry.add_collector(collect)
+    assert _lines(registry.render())[-1] == "app_fraud_rate 0.1"
+    rate.update(10, 3)
+    assert _lines(registry.render())[-1] == "app_fraud_rate 0.2"
+
+
+def test_request_instrumentation_stays_within_budget():
+    from benchmarks.bench_telemetry import instrumentation_cost_us
+
+    app = importlib.import_module("dev.backend.app")
+    metrics = app.METRICS
+    try:
+        # Best of several runs, so a busy CI machine does not fail the check.
+        cost = min(instrumentation_cost_us(app, 5_000) for _ in range(5))
+    finally:
+        app.METRICS = metrics
+    assert cost < BUDGET_US, f"instrumentation costs {cost:.2f} us per request (budget {BUDGET_US} us)"